@@ -1,18 +1,145 @@
+import hmac
 import os
-from flask import Flask, request, jsonify, send_from_directory
+import time
+from flask import Flask, Response, g, request, jsonify, send_from_directory, stream_with_context
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
 
 from services.secrm import run_secrm
-from services.eiga import run_eiga
+from services.eiga import run_eiga, stream_eiga
+from services.llm_service import LLM_BREAKER
+from services.pipeline import (
+    build_pipeline_result, compact_pipeline_result, encode_pipeline_result, run_pipeline
+)
+from services.parallel import run_pipeline_parallel
+from services.cache import get_response_cache, get_result_cache
+from services.analytics import dashboard, get_store, record_pipeline_result
+from services.metrics import IN_FLIGHT, REQUESTS, REQUEST_LATENCY, render_latest
+from services.serialization import dumps, dumps_bytes, loads
+from services import admission, classifier, dedup, jobs, retrieval, taxonomy
+from config import ADMIN_TOKEN, ADMISSION_CLIENT_HEADER, JOB_MAX_WAIT, MAX_BATCH_SIZE, TAXONOMY_PATH
+
+
+class FastJSONProvider(JSONProvider):
+    """Compact JSON through services.serialization (orjson when installed)"""
+
+    mimetype = "application/json"
+
+    def dumps(self, obj, **kwargs) -> str:
+        return dumps(obj)
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+    def response(self, *args, **kwargs) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj), mimetype=self.mimetype)
+
+
+def _json_response(body: str) -> Response:
+    """Response for an already-encoded JSON body"""
+    return Response(body, mimetype="application/json")
+
+
+def _encode_result(result: dict, compact: bool) -> str:
+    return dumps(compact_pipeline_result(result)) if compact else encode_pipeline_result(result)
+
+
+def _wants_compact() -> bool:
+    """Opt-in response shape without duplicated fields: ?compact=1"""
+    return request.args.get("compact") == "1"
+
+
+def _wants_stream() -> bool:
+    """SSE mode is requested with ?stream=1 or an Accept: text/event-stream header"""
+    return request.args.get("stream") == "1" or "text/event-stream" in request.headers.get("Accept", "")
+
+
+def _is_admin() -> bool:
+    """Admin routes need ADMIN_TOKEN configured and sent as X-Admin-Token"""
+    token = request.headers.get("X-Admin-Token", "")
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+
+
+def _client_id() -> str:
+    """Who a rate limit applies to: the first address in ADMISSION_CLIENT_HEADER, else the peer"""
+    if ADMISSION_CLIENT_HEADER:
+        forwarded = request.headers.get(ADMISSION_CLIENT_HEADER, "").split(",")[0].strip()
+        if forwarded:
+            return forwarded
+    return request.remote_addr or "unknown"
+
+
+def _sse(event: str, data: object) -> str:
+    return f"event: {event}\ndata: {dumps(data)}\n\n"
+
+
+def _sse_response(events) -> Response:
+    return Response(
+        stream_with_context(events),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 def create_app() -> Flask:
     app = Flask(__name__)
+    app.json = FastJSONProvider(app)
     CORS(app)
+    taxonomy.start_watcher()
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_endpoint = request.endpoint or "unknown"
+        g.metrics_started = time.perf_counter()
+        IN_FLIGHT.inc(endpoint=g.metrics_endpoint)
+
+    @app.before_request
+    def admit_request():
+        lane = admission.lane_for(request.endpoint)
+        if lane is None:
+            return None
+        rejection = admission.get_controller().admit(lane, _client_id())
+        if rejection is not None:
+            response = jsonify({"error": rejection.reason, "lane": lane, "retry_after": rejection.retry_after})
+            response.status_code = rejection.status
+            response.headers["Retry-After"] = str(rejection.retry_after)
+            return response
+        g.admission_lane = lane
+        return None
+
+    @app.after_request
+    def record_request_metrics(response):
+        endpoint = g.get("metrics_endpoint", "unknown")
+        REQUESTS.inc(endpoint=endpoint, status=str(response.status_code))
+        REQUEST_LATENCY.observe(time.perf_counter() - g.metrics_started, endpoint=endpoint)
+        return response
+
+    @app.teardown_request
+    def finish_request_metrics(exc):
+        if "metrics_endpoint" in g:
+            IN_FLIGHT.dec(endpoint=g.metrics_endpoint)
+        if "admission_lane" in g:
+            # Streamed responses release their slot when the stream ends
+            admission.get_controller().release(g.admission_lane, time.perf_counter() - g.metrics_started)
+
+    @app.get("/api/metrics")
+    def metrics_endpoint():
+        return Response(render_latest(), mimetype="text/plain; version=0.0.4")
 
     @app.get("/api/health")
     def health():
-        return jsonify({"status": "ok"})
+        return jsonify({"status": "ok", "llm_circuit": LLM_BREAKER.stats(), "secrm_backend": classifier.status(),
+                        "admission": admission.get_controller().stats()})
+
+    @app.get("/api/cache")
+    def cache_endpoint():
+        cache = get_response_cache()
+        results = get_result_cache()
+        return jsonify({
+            "llm_responses": cache.stats() if cache is not None else {"enabled": False},
+            "analysis_results": results.stats() if results is not None else {"enabled": False}
+        })
 
     @app.post("/api/secrm")
     def secrm_endpoint():
@@ -26,6 +153,11 @@ def create_app() -> Flask:
         data = request.get_json(silent=True) or {}
         secrm_data = data.get("secrm_data", {})
         text = data.get("text", "")
+        if _wants_stream():
+            def events():
+                for event, payload in stream_eiga(secrm_data, text):
+                    yield _sse(event, {"text": payload} if event == "token" else payload)
+            return _sse_response(events())
         result = run_eiga(secrm_data=secrm_data, original_text=text)
         return jsonify(result)
 
@@ -33,77 +165,143 @@ def create_app() -> Flask:
     def pipeline_endpoint():
         data = request.get_json(silent=True) or {}
         text = data.get("text", "")
-        secrm_data = run_secrm(text)
-        eiga_result = run_eiga(secrm_data=secrm_data, original_text=text)
-        return jsonify({
-            "secrm_analysis": secrm_data,
-            "eiga_analysis": eiga_result,
-            "components": secrm_data.get("components", []),
-            **eiga_result
-        })
+        started = time.perf_counter()
+        compact = _wants_compact()
+        if _wants_stream():
+            def events():
+                # SECRM is cheap: send it before the LLM starts generating
+                secrm_data = run_secrm(text)
+                yield _sse("secrm", secrm_data)
+                lookup = dedup.check(text, secrm_data)
+                if lookup is not None and lookup.reused is not None:
+                    result = build_pipeline_result(secrm_data, lookup.reused)
+                    record_pipeline_result(result, (time.perf_counter() - started) * 1000)
+                    yield f"event: result\ndata: {_encode_result(result, compact)}\n\n"
+                    return
+                for event, payload in stream_eiga(secrm_data, text):
+                    if event == "token":
+                        yield _sse("token", {"text": payload})
+                    else:
+                        dedup.remember(lookup, payload)
+                        result = build_pipeline_result(secrm_data, payload)
+                        record_pipeline_result(result, (time.perf_counter() - started) * 1000)
+                        yield f"event: result\ndata: {_encode_result(result, compact)}\n\n"
+            return _sse_response(events())
+        result = run_pipeline(text)
+        record_pipeline_result(result, (time.perf_counter() - started) * 1000)
+        return _json_response(_encode_result(result, compact))
+
+    @app.post("/api/pipeline/batch")
+    def pipeline_batch_endpoint():
+        data = request.get_json(silent=True) or {}
+        texts = data.get("texts", [])
+        if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+            return jsonify({"error": "texts must be a list of strings"}), 400
+        if len(texts) > MAX_BATCH_SIZE:
+            return jsonify({"error": f"batch size exceeds {MAX_BATCH_SIZE}"}), 413
+        started = time.perf_counter()
+        results = run_pipeline_parallel(texts)
+        if results:
+            per_item_ms = (time.perf_counter() - started) * 1000 / len(results)
+            for result in results:
+                record_pipeline_result(result, per_item_ms)
+        compact = _wants_compact()
+        encoded = ",".join(_encode_result(result, compact) for result in results)
+        return _json_response(f'{{"results":[{encoded}],"count":{len(results)}}}')
+
+    @app.post("/api/jobs")
+    def job_submit_endpoint():
+        """Queue a pipeline request and answer with its job id straight away"""
+        job_queue = jobs.get_queue()
+        if job_queue is None:
+            return jsonify({"error": "job queue is disabled"}), 503
+        data = request.get_json(silent=True) or {}
+        text = data.get("text", "")
+        if not isinstance(text, str) or not text:
+            return jsonify({"error": "text must be a non-empty string"}), 400
+        try:
+            job = job_queue.submit(text, compact=_wants_compact())
+        except jobs.QueueFull as e:
+            response = jsonify({"error": str(e)})
+            response.headers["Retry-After"] = "5"
+            return response, 503
+        response = jsonify(job)
+        response.headers["Location"] = f"/api/jobs/{job['job_id']}"
+        return response, 202
+
+    @app.get("/api/jobs")
+    def job_stats_endpoint():
+        job_queue = jobs.get_queue()
+        return jsonify(job_queue.stats() if job_queue is not None else {"enabled": False})
+
+    @app.get("/api/jobs/<job_id>")
+    def job_endpoint(job_id: str):
+        """Poll a job; ?wait=N holds the request up to N seconds until it finishes"""
+        job_queue = jobs.get_queue()
+        if job_queue is None:
+            return jsonify({"error": "job queue is disabled"}), 503
+        try:
+            wait = min(max(float(request.args.get("wait", 0)), 0.0), JOB_MAX_WAIT)
+        except ValueError:
+            return jsonify({"error": "wait must be a number of seconds"}), 400
+        job = job_queue.wait(job_id, wait) if wait > 0 else job_queue.get(job_id)
+        if job is None:
+            return jsonify({"error": "unknown job"}), 404
+        return _json_response(jobs.encode_job(job))
 
     @app.get("/api/analytics")
     def analytics_endpoint():
         """Get analytics dashboard data"""
-        import random
-        from datetime import datetime, timedelta
-        
-        # Generate mock analytics data
-        analytics_data = {
-            "metrics": {
-                "accuracy_rate": round(92.4 + random.uniform(-2, 2), 1),
-                "avg_response_time": round(1.2 + random.uniform(-0.3, 0.3), 1),
-                "customer_satisfaction": round(87 + random.uniform(-3, 3), 1),
-                "cost_savings": round(2.4 + random.uniform(-0.2, 0.2), 1),
-                "total_analyses": random.randint(15000, 25000),
-                "active_issues": random.randint(45, 85)
-            },
-            "trends": {
-                "sentiment_trend": [random.randint(60, 90) for _ in range(30)],
-                "component_distribution": {
-                    "battery": random.randint(25, 35),
-                    "overheating": random.randint(15, 25),
-                    "performance": random.randint(20, 30),
-                    "display": random.randint(10, 20),
-                    "network": random.randint(8, 15),
-                    "audio": random.randint(5, 12),
-                    "build_quality": random.randint(3, 8),
-                    "software": random.randint(12, 18)
-                }
-            },
-            "recent_activity": [
-                {
-                    "id": 1,
-                    "type": "component_detected",
-                    "component": "battery",
-                    "confidence": 94,
-                    "severity": "critical",
-                    "timestamp": (datetime.now() - timedelta(minutes=2)).isoformat()
-                },
-                {
-                    "id": 2,
-                    "type": "response_generated",
-                    "component": "overheating",
-                    "quality_score": 91,
-                    "timestamp": (datetime.now() - timedelta(minutes=5)).isoformat()
-                },
-                {
-                    "id": 3,
-                    "type": "trend_identified",
-                    "description": "Performance issues increasing in Q4",
-                    "impact": "high",
-                    "timestamp": (datetime.now() - timedelta(minutes=10)).isoformat()
-                }
-            ],
-            "model_performance": {
-                "secrm_accuracy": round(94 + random.uniform(-2, 2), 1),
-                "eiga_quality": round(91 + random.uniform(-2, 2), 1),
-                "sentiment_accuracy": round(89 + random.uniform(-2, 2), 1),
-                "urgency_detection": round(96 + random.uniform(-1, 1), 1)
-            }
-        }
-        
-        return jsonify(analytics_data)
+        store = get_store()
+        if store is None:
+            return jsonify({"error": "analytics store is disabled"}), 503
+        result = dashboard(store, taxonomy.current().sections["keywords"])
+        result["near_duplicates"] = dedup.stats()
+        return jsonify(result)
+
+    @app.get("/api/admin/taxonomy")
+    def taxonomy_endpoint():
+        if not _is_admin():
+            return jsonify({"error": "forbidden"}), 403
+        return jsonify(taxonomy.status())
+
+    @app.post("/api/admin/taxonomy/reload")
+    def taxonomy_reload_endpoint():
+        """Re-read TAXONOMY_PATH and swap the new tables in"""
+        if not _is_admin():
+            return jsonify({"error": "forbidden"}), 403
+        if not TAXONOMY_PATH:
+            return jsonify({"error": "TAXONOMY_PATH is not set"}), 400
+        try:
+            result = taxonomy.reload()
+        except taxonomy.TaxonomyError as e:
+            return jsonify({"error": str(e), "version": taxonomy.current().version}), 400
+        return jsonify(result)
+
+    @app.get("/api/admin/resolved")
+    def resolved_stats_endpoint():
+        if not _is_admin():
+            return jsonify({"error": "forbidden"}), 403
+        return jsonify(retrieval.stats())
+
+    @app.post("/api/admin/resolved")
+    def resolved_add_endpoint():
+        """Add resolved tickets and their agent replies to the retrieval index"""
+        if not _is_admin():
+            return jsonify({"error": "forbidden"}), 403
+        index = retrieval.get_index()
+        if index is None:
+            return jsonify({"error": "RETRIEVAL_PATH is not set"}), 400
+        data = request.get_json(silent=True) or {}
+        tickets = data.get("tickets", [data])
+        if not isinstance(tickets, list) or not all(
+                isinstance(t, dict) and isinstance(t.get("text"), str) and isinstance(t.get("reply"), str) and t["text"] and t["reply"]
+                for t in tickets):
+            return jsonify({"error": "each ticket needs non-empty text and reply strings"}), 400
+        if len(tickets) > MAX_BATCH_SIZE:
+            return jsonify({"error": f"batch size exceeds {MAX_BATCH_SIZE}"}), 413
+        ids = index.add_many(tickets)
+        return jsonify({"ids": ids, "tickets": len(index)})
 
     # Static front-end if served by Flask (optional)
     @app.get("/")
@@ -118,7 +316,17 @@ def create_app() -> Flask:
 
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="SECRM-EIGA development server")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="print a cold-start import time breakdown and exit")
+    if parser.parse_args().startup_report:
+        from benchmarks.startup import main as startup_report
+        raise SystemExit(startup_report([]))
+
     app = create_app()
+    jobs.start_workers()
     port = int(os.getenv("PORT", "5000"))
     app.run(host="0.0.0.0", port=port, debug=True)
 
@@ -0,0 +1,126 @@
+"""
+ASGI entry point for SECRM-EIGA
+Serves the LLM-bound API routes on one event loop so a single process can
+hold hundreds of pending completions:
+
+    uvicorn asgi:app --host 0.0.0.0 --port 8000
+
+Point OPENAI_BASE_URL at a local stub server to test without OpenAI.
+"""
+
+import time
+from typing import Awaitable, Callable, Dict, Tuple
+
+from services.secrm import run_secrm
+from services.eiga import run_eiga_async
+from services.async_llm_service import AsyncLLMService
+from services.pipeline import build_pipeline_result
+from services.analytics import record_pipeline_result
+from services.serialization import dumps_bytes, loads
+from services import dedup, taxonomy
+
+
+llm_service = AsyncLLMService()
+
+
+async def _read_json(receive: Callable[[], Awaitable[Dict]]) -> Dict:
+    body = b""
+    more = True
+    while more:
+        message = await receive()
+        body += message.get("body", b"")
+        more = message.get("more_body", False)
+    try:
+        data = loads(body or b"{}")
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+async def _send_json(send: Callable[[Dict], Awaitable[None]], payload: object, status: int = 200) -> None:
+    body = dumps_bytes(payload)
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"access-control-allow-origin", b"*"),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def health(data: Dict) -> Tuple[object, int]:
+    return {"status": "ok"}, 200
+
+
+async def secrm_endpoint(data: Dict) -> Tuple[object, int]:
+    return {"components": run_secrm(data.get("text", ""))}, 200
+
+
+async def eiga_endpoint(data: Dict) -> Tuple[object, int]:
+    result = await run_eiga_async(data.get("secrm_data", {}), data.get("text", ""), llm_service)
+    return result, 200
+
+
+async def pipeline_endpoint(data: Dict) -> Tuple[object, int]:
+    text = data.get("text", "")
+    started = time.perf_counter()
+    secrm_data = run_secrm(text)
+    lookup = dedup.check(text, secrm_data)
+    if lookup is not None and lookup.reused is not None:
+        eiga_result = lookup.reused
+    else:
+        eiga_result = await run_eiga_async(secrm_data, text, llm_service)
+        dedup.remember(lookup, eiga_result)
+    result = build_pipeline_result(secrm_data, eiga_result)
+    record_pipeline_result(result, (time.perf_counter() - started) * 1000)
+    return result, 200
+
+
+ROUTES = {
+    ("GET", "/api/health"): health,
+    ("POST", "/api/secrm"): secrm_endpoint,
+    ("POST", "/api/eiga"): eiga_endpoint,
+    ("POST", "/api/pipeline"): pipeline_endpoint,
+}
+
+
+async def app(scope: Dict, receive: Callable, send: Callable) -> None:
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                taxonomy.start_watcher()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await llm_service.aclose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    if scope["type"] != "http":
+        return
+
+    if scope["method"] == "OPTIONS":
+        # CORS preflight, mirroring flask_cors defaults in app.py
+        await send({
+            "type": "http.response.start",
+            "status": 204,
+            "headers": [
+                (b"access-control-allow-origin", b"*"),
+                (b"access-control-allow-methods", b"GET, POST, OPTIONS"),
+                (b"access-control-allow-headers", b"content-type"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": b""})
+        return
+
+    handler = ROUTES.get((scope["method"], scope["path"]))
+    if handler is None:
+        await _send_json(send, {"error": "not found"}, 404)
+        return
+
+    data = await _read_json(receive) if scope["method"] == "POST" else {}
+    payload, status = await handler(data)
+    await _send_json(send, payload, status)
@@ -0,0 +1 @@
+"""Benchmark harness for the SECRM-EIGA pipeline"""
@@ -0,0 +1,93 @@
+"""
+Deterministic synthetic ticket corpus
+Mixes ticket lengths, languages and component combinations drawn from the
+SECRM keyword tables so benchmark runs are comparable across commits
+
+Usage:
+    python -m benchmarks.corpus --size 10000 --seed 7 > tickets.ndjson
+"""
+
+import argparse
+import json
+import random
+import sys
+from typing import Dict, Iterator, List, Optional
+
+from services.secrm import KEYWORDS, LANGUAGE_DETECTION, SENTIMENT_KEYWORDS
+
+
+LENGTHS = {"short": (1, 2), "medium": (3, 8), "long": (20, 60)}
+LENGTH_WEIGHTS = {"short": 0.5, "medium": 0.4, "long": 0.1}
+LANGUAGE_WEIGHTS = {"english": 0.8, "spanish": 0.05, "french": 0.05, "german": 0.04, "chinese": 0.03, "japanese": 0.03}
+
+SENTENCES = [
+    "My {device} has a problem with the {trigger}.",
+    "Since last week the {trigger} is getting worse every day.",
+    "I noticed the {trigger} right after I bought it.",
+    "Honestly the {trigger} is {sentiment} and I expected more.",
+    "Can someone help? The {trigger} keeps happening on my {device}.",
+    "It was {sentiment} at first but now the {trigger} makes it hard to use.",
+]
+FILLER = [
+    "I use it mostly for work emails and video calls.",
+    "I already tried restarting it twice.",
+    "The order number is in my account history.",
+    "My previous {device} never had anything like this.",
+    "Please let me know what information you need from me.",
+]
+DEVICES = ["phone", "laptop", "tablet", "headset", "smart speaker", "console"]
+
+
+def _pick(rng: random.Random, weights: Dict[str, float]) -> str:
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+def generate_ticket(rng: random.Random, index: int) -> Dict[str, object]:
+    """Build one ticket with a known component mix, length class and language"""
+    labels = rng.sample(list(KEYWORDS), rng.choice([0, 1, 1, 1, 2, 2, 3]))
+    length = _pick(rng, LENGTH_WEIGHTS)
+    language = _pick(rng, LANGUAGE_WEIGHTS)
+    sentiment_words = SENTIMENT_KEYWORDS[rng.choice(list(SENTIMENT_KEYWORDS))]
+    device = rng.choice(DEVICES)
+
+    low, high = LENGTHS[length]
+    sentences: List[str] = []
+    for _ in range(rng.randint(low, high)):
+        if labels and rng.random() < 0.6:
+            trigger = rng.choice(KEYWORDS[rng.choice(labels)]["triggers"])
+            template = rng.choice(SENTENCES)
+            sentences.append(template.format(device=device, trigger=trigger, sentiment=rng.choice(sentiment_words)))
+        else:
+            sentences.append(rng.choice(FILLER).format(device=device))
+        if language != "english":
+            sentences.append(" ".join(rng.choices(LANGUAGE_DETECTION[language], k=rng.randint(4, 10))))
+
+    return {
+        "id": index,
+        "text": " ".join(sentences),
+        "length": length,
+        "language": language,
+        "components": labels
+    }
+
+
+def generate_corpus(size: int, seed: int = 7) -> Iterator[Dict[str, object]]:
+    """Yield ``size`` tickets; the same seed always yields the same corpus"""
+    rng = random.Random(seed)
+    for index in range(size):
+        yield generate_ticket(rng, index)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Write a synthetic ticket corpus as NDJSON")
+    parser.add_argument("--size", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    for ticket in generate_corpus(args.size, args.seed):
+        sys.stdout.write(json.dumps(ticket, ensure_ascii=False) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
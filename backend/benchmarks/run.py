@@ -0,0 +1,307 @@
+"""
+Benchmark runner for SECRM-EIGA
+Microbenchmarks per pipeline function plus an end-to-end load test through
+the Flask app, with the OpenAI client replaced by an in-process stub so runs
+are repeatable and free. Results are written as JSON for comparison across
+commits:
+
+    python -m benchmarks.run -o before.json
+    git checkout my-branch
+    python -m benchmarks.run -o after.json --compare before.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+STUB_REPLY = ("Thanks for reaching out and for the detailed description. We have logged the issue "
+              "with our technical team and will follow up with next steps shortly.")
+
+# Lower is better for these keys; everything else in a section is informational
+COMPARED_KEYS = ("p50_ms", "p95_ms", "p99_ms")
+
+
+def configure_environment(cache: bool, analytics: bool, workdir: str) -> None:
+    """Point config at the stub LLM and throwaway stores; must run before importing services"""
+    os.environ["OPENAI_API_KEY"] = "benchmark-stub"
+    os.environ["LLM_CACHE_SIZE"] = os.environ.get("LLM_CACHE_SIZE", "10000") if cache else "0"
+    os.environ["LLM_CACHE_PATH"] = ""
+    os.environ["ANALYTICS_DB_PATH"] = os.path.join(workdir, "analytics.db") if analytics else ""
+    os.environ["PIPELINE_WORKERS"] = "1"
+    if not cache:
+        # SECRM results are memoized too; repeated corpus texts would skip the work being measured
+        os.environ["RESULT_CACHE_BYTES"] = "0"
+
+
+def install_stub_llm(latency_ms: float) -> None:
+    """Replace openai.ChatCompletion with a stub that sleeps ``latency_ms`` per call"""
+    import openai
+
+    delay = latency_ms / 1000.0
+    words = [word + " " for word in STUB_REPLY.split()]
+
+    class StubChatCompletion:
+        @staticmethod
+        def create(stream: bool = False, **kwargs):
+            time.sleep(delay)
+            if stream:
+                return (SimpleNamespace(choices=[SimpleNamespace(delta={"content": word})]) for word in words)
+            content, tokens = STUB_REPLY, 180
+            if "response_format" in kwargs:
+                # Micro-batched multi-ticket prompt: answer every ticket in JSON
+                ids = re.findall(r'^Ticket "([^"]+)":', kwargs["messages"][-1]["content"], re.MULTILINE)
+                content = json.dumps({"responses": [{"id": ticket_id, "response": STUB_REPLY} for ticket_id in ids]})
+                tokens = 120 * len(ids) + 60
+            return SimpleNamespace(
+                choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+                usage=SimpleNamespace(prompt_tokens=tokens - 60, completion_tokens=60, total_tokens=tokens)
+            )
+
+    openai.ChatCompletion = StubChatCompletion
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(samples_ns: List[int], items: int, wall_seconds: float) -> Dict[str, float]:
+    """Latency percentiles in ms plus throughput in items per second"""
+    ms = sorted(sample / 1e6 for sample in samples_ns)
+    return {
+        "calls": len(ms),
+        "p50_ms": round(percentile(ms, 50), 4),
+        "p95_ms": round(percentile(ms, 95), 4),
+        "p99_ms": round(percentile(ms, 99), 4),
+        "mean_ms": round(statistics.fmean(ms), 4) if ms else 0.0,
+        "max_ms": round(ms[-1], 4) if ms else 0.0,
+        "throughput_per_s": round(items / wall_seconds, 1) if wall_seconds > 0 else 0.0
+    }
+
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def bench(func: Callable, args_list: List[tuple], warmup: int = 50, items_per_call: int = 1) -> Dict[str, float]:
+    """Time ``func(*args)`` once per entry in ``args_list``"""
+    for args in args_list[:warmup]:
+        func(*args)
+    samples = []
+    clock = time.perf_counter_ns
+    started = clock()
+    for args in args_list:
+        t0 = clock()
+        func(*args)
+        samples.append(clock() - t0)
+    return summarize(samples, len(args_list) * items_per_call, (clock() - started) / 1e9)
+
+
+def run_micro(tickets: List[Dict], batch_size: int) -> Dict[str, Dict[str, float]]:
+    """One entry per pipeline function, each fed the whole corpus"""
+    from services.secrm import detect_language, extract_sentiment, find_matches, run_secrm, run_secrm_batch
+    from services.eiga import generate_business_recommendations, run_eiga
+    from services.llm_service import LLMService
+    from services.pipeline import run_pipeline
+
+    texts = [ticket["text"] for ticket in tickets]
+    secrm_results = [run_secrm(text) for text in texts]
+    batches = [(texts[i:i + batch_size],) for i in range(0, len(texts), batch_size)]
+    llm_service = LLMService()
+
+    results = {
+        "detect_language": bench(detect_language, [(text,) for text in texts]),
+        "find_matches": bench(find_matches, [(text,) for text in texts]),
+        "extract_sentiment": bench(extract_sentiment, [(text,) for text in texts]),
+        "run_secrm": bench(run_secrm, [(text,) for text in texts]),
+        "run_secrm_batch": bench(run_secrm_batch, batches, warmup=2, items_per_call=batch_size),
+        "generate_business_recommendations": bench(
+            generate_business_recommendations, [(data["components"], data["urgency"]) for data in secrm_results]),
+        "run_eiga": bench(run_eiga, [(data, text, llm_service) for data, text in zip(secrm_results, texts)]),
+        "run_pipeline": bench(run_pipeline, [(text,) for text in texts])
+    }
+    results["run_secrm_batch"]["batch_size"] = batch_size
+    return results
+
+
+def run_load(tickets: List[Dict], requests: int, concurrency: int, stream: bool) -> Dict[str, float]:
+    """Drive POST /api/pipeline from ``concurrency`` threads through the Flask test client"""
+    from app import create_app
+
+    app = create_app()
+    app.config["TESTING"] = True
+    path = "/api/pipeline?stream=1" if stream else "/api/pipeline"
+    samples: List[int] = []
+    failures = [0]
+    lock = threading.Lock()
+    next_index = [0]
+
+    def worker() -> None:
+        client = app.test_client()
+        local: List[int] = []
+        errors = 0
+        while True:
+            with lock:
+                index = next_index[0]
+                next_index[0] += 1
+            if index >= requests:
+                break
+            text = tickets[index % len(tickets)]["text"]
+            t0 = time.perf_counter_ns()
+            response = client.post(path, json={"text": text})
+            response.get_data()
+            local.append(time.perf_counter_ns() - t0)
+            if response.status_code != 200:
+                errors += 1
+        with lock:
+            samples.extend(local)
+            failures[0] += errors
+
+    # Warm imports, caches and the first request path outside the timed window
+    app.test_client().post(path, json={"text": tickets[0]["text"]})
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    summary = summarize(samples, len(samples), wall)
+    summary.update({"concurrency": concurrency, "errors": failures[0], "stream": stream})
+    return summary
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline: Dict, current: Dict, threshold: float) -> List[str]:
+    """Print a per-benchmark delta table to stderr and return the regressed keys"""
+    regressions = []
+    rows = []
+    for key in ("corpus_size", "seed", "llm_latency_ms", "cache", "cpus"):
+        if baseline.get("meta", {}).get(key) != current["meta"].get(key):
+            sys.stderr.write(f"warning: {key} differs from the baseline run; deltas are not like for like\n")
+    for section in ("micro", "load", "cold_start"):
+        base_section = baseline.get(section, {})
+        cur_section = current.get(section, {})
+        if section in ("load", "cold_start"):
+            base_section, cur_section = {"pipeline": base_section}, {"pipeline": cur_section}
+        for name, stats in cur_section.items():
+            base_stats = base_section.get(name)
+            if not base_stats:
+                continue
+            for key in COMPARED_KEYS:
+                old, new = base_stats.get(key), stats.get(key)
+                if not old or new is None:
+                    continue
+                delta = 100.0 * (new - old) / old
+                flag = ""
+                if delta > threshold:
+                    flag = "  REGRESSION"
+                    regressions.append(f"{section}.{name}.{key}")
+                rows.append(f"{section + '.' + name:<44} {key:<7} {old:>10.4f} {new:>10.4f} {delta:>+8.1f}%{flag}")
+    sys.stderr.write(f"{'benchmark':<44} {'metric':<7} {'baseline':>10} {'current':>10} {'delta':>9}\n")
+    sys.stderr.write("\n".join(rows) + "\n")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the SECRM-EIGA pipeline")
+    parser.add_argument("-o", "--output", help="write results JSON here (default: stdout)")
+    parser.add_argument("--size", type=int, default=2000, help="synthetic corpus size")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--requests", type=int, default=1000, help="end-to-end requests (0 skips the load test)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--stream", action="store_true", help="load test the SSE mode of /api/pipeline")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="simulated stub LLM latency")
+    parser.add_argument("--cache", action="store_true", help="keep the LLM response and SECRM result caches enabled")
+    parser.add_argument("--no-analytics", action="store_true", help="do not record runs in the analytics store")
+    parser.add_argument("--skip-micro", action="store_true")
+    parser.add_argument("--cold-start-runs", type=int, default=5,
+                        help="fresh-interpreter starts of the app to time (0 skips)")
+    parser.add_argument("--compare", metavar="BASELINE", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="percent slowdown that counts as a regression (default: 10)")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="secrm-bench-")
+    configure_environment(args.cache, not args.no_analytics, workdir)
+    install_stub_llm(args.llm_latency_ms)
+    from .corpus import generate_corpus
+
+    tickets = list(generate_corpus(args.size, args.seed))
+    report: Dict[str, object] = {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "corpus_size": args.size,
+            "seed": args.seed,
+            "corpus_chars": sum(len(ticket["text"]) for ticket in tickets),
+            "llm_latency_ms": args.llm_latency_ms,
+            "cache": args.cache
+        }
+    }
+
+    if not args.skip_micro:
+        report["micro"] = run_micro(tickets, args.batch_size)
+        report["peak_rss_mb_micro"] = peak_rss_mb()
+    if args.requests > 0:
+        report["load"] = run_load(tickets, args.requests, args.concurrency, args.stream)
+    report["peak_rss_mb"] = peak_rss_mb()
+    if args.cold_start_runs > 0:
+        from .startup import measure
+
+        report["cold_start"] = measure("app", args.cold_start_runs)
+
+    encoded = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(encoded + "\n")
+    else:
+        sys.stdout.write(encoded + "\n")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as handle:
+            regressions = compare(json.load(handle), report, args.threshold)
+        if regressions:
+            sys.stderr.write(f"{len(regressions)} regression(s) above {args.threshold}%\n")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
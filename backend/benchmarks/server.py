@@ -0,0 +1,127 @@
+"""
+Production server throughput for SECRM-EIGA
+Starts gunicorn with gunicorn.conf.py once per worker count and drives
+POST /api/pipeline from separate client processes over keep-alive
+connections. The server runs in demo mode, so requests are CPU-bound and
+throughput should grow with workers up to the number of cores:
+
+    python -m benchmarks.server --workers 1 2 4 --requests 4000
+"""
+
+import argparse
+import http.client
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from .run import percentile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workers: int, port: int, interface: str, threads: int) -> subprocess.Popen:
+    env = dict(os.environ, OPENAI_API_KEY="", ANALYTICS_DB_PATH="", LLM_CACHE_SIZE="0",
+               RESULT_CACHE_BYTES="0", SERVER_BIND=f"127.0.0.1:{port}", SERVER_WORKERS=str(workers),
+               SERVER_THREADS=str(threads), SERVER_INTERFACE=interface)
+    process = subprocess.Popen([sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py"], cwd=BACKEND_DIR,
+                               env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("gunicorn exited during startup; is it installed?")
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", "/api/health")
+            if connection.getresponse().status == 200:
+                return process
+        except OSError:
+            time.sleep(0.1)
+    stop_server(process)
+    raise RuntimeError(f"gunicorn did not answer on port {port}")
+
+
+def stop_server(process: subprocess.Popen) -> None:
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def _client(port: int, bodies: List[bytes]) -> List[int]:
+    """One client process: send every body in turn on one connection, return latencies in ns"""
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    headers = {"Content-Type": "application/json"}
+    samples = []
+    for body in bodies:
+        started = time.perf_counter_ns()
+        connection.request("POST", "/api/pipeline", body=body, headers=headers)
+        response = connection.getresponse()
+        response.read()
+        samples.append(time.perf_counter_ns() - started)
+        if response.status != 200:
+            raise RuntimeError(f"HTTP {response.status}")
+    connection.close()
+    return samples
+
+
+def measure(workers: int, requests: int, clients: int, interface: str = "wsgi", threads: int = 8) -> Dict[str, float]:
+    """Requests per second and latency for one worker count"""
+    from .corpus import generate_corpus
+
+    bodies = [json.dumps({"text": ticket["text"]}).encode() for ticket in generate_corpus(min(requests, 2000))]
+    port = _free_port()
+    process = start_server(workers, port, interface, threads)
+    try:
+        with ProcessPoolExecutor(max_workers=clients) as pool:
+            # Warm every worker's first-request path outside the timed window
+            list(pool.map(_client, [port] * clients, [bodies[:5]] * clients))
+            shares = [[bodies[i % len(bodies)] for i in range(start, requests, clients)] for start in range(clients)]
+            started = time.perf_counter()
+            results = list(pool.map(_client, [port] * clients, shares))
+            wall = time.perf_counter() - started
+    finally:
+        stop_server(process)
+    samples = sorted(sample / 1e6 for result in results for sample in result)
+    return {
+        "workers": workers,
+        "requests": len(samples),
+        "throughput_rps": round(len(samples) / wall, 1),
+        "p50_ms": round(percentile(samples, 50), 2),
+        "p95_ms": round(percentile(samples, 95), 2),
+        "p99_ms": round(percentile(samples, 99), 2)
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load test gunicorn across worker counts")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="worker counts to compare")
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--clients", type=int, default=0, help="client processes (default: 2 per worker)")
+    parser.add_argument("--interface", choices=("wsgi", "asgi"), default="wsgi")
+    parser.add_argument("--threads", type=int, default=8, help="threads per wsgi worker")
+    args = parser.parse_args(argv)
+
+    runs = []
+    for workers in args.workers:
+        result = measure(workers, args.requests, args.clients or 2 * workers, args.interface, args.threads)
+        result["speedup"] = round(result["throughput_rps"] / runs[0]["throughput_rps"], 2) if runs else 1.0
+        runs.append(result)
+    sys.stdout.write(json.dumps({"cpus": os.cpu_count(), "interface": args.interface, "runs": runs}, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""
+Cold-start report for SECRM-EIGA
+Starts fresh interpreters that import the app and call ``create_app()``,
+timing each one, and breaks one start down per module with
+``python -X importtime``:
+
+    python -m benchmarks.startup --runs 10
+    python app.py --startup-report
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# What each entry point runs before it can serve a request
+TARGETS = {
+    "app": "import app; app.create_app()",
+    "asgi": "import asgi",
+    "bulk": "import bulk"
+}
+
+
+def _child_code(target: str) -> str:
+    return ("import time; _t = time.perf_counter()\n"
+            f"{TARGETS[target]}\n"
+            "print((time.perf_counter() - _t) * 1000)")
+
+
+def _run(target: str, importtime: bool = False) -> Tuple[float, float, str]:
+    """One cold start: (process wall ms, app import ms, importtime stderr)"""
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += ["-c", _child_code(target)]
+    started = time.perf_counter()
+    completed = subprocess.run(command, cwd=BACKEND_DIR, capture_output=True, text=True)
+    wall = (time.perf_counter() - started) * 1000
+    if completed.returncode != 0:
+        raise RuntimeError(f"cold start of {target} failed:\n{completed.stderr}")
+    return wall, float(completed.stdout.strip().splitlines()[-1]), completed.stderr
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, object]]:
+    """Turn ``-X importtime`` output into rows of self/cumulative microseconds"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # header line
+        name = fields[2].rstrip()
+        rows.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip())) // 2,
+            "self_us": int(fields[0]),
+            "cumulative_us": int(fields[1])
+        })
+    return rows
+
+
+def measure(target: str = "app", runs: int = 5) -> Dict[str, float]:
+    """Cold-start latency over ``runs`` fresh interpreters, in ms"""
+    walls, imports = [], []
+    for _ in range(runs):
+        wall, imported, _ = _run(target)
+        walls.append(wall)
+        imports.append(imported)
+    walls.sort()
+    imports.sort()
+    return {
+        "runs": runs,
+        "p50_ms": round(statistics.median(walls), 1),
+        "p95_ms": round(walls[min(len(walls) - 1, int(0.95 * len(walls)))], 1),
+        "p99_ms": round(walls[-1], 1),
+        "import_p50_ms": round(statistics.median(imports), 1)
+    }
+
+
+def breakdown(target: str = "app") -> Dict[str, object]:
+    """Per-module import times for one cold start"""
+    _, _, stderr = _run(target, importtime=True)
+    rows = parse_importtime(stderr)
+    packages: Dict[str, int] = {}
+    for row in rows:
+        top = row["module"].split(".")[0]
+        packages[top] = packages.get(top, 0) + row["self_us"]
+    return {"modules": rows, "packages": packages}
+
+
+def format_report(target: str, timing: Dict[str, float], detail: Dict[str, object], top: int) -> str:
+    lines = [
+        f"Cold start of {target} over {timing['runs']} runs: "
+        f"{timing['p50_ms']:.1f} ms median to ready, "
+        f"{timing['import_p50_ms']:.1f} ms of it importing and building the app",
+        "",
+        "Slowest imports by cumulative time (one -X importtime run, so inflated):",
+        f"{'cumulative':>12} {'self':>9}  module"
+    ]
+    modules = sorted(detail["modules"], key=lambda row: row["cumulative_us"], reverse=True)
+    for row in modules[:top]:
+        lines.append(f"{row['cumulative_us'] / 1000:>10.1f}ms {row['self_us'] / 1000:>7.1f}ms  "
+                     f"{'  ' * row['depth']}{row['module']}")
+    lines += ["", "Self time per top-level package:", f"{'self':>12}  package"]
+    packages = sorted(detail["packages"].items(), key=lambda item: item[1], reverse=True)
+    for name, self_us in packages[:top]:
+        lines.append(f"{self_us / 1000:>10.1f}ms  {name}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Report cold-start time of the SECRM-EIGA backend")
+    parser.add_argument("--target", choices=sorted(TARGETS), default="app", help="entry point to start")
+    parser.add_argument("--runs", type=int, default=5, help="timed cold starts")
+    parser.add_argument("--top", type=int, default=20, help="rows per table")
+    parser.add_argument("--json", action="store_true", help="print the raw measurements as JSON")
+    args = parser.parse_args(argv)
+
+    timing = measure(args.target, max(1, args.runs))
+    detail = breakdown(args.target)
+    if args.json:
+        sys.stdout.write(json.dumps({"target": args.target, "timing": timing, **detail}, indent=2) + "\n")
+    else:
+        sys.stdout.write(format_report(args.target, timing, detail, args.top) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""
+Bulk SECRM-EIGA pipeline over NDJSON
+Streams tickets from a file or stdin in bounded chunks and writes one result per line
+
+Usage:
+    python bulk.py tickets.ndjson -o results.ndjson
+    cat tickets.ndjson | python bulk.py --chunk-size 1000 > results.ndjson
+    python bulk.py tickets.ndjson -o results.ndjson --workers 0   # one process per core
+"""
+
+import argparse
+import json
+import sys
+import time
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from config import PIPELINE_WORKERS
+from services.parallel import imap_batches
+from services.pipeline import run_pipeline_batch_json
+
+
+def read_ndjson(stream: TextIO, text_field: str = "text") -> Iterator[Tuple[int, Dict, Optional[str]]]:
+    """Yield (line number, record, error) triples, one line at a time"""
+    for line_no, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_no, {}, f"invalid JSON: {e}"
+            continue
+        if isinstance(record, str):
+            record = {text_field: record}
+        if not isinstance(record, dict):
+            yield line_no, {}, "expected a JSON object or string"
+        elif not isinstance(record.get(text_field), str):
+            yield line_no, record, f"missing string field '{text_field}'"
+        else:
+            yield line_no, record, None
+
+
+def chunked(items: Iterable, size: int) -> Iterator[List]:
+    """Yield lists of at most ``size`` items without materializing the input"""
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _valid_texts(chunk: List[Tuple[int, Dict, Optional[str]]], text_field: str) -> List[str]:
+    return [record[text_field] for _, record, error in chunk if error is None]
+
+
+def merge_results(chunk: List[Tuple[int, Dict, Optional[str]]], encoded: List[str]) -> Iterator[str]:
+    """Pair JSON-encoded results back with their input lines, passing errors through"""
+    remaining = iter(encoded)
+    for line_no, record, error in chunk:
+        prefix = f'{{"line": {line_no}'
+        if "id" in record:
+            prefix += f', "id": {json.dumps(record["id"], ensure_ascii=False)}'
+        if error is not None:
+            yield f'{prefix}, "error": {json.dumps(error)}}}'
+        else:
+            # Results are non-empty JSON objects; splice our fields in front
+            yield f"{prefix}, {next(remaining)[1:]}"
+
+
+def run_bulk(source: TextIO, sink: TextIO, chunk_size: int = 500, text_field: str = "text",
+             report_every: float = 5.0, workers: int = 1, log: TextIO = sys.stderr) -> int:
+    """Stream ``source`` through the pipeline into ``sink``; returns rows written"""
+    started = last_report = time.perf_counter()
+    rows = 0
+
+    batches = (
+        (chunk, _valid_texts(chunk, text_field))
+        for chunk in chunked(read_ndjson(source, text_field), chunk_size)
+    )
+    for chunk, encoded in imap_batches(batches, workers, fn=run_pipeline_batch_json):
+        for line in merge_results(chunk, encoded):
+            sink.write(line)
+            sink.write("\n")
+        sink.flush()
+        rows += len(chunk)
+
+        now = time.perf_counter()
+        if report_every and now - last_report >= report_every:
+            log.write(f"{rows} rows, {rows / (now - started):.1f} rows/sec\n")
+            last_report = now
+
+    elapsed = time.perf_counter() - started
+    rate = rows / elapsed if elapsed > 0 else 0.0
+    log.write(f"done: {rows} rows in {elapsed:.2f}s ({rate:.1f} rows/sec)\n")
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the SECRM-EIGA pipeline over NDJSON tickets")
+    parser.add_argument("input", nargs="?", default="-", help="input NDJSON file (default: stdin)")
+    parser.add_argument("-o", "--output", default="-", help="output NDJSON file (default: stdout)")
+    parser.add_argument("--chunk-size", type=int, default=500, help="tickets processed per batch")
+    parser.add_argument("--text-field", default="text", help="JSON field holding the ticket text")
+    parser.add_argument("--workers", type=int, default=PIPELINE_WORKERS,
+                        help="worker processes (0 = one per core, 1 = in-process)")
+    parser.add_argument("--report-every", type=float, default=5.0, help="seconds between throughput reports (0 disables)")
+    args = parser.parse_args(argv)
+
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+
+    source = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+    sink = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        run_bulk(source, sink, args.chunk_size, args.text_field, args.report_every, args.workers)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
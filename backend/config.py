@@ -1,8 +1,24 @@
 import os
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+
+def _find_env_file():
+    """Nearest .env in this directory or a parent, as python-dotenv searches"""
+    directory = os.path.dirname(os.path.abspath(__file__))
+    while True:
+        candidate = os.path.join(directory, '.env')
+        if os.path.isfile(candidate):
+            return candidate
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return None
+        directory = parent
+
+
+# Load environment variables (python-dotenv is only imported when there is a file)
+_ENV_FILE = _find_env_file()
+if _ENV_FILE:
+    from dotenv import load_dotenv
+    load_dotenv(_ENV_FILE)
 
 # OpenAI Configuration
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY', '')
@@ -15,3 +31,120 @@ DEMO_MODE = not bool(OPENAI_API_KEY)
 # SECRM-EIGA Configuration
 MAX_RESPONSE_LENGTH = 500
 DEFAULT_CONFIDENCE_THRESHOLD = 0.7
+MAX_BATCH_SIZE = int(os.getenv('MAX_BATCH_SIZE', '1000'))
+
+# SECRM component backend: rules (keyword triggers) or model (linear classifier
+# trained with `python -m services.classifier train`, loaded memory-mapped)
+SECRM_BACKEND = os.getenv('SECRM_BACKEND', 'rules').lower()
+SECRM_MODEL_PATH = os.getenv('SECRM_MODEL_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models', 'secrm'))
+SECRM_MODEL_THRESHOLD = float(os.getenv('SECRM_MODEL_THRESHOLD', '0.5'))
+
+# Parallel execution (0 = one worker per core, 1 = run in-process)
+PIPELINE_WORKERS = int(os.getenv('PIPELINE_WORKERS', '1'))
+PIPELINE_CHUNK_SIZE = int(os.getenv('PIPELINE_CHUNK_SIZE', '256'))
+
+# Production server (gunicorn.conf.py): 0 workers = one per core; wsgi serves
+# app.py on threaded workers, asgi serves asgi.py on uvicorn workers
+SERVER_BIND = os.getenv('SERVER_BIND', f"0.0.0.0:{os.getenv('PORT', '5000')}")
+SERVER_INTERFACE = os.getenv('SERVER_INTERFACE', 'wsgi').lower()
+SERVER_WORKERS = int(os.getenv('SERVER_WORKERS', '0'))
+SERVER_THREADS = int(os.getenv('SERVER_THREADS', '8'))
+SERVER_PRELOAD = os.getenv('SERVER_PRELOAD', '1') == '1'
+SERVER_TIMEOUT = int(os.getenv('SERVER_TIMEOUT', '60'))
+SERVER_GRACEFUL_TIMEOUT = int(os.getenv('SERVER_GRACEFUL_TIMEOUT', '30'))
+SERVER_MAX_REQUESTS = int(os.getenv('SERVER_MAX_REQUESTS', '0'))
+
+# LLM response cache (size 0 disables; set a path for a persistent SQLite cache)
+LLM_CACHE_SIZE = int(os.getenv('LLM_CACHE_SIZE', '10000'))
+LLM_CACHE_TTL = float(os.getenv('LLM_CACHE_TTL', '3600'))
+LLM_CACHE_PATH = os.getenv('LLM_CACHE_PATH', '')
+
+# SECRM / EIGA result memoization, bounded by approximate memory (0 disables)
+RESULT_CACHE_BYTES = int(os.getenv('RESULT_CACHE_BYTES', str(64 * 1024 * 1024)))
+
+# API response encoding: auto (orjson when installed), orjson or stdlib
+JSON_BACKEND = os.getenv('JSON_BACKEND', 'auto').lower()
+
+# Keyword taxonomy file (empty = built-in tables), polled for changes every N seconds (0 disables)
+TAXONOMY_PATH = os.getenv('TAXONOMY_PATH', '')
+TAXONOMY_POLL_INTERVAL = float(os.getenv('TAXONOMY_POLL_INTERVAL', '5'))
+
+# Admin endpoints are disabled unless a token is set (sent as X-Admin-Token)
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN', '')
+
+# Async LLM client (asgi.py)
+OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL', 'https://api.openai.com/v1')
+LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', '64'))
+LLM_REQUEST_TIMEOUT = float(os.getenv('LLM_REQUEST_TIMEOUT', '30'))
+
+# LLM latency budget per request in seconds (0 waits for the upstream timeout);
+# the breaker opens after N consecutive failed or timed-out calls (0 disables)
+LLM_DEADLINE = float(os.getenv('LLM_DEADLINE', '8'))
+LLM_BREAKER_FAILURES = int(os.getenv('LLM_BREAKER_FAILURES', '5'))
+LLM_BREAKER_COOLDOWN = float(os.getenv('LLM_BREAKER_COOLDOWN', '30'))
+
+# LLM micro-batching: prompts arriving within N ms share one multi-ticket
+# completion (0 disables), capped by tickets and estimated tokens per batch
+LLM_BATCH_WINDOW_MS = float(os.getenv('LLM_BATCH_WINDOW_MS', '0'))
+LLM_BATCH_MAX_SIZE = int(os.getenv('LLM_BATCH_MAX_SIZE', '8'))
+LLM_BATCH_MAX_TOKENS = int(os.getenv('LLM_BATCH_MAX_TOKENS', '12000'))
+
+# Prompt budgeting: customer text beyond N tokens is condensed to the sentences
+# around the SECRM evidence (0 disables); tokens are counted with tiktoken when
+# installed (TOKENIZER auto, tiktoken or estimate)
+LLM_QUERY_MAX_TOKENS = int(os.getenv('LLM_QUERY_MAX_TOKENS', '400'))
+TOKENIZER = os.getenv('TOKENIZER', 'auto').lower()
+
+# Near-duplicate reuse: a ticket within the MinHash similarity threshold of a
+# cluster seen in the last N seconds, with the same SECRM components and
+# urgency, reuses its customer response (0 clusters disables)
+NEAR_DUPLICATE_CLUSTERS = int(os.getenv('NEAR_DUPLICATE_CLUSTERS', '0'))
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv('NEAR_DUPLICATE_THRESHOLD', '0.75'))
+NEAR_DUPLICATE_TTL = float(os.getenv('NEAR_DUPLICATE_TTL', '600'))
+
+# Resolved-ticket retrieval: EIGA answers with the agent reply of the closest
+# resolved ticket at or above the cosine threshold instead of calling the LLM
+# (empty path disables); dimensions apply when a new index is created
+RETRIEVAL_PATH = os.getenv('RETRIEVAL_PATH', '')
+RETRIEVAL_THRESHOLD = float(os.getenv('RETRIEVAL_THRESHOLD', '0.8'))
+RETRIEVAL_DIMENSIONS = int(os.getenv('RETRIEVAL_DIMENSIONS', '1024'))
+
+# Durable job queue for POST /api/jobs (empty path disables): worker threads
+# per process, lease after which a job whose worker died is retried, attempts
+# before it fails, seconds finished jobs are kept, longest long-poll wait,
+# most long-polls waiting at once per process (each holds a server thread;
+# more polls get the current status at once) and most jobs waiting before
+# submits are refused (0 = unbounded)
+JOBS_DB_PATH = os.getenv('JOBS_DB_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'jobs.db'))
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '2'))
+JOB_LEASE_SECONDS = float(os.getenv('JOB_LEASE_SECONDS', '300'))
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '3'))
+JOB_RETENTION = float(os.getenv('JOB_RETENTION', '86400'))
+JOB_MAX_WAIT = float(os.getenv('JOB_MAX_WAIT', '30'))
+JOB_MAX_WAITERS = int(os.getenv('JOB_MAX_WAITERS', '1'))
+JOB_MAX_QUEUED = int(os.getenv('JOB_MAX_QUEUED', '10000'))
+
+# Admission control per process: LLM-bound routes (/api/pipeline, /api/eiga)
+# and cheap ones (/api/secrm, /api/health, ...) each get a per-client token
+# bucket (requests/second and burst; 0 rate disables) and an in-flight limit
+# (0 = unbounded). A request that cannot start within the queueing target is
+# shed with 503; clients are told apart by ADMISSION_CLIENT_HEADER when set
+# (e.g. X-Forwarded-For behind a proxy), else by remote address. The LLM
+# lane's default limit keeps ADMISSION_RESERVED_THREADS of each worker's
+# SERVER_THREADS free, so slow completions never take every thread and the
+# cheap routes are still answered
+ADMISSION_RESERVED_THREADS = int(os.getenv('ADMISSION_RESERVED_THREADS', '2'))
+ADMISSION_LLM_RATE = float(os.getenv('ADMISSION_LLM_RATE', '0'))
+ADMISSION_LLM_BURST = float(os.getenv('ADMISSION_LLM_BURST', '20'))
+ADMISSION_LLM_MAX_IN_FLIGHT = int(os.getenv('ADMISSION_LLM_MAX_IN_FLIGHT',
+                                            str(max(1, SERVER_THREADS - ADMISSION_RESERVED_THREADS))))
+ADMISSION_CHEAP_RATE = float(os.getenv('ADMISSION_CHEAP_RATE', '0'))
+ADMISSION_CHEAP_BURST = float(os.getenv('ADMISSION_CHEAP_BURST', '100'))
+ADMISSION_CHEAP_MAX_IN_FLIGHT = int(os.getenv('ADMISSION_CHEAP_MAX_IN_FLIGHT', '0'))
+ADMISSION_QUEUE_TARGET_MS = float(os.getenv('ADMISSION_QUEUE_TARGET_MS', '500'))
+ADMISSION_CLIENT_HEADER = os.getenv('ADMISSION_CLIENT_HEADER', '')
+
+# Analytics store (empty path disables recording)
+ANALYTICS_DB_PATH = os.getenv('ANALYTICS_DB_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'analytics.db'))
+ANALYTICS_FLUSH_INTERVAL = float(os.getenv('ANALYTICS_FLUSH_INTERVAL', '0.5'))
+ANALYTICS_MINUTE_RETENTION_DAYS = float(os.getenv('ANALYTICS_MINUTE_RETENTION_DAYS', '7'))
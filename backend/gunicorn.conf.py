@@ -0,0 +1,67 @@
+"""
+Gunicorn configuration for SECRM-EIGA
+
+    gunicorn -c gunicorn.conf.py
+
+With SERVER_PRELOAD (default on) the master imports the app, builds the
+compiled keyword tables and templates, freezes them out of the garbage
+collector and then forks, so every worker shares those pages copy-on-write.
+Threads, the taxonomy watcher and SQLite handles are per worker and are
+started after the fork.
+
+Graceful reload: ``kill -HUP <master pid>`` starts new workers from the
+master's loaded app and retires the old ones once their requests finish.
+Preloaded code is not re-imported on HUP; to deploy new code without
+dropping requests send ``USR2`` (new master alongside the old one), then
+``TERM`` the old master. Keyword taxonomy changes need neither, see
+TAXONOMY_PATH.
+"""
+
+import gc
+import os
+
+from config import (
+    SERVER_BIND, SERVER_GRACEFUL_TIMEOUT, SERVER_INTERFACE, SERVER_MAX_REQUESTS,
+    SERVER_PRELOAD, SERVER_THREADS, SERVER_TIMEOUT, SERVER_WORKERS
+)
+
+
+bind = [SERVER_BIND]
+workers = SERVER_WORKERS if SERVER_WORKERS > 0 else (os.cpu_count() or 1)
+preload_app = SERVER_PRELOAD
+timeout = SERVER_TIMEOUT
+graceful_timeout = SERVER_GRACEFUL_TIMEOUT
+keepalive = 5
+max_requests = SERVER_MAX_REQUESTS
+max_requests_jitter = SERVER_MAX_REQUESTS // 10
+errorlog = "-"
+
+if SERVER_INTERFACE == "asgi":
+    wsgi_app = "asgi:app"
+    worker_class = "uvicorn.workers.UvicornWorker"
+else:
+    wsgi_app = "wsgi:app"
+    worker_class = "gthread"
+    threads = SERVER_THREADS
+
+
+def when_ready(server):
+    """Master, after the preloaded app is imported and before the first fork"""
+    if not preload_app:
+        return
+    from services.pipeline import warm_up
+
+    warm_up()
+    # Objects that exist now live in the permanent generation, so collections
+    # in the workers don't touch (and copy) the shared pages
+    gc.collect()
+    gc.freeze()
+    server.log.info("Preloaded app: %d objects shared with %d %s workers",
+                    gc.get_freeze_count(), workers, SERVER_INTERFACE)
+
+
+def post_fork(server, worker):
+    from services import jobs, taxonomy
+
+    taxonomy.start_watcher()
+    jobs.start_workers()
@@ -0,0 +1,209 @@
+"""
+Admission control for the SECRM-EIGA API
+Per-client token buckets and a bounded number of in-flight requests per
+lane. LLM-bound endpoints and the cheap rule-based ones have separate
+lanes, so a saturated LLM path never slows down /api/secrm. Requests that
+cannot start within the queueing target are shed at once with a
+Retry-After hint instead of piling up behind slow calls.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional
+
+from config import (
+    ADMISSION_CHEAP_BURST, ADMISSION_CHEAP_MAX_IN_FLIGHT, ADMISSION_CHEAP_RATE,
+    ADMISSION_LLM_BURST, ADMISSION_LLM_MAX_IN_FLIGHT, ADMISSION_LLM_RATE, ADMISSION_QUEUE_TARGET_MS
+)
+from .metrics import ADMISSION_REJECTED
+
+
+# Flask endpoint names per lane; anything else (static files, admin) is not limited.
+# Job polls may wait for a result (?wait=), so they get a lane with no
+# in-flight limit: they never hold a cheap slot or skew its service time.
+# The job queue caps how many of them wait at once (JOB_MAX_WAITERS)
+LANE_ENDPOINTS = {
+    "llm": ("pipeline_endpoint", "pipeline_batch_endpoint", "eiga_endpoint"),
+    "cheap": ("secrm_endpoint", "health", "metrics_endpoint", "cache_endpoint", "analytics_endpoint",
+              "job_submit_endpoint", "job_stats_endpoint"),
+    "poll": ("job_endpoint",)
+}
+ENDPOINT_LANES = {endpoint: lane for lane, endpoints in LANE_ENDPOINTS.items() for endpoint in endpoints}
+
+# Token buckets kept per lane; the least recently seen clients are dropped
+# (and start again with a full bucket) beyond this
+MAX_CLIENTS = 10000
+# Weight of the newest sample in the service time average
+LATENCY_SMOOTHING = 0.2
+
+
+class Rejection(NamedTuple):
+    status: int
+    reason: str
+    retry_after: int
+
+
+class RateLimiter:
+    """Token bucket per client: ``rate`` requests per second, bursts of up to ``burst``"""
+
+    def __init__(self, rate: float, burst: float, max_clients: int = MAX_CLIENTS):
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self.max_clients = max_clients
+        # client -> (tokens, last refill)
+        self._buckets: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, client: str) -> float:
+        """Spend one token; 0 when allowed, else seconds until one is available"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.pop(client, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / self.rate
+            self._buckets[client] = (tokens, now)
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class Lane:
+    """At most ``max_in_flight`` concurrent requests; others wait up to ``target`` seconds.
+
+    A request is turned away without waiting when the queue ahead of it,
+    at the recent service time, would already take longer than the target.
+    """
+
+    def __init__(self, name: str, max_in_flight: int, target: float):
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.target = target
+        self.in_flight = 0
+        self.waiting = 0
+        self.service_time = 0.0
+        self.admitted = 0
+        self._slots = threading.Condition()
+
+    def estimated_wait(self) -> float:
+        """Seconds until a newly queued request would start"""
+        if self.max_in_flight <= 0 or self.in_flight < self.max_in_flight:
+            return 0.0
+        return (self.waiting + 1) * self.service_time / self.max_in_flight
+
+    def acquire(self) -> Optional[float]:
+        """Take a slot: None on success, else the estimated wait for the Retry-After hint"""
+        if self.max_in_flight <= 0:
+            self.admitted += 1
+            return None
+        with self._slots:
+            if self.in_flight >= self.max_in_flight:
+                estimate = self.estimated_wait()
+                if estimate > self.target:
+                    return estimate
+                deadline = time.monotonic() + self.target
+                self.waiting += 1
+                try:
+                    while self.in_flight >= self.max_in_flight:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            return max(self.estimated_wait(), self.target)
+                        self._slots.wait(remaining)
+                finally:
+                    self.waiting -= 1
+            self.in_flight += 1
+            self.admitted += 1
+        return None
+
+    def release(self, elapsed: float) -> None:
+        if self.max_in_flight <= 0:
+            return
+        with self._slots:
+            self.in_flight -= 1
+            self.service_time += LATENCY_SMOOTHING * (elapsed - self.service_time)
+            self._slots.notify()
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "waiting": self.waiting,
+            "service_time_ms": round(self.service_time * 1000, 1),
+            "admitted": self.admitted
+        }
+
+
+class AdmissionController:
+    """Rate limit, then concurrency limit, per lane"""
+
+    def __init__(self):
+        target = ADMISSION_QUEUE_TARGET_MS / 1000.0
+        self.lanes = {
+            "llm": Lane("llm", ADMISSION_LLM_MAX_IN_FLIGHT, target),
+            "cheap": Lane("cheap", ADMISSION_CHEAP_MAX_IN_FLIGHT, target),
+            "poll": Lane("poll", 0, target)
+        }
+        self.limiters = {
+            lane: RateLimiter(rate, burst)
+            for lane, rate, burst in (("llm", ADMISSION_LLM_RATE, ADMISSION_LLM_BURST),
+                                      ("cheap", ADMISSION_CHEAP_RATE, ADMISSION_CHEAP_BURST),
+                                      ("poll", ADMISSION_CHEAP_RATE, ADMISSION_CHEAP_BURST))
+            if rate > 0
+        }
+        self.rejected: Dict[str, int] = {}
+
+    def admit(self, lane: str, client: str) -> Optional[Rejection]:
+        """None if the request may run (call ``release`` when it ends), else why not"""
+        limiter = self.limiters.get(lane)
+        if limiter is not None:
+            wait = limiter.take(client)
+            if wait > 0:
+                return self._reject(lane, Rejection(429, "rate_limited", wait))
+        wait = self.lanes[lane].acquire()
+        if wait is not None:
+            return self._reject(lane, Rejection(503, "overloaded", wait))
+        return None
+
+    def release(self, lane: str, elapsed: float) -> None:
+        self.lanes[lane].release(elapsed)
+
+    def _reject(self, lane: str, rejection: Rejection) -> Rejection:
+        ADMISSION_REJECTED.inc(lane=lane, reason=rejection.reason)
+        key = f"{lane}:{rejection.reason}"
+        self.rejected[key] = self.rejected.get(key, 0) + 1
+        return rejection._replace(retry_after=max(1, math.ceil(rejection.retry_after)))
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "lanes": {name: lane.stats() for name, lane in self.lanes.items()},
+            "rate_limits": {lane: {"rate": limiter.rate, "burst": limiter.burst, "clients": len(limiter)}
+                            for lane, limiter in self.limiters.items()},
+            "rejected": dict(self.rejected)
+        }
+
+
+_controller: Optional[AdmissionController] = None
+_controller_lock = threading.Lock()
+
+
+def get_controller() -> AdmissionController:
+    global _controller
+    if _controller is None:
+        with _controller_lock:
+            if _controller is None:
+                _controller = AdmissionController()
+    return _controller
+
+
+def lane_for(endpoint: Optional[str]) -> Optional[str]:
+    return ENDPOINT_LANES.get(endpoint or "")
@@ -0,0 +1,304 @@
+"""
+Analytics store for SECRM-EIGA
+Append-only SQLite log of pipeline runs with per-minute and per-day rollups
+that are updated incrementally, so dashboard queries never scan history
+"""
+
+from __future__ import annotations
+
+import atexit
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from config import ANALYTICS_DB_PATH, ANALYTICS_FLUSH_INTERVAL, ANALYTICS_MINUTE_RETENTION_DAYS
+
+
+MINUTE = 60
+DAY = 86400
+GRANULARITIES = {"minute": MINUTE, "day": DAY}
+SEVERITY_ORDER = ["low", "medium", "high", "critical"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    components TEXT NOT NULL,
+    severity TEXT NOT NULL,
+    urgency TEXT NOT NULL,
+    sentiment TEXT NOT NULL,
+    confidence REAL NOT NULL,
+    latency_ms REAL NOT NULL,
+    tokens INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rollups (
+    granularity TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    dimension TEXT NOT NULL,
+    value TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    latency_ms_sum REAL NOT NULL,
+    tokens_sum INTEGER NOT NULL,
+    confidence_sum REAL NOT NULL,
+    PRIMARY KEY (granularity, dimension, value, bucket)
+) WITHOUT ROWID;
+"""
+
+_UPSERT = """
+INSERT INTO rollups (granularity, bucket, dimension, value, count, latency_ms_sum, tokens_sum, confidence_sum)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (granularity, dimension, value, bucket) DO UPDATE SET
+    count = count + excluded.count,
+    latency_ms_sum = latency_ms_sum + excluded.latency_ms_sum,
+    tokens_sum = tokens_sum + excluded.tokens_sum,
+    confidence_sum = confidence_sum + excluded.confidence_sum
+"""
+
+# ts, components, severity, urgency, sentiment, confidence, latency_ms, tokens
+Record = Tuple[float, str, str, str, str, float, float, int]
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def _dimensions(record: Record) -> List[Tuple[str, str]]:
+    _, components, severity, urgency, sentiment, _, _, _ = record
+    dims = [("all", ""), ("severity", severity), ("urgency", urgency), ("sentiment", sentiment)]
+    dims.extend(("component", label) for label in components.split(",") if label)
+    return dims
+
+
+class AnalyticsStore:
+    """Buffers records in memory and writes them from one background thread.
+
+    Each flush appends the raw events and folds them into the rollup table in
+    the same transaction, so the rollups always agree with the event log.
+    """
+
+    def __init__(self, path: str = ANALYTICS_DB_PATH, flush_interval: float = ANALYTICS_FLUSH_INTERVAL):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Optional[Record]]" = queue.Queue()
+        self._read_conn = _connect(path)
+        self._read_lock = threading.Lock()
+        self._writer = threading.Thread(target=self._write_loop, name="analytics-writer", daemon=True)
+        self._writer.start()
+
+    def record(self, record: Record) -> None:
+        """Queue one record; never blocks on disk"""
+        self._queue.put(record)
+
+    def close(self) -> None:
+        """Flush pending records and stop the writer thread"""
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+
+    def _write_loop(self) -> None:
+        conn = _connect(self.path)
+        last_prune = 0.0
+        running = True
+        while running:
+            batch: List[Record] = []
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+                if item is None:
+                    running = False
+                else:
+                    batch.append(item)
+                while True:
+                    item = self._queue.get_nowait()
+                    if item is None:
+                        running = False
+                    else:
+                        batch.append(item)
+            except queue.Empty:
+                pass
+            if batch:
+                self._flush(conn, batch)
+            if time.time() - last_prune > 3600:
+                self._prune(conn)
+                last_prune = time.time()
+        conn.close()
+
+    def _prune(self, conn: sqlite3.Connection) -> None:
+        """Drop minute rollups past retention; day rollups and events are kept"""
+        cutoff = int((time.time() - ANALYTICS_MINUTE_RETENTION_DAYS * DAY) // MINUTE)
+        try:
+            with conn:
+                conn.execute("DELETE FROM rollups WHERE granularity = 'minute' AND bucket < ?", (cutoff,))
+        except sqlite3.Error as e:
+            print(f"Analytics Error: {e}")
+
+    def _flush(self, conn: sqlite3.Connection, batch: List[Record]) -> None:
+        aggregates: Dict[Tuple[str, int, str, str], List[float]] = {}
+        for record in batch:
+            ts, _, _, _, _, confidence, latency_ms, tokens = record
+            for granularity, width in GRANULARITIES.items():
+                bucket = int(ts // width)
+                for dimension, value in _dimensions(record):
+                    agg = aggregates.setdefault((granularity, bucket, dimension, value), [0, 0.0, 0, 0.0])
+                    agg[0] += 1
+                    agg[1] += latency_ms
+                    agg[2] += tokens
+                    agg[3] += confidence
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT INTO events (ts, components, severity, urgency, sentiment, confidence, latency_ms, tokens)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)", batch
+                )
+                conn.executemany(_UPSERT, [key + tuple(agg) for key, agg in aggregates.items()])
+        except sqlite3.Error as e:
+            print(f"Analytics Error: {e}")
+
+    # Queries -----------------------------------------------------------------
+
+    def rollup(self, granularity: str, dimension: str, since: float,
+               values: Optional[Iterable[str]] = None) -> Dict[str, Dict[int, Tuple[int, float, int, float]]]:
+        """Return {value: {bucket: (count, latency_ms_sum, tokens_sum, confidence_sum)}}"""
+        start = int(since // GRANULARITIES[granularity])
+        sql = ("SELECT value, bucket, count, latency_ms_sum, tokens_sum, confidence_sum FROM rollups"
+               " WHERE granularity = ? AND dimension = ? AND bucket >= ?")
+        params: list = [granularity, dimension, start]
+        if values is not None:
+            values = list(values)
+            sql += f" AND value IN ({', '.join('?' for _ in values)})"
+            params.extend(values)
+        result: Dict[str, Dict[int, Tuple[int, float, int, float]]] = {}
+        with self._read_lock:
+            for value, bucket, count, latency, tokens, confidence in self._read_conn.execute(sql, params):
+                result.setdefault(value, {})[bucket] = (count, latency, tokens, confidence)
+        return result
+
+    def totals(self, dimension: str, since: float = 0) -> Dict[str, Tuple[int, float, int, float]]:
+        """Sum day rollups per value since ``since``"""
+        totals: Dict[str, Tuple[int, float, int, float]] = {}
+        for value, buckets in self.rollup("day", dimension, since).items():
+            totals[value] = tuple(sum(column) for column in zip(*buckets.values()))
+        return totals
+
+    def recent_events(self, limit: int = 10) -> List[Dict[str, object]]:
+        with self._read_lock:
+            rows = self._read_conn.execute(
+                "SELECT id, ts, components, severity, urgency, sentiment, confidence, latency_ms, tokens"
+                " FROM events ORDER BY id DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [
+            {
+                "id": row[0],
+                "timestamp": datetime.fromtimestamp(row[1], tz=timezone.utc).isoformat(),
+                "components": [label for label in row[2].split(",") if label],
+                "severity": row[3],
+                "urgency": row[4],
+                "sentiment": row[5],
+                "confidence": row[6],
+                "latency_ms": row[7],
+                "tokens": row[8]
+            }
+            for row in rows
+        ]
+
+
+def make_record(result: Dict, latency_ms: float, ts: Optional[float] = None) -> Record:
+    """Compact record from a pipeline result (see services.pipeline)"""
+    secrm_data = result.get("secrm_analysis", {})
+    components = secrm_data.get("components", [])
+    severities = [comp.get("severity", "low") for comp in components]
+    severity = max(severities, key=lambda s: SEVERITY_ORDER.index(s) if s in SEVERITY_ORDER else 0) if severities else "none"
+    sentiment = secrm_data.get("sentiment", {})
+    dominant = max(sentiment.items(), key=lambda x: x[1])[0] if sentiment and any(sentiment.values()) else "neutral"
+    return (
+        time.time() if ts is None else ts,
+        ",".join(comp["label"] for comp in components),
+        severity,
+        secrm_data.get("urgency", "medium"),
+        dominant,
+        float(secrm_data.get("overall_confidence", 0.0)),
+        float(latency_ms),
+        int(result.get("llm_metadata", {}).get("tokens_used", 0) or 0)
+    )
+
+
+_store: Optional[AnalyticsStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> Optional[AnalyticsStore]:
+    """Return the process-wide analytics store (None when disabled)"""
+    global _store
+    if not ANALYTICS_DB_PATH:
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = AnalyticsStore()
+                atexit.register(_store.close)
+    return _store
+
+
+def record_pipeline_result(result: Dict, latency_ms: float) -> None:
+    """Append one pipeline run to the analytics store"""
+    store = get_store()
+    if store is not None:
+        store.record(make_record(result, latency_ms))
+
+
+def dashboard(store: AnalyticsStore, component_labels: Iterable[str], now: Optional[float] = None) -> Dict[str, object]:
+    """Assemble /api/analytics from rollups only"""
+    now = time.time() if now is None else now
+    today = int(now // DAY)
+    month_ago = (today - 29) * DAY
+
+    overall = store.totals("all").get("", (0, 0.0, 0, 0.0))
+    total, latency_sum, tokens_sum, confidence_sum = overall
+
+    # Last 24 hours from minute buckets
+    day_ago = now - DAY
+    recent_urgency = store.rollup("minute", "urgency", day_ago, ["urgent", "high"])
+    active_issues = sum(count for buckets in recent_urgency.values() for count, _, _, _ in buckets.values())
+
+    # 30-day trends from day buckets
+    daily_sentiment = store.rollup("day", "sentiment", month_ago)
+    daily_total = store.rollup("day", "all", month_ago).get("", {})
+    negative = daily_sentiment.get("negative", {})
+    sentiment_trend = []
+    for bucket in range(today - 29, today + 1):
+        count = daily_total.get(bucket, (0,))[0]
+        bad = negative.get(bucket, (0,))[0]
+        sentiment_trend.append(round(100 * (count - bad) / count) if count else 0)
+
+    month_total = sum(count for count, _, _, _ in daily_total.values())
+    month_negative = sum(count for count, _, _, _ in negative.values())
+    component_totals = store.totals("component", month_ago)
+    mentions = sum(values[0] for values in component_totals.values())
+    component_distribution = {
+        label: round(100 * component_totals.get(label, (0,))[0] / mentions) if mentions else 0
+        for label in component_labels
+    }
+    urgency_totals = store.totals("urgency", month_ago)
+
+    return {
+        "metrics": {
+            "total_analyses": total,
+            "avg_response_time": round(latency_sum / total / 1000, 3) if total else 0.0,
+            "avg_confidence": round(100 * confidence_sum / total, 1) if total else 0.0,
+            "customer_satisfaction": round(100 * (month_total - month_negative) / month_total, 1) if month_total else 0.0,
+            "tokens_used": tokens_sum,
+            "active_issues": active_issues
+        },
+        "trends": {
+            "sentiment_trend": sentiment_trend,
+            "component_distribution": component_distribution,
+            "urgency_distribution": {value: values[0] for value, values in urgency_totals.items()}
+        },
+        "recent_activity": store.recent_events(3)
+    }
@@ -0,0 +1,152 @@
+"""
+Async LLM Service for SECRM-EIGA
+asyncio variant of LLMService with a pooled HTTP client, a concurrency
+limit and coalescing of identical in-flight prompts
+"""
+
+import asyncio
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+from config import (
+    OPENAI_API_KEY, OPENAI_BASE_URL, DEMO_MODE, MAX_RESPONSE_LENGTH,
+    LLM_DEADLINE, LLM_MAX_CONCURRENCY, LLM_REQUEST_TIMEOUT
+)
+from .cache import get_response_cache, prompt_fingerprint
+from .llm_service import LLM_BREAKER, LLMService
+from .metrics import LLM_ERRORS, LLM_IN_FLIGHT, stage_timer
+from .retrieval import retrieved_response
+from .tokens import record_usage
+
+
+class AsyncLLMService(LLMService):
+    """Shares one HTTP connection pool and in-flight table across all callers.
+
+    Create one instance per event loop and reuse it for every request; the
+    prompt building and demo fallbacks are inherited from ``LLMService``.
+    """
+
+    def __init__(self, base_url: str = OPENAI_BASE_URL, max_concurrency: int = LLM_MAX_CONCURRENCY,
+                 timeout: float = LLM_REQUEST_TIMEOUT):
+        super().__init__()
+        self.base_url = base_url.rstrip("/")
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.coalesced = 0
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {OPENAI_API_KEY}"},
+                limits=httpx.Limits(max_connections=self.max_concurrency,
+                                    max_keepalive_connections=self.max_concurrency),
+                timeout=self.timeout
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    async def aclose(self) -> None:
+        """Close the pooled HTTP client"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def generate_response(self,
+                                user_query: str,
+                                components: List[Dict],
+                                sentiment: str,
+                                urgency: str,
+                                language: str = "en",
+                                deadline: Optional[float] = None) -> Dict:
+        """
+        Generate intelligent response using LLM without blocking the event loop
+        """
+        retrieved = retrieved_response(user_query, language, urgency, components)
+        if retrieved is not None:
+            return retrieved
+
+        if DEMO_MODE:
+            return self._fallback_response("demo_mode", user_query, components, sentiment, urgency, language)
+
+        context = self._prepare_context(components, sentiment, urgency, language)
+        cache = get_response_cache()
+        cache_key = prompt_fingerprint(user_query, context, language, self.model, self.temperature)
+        if cache is not None:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                cached.update({"tokens_used": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                               "generation_time": 0.0, "cached": True, "path": "cache"})
+                return cached
+
+        if not LLM_BREAKER.allow():
+            return self._fallback_response("circuit_open", user_query, components, sentiment, urgency, language)
+
+        # Identical prompts already in flight share one upstream call
+        future = self._inflight.get(cache_key)
+        coalesced = future is not None
+        if coalesced:
+            self.coalesced += 1
+        else:
+            _, prompt, _, max_tokens = self._plan_request(user_query, components, context, urgency, language)
+            future = asyncio.ensure_future(self._complete(prompt, language, max_tokens))
+            self._inflight[cache_key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(cache_key, None))
+
+        if deadline is None:
+            deadline = LLM_DEADLINE
+        try:
+            # The shield keeps the upstream call alive for other waiters and the cache
+            result = dict(await asyncio.wait_for(asyncio.shield(future), deadline if deadline > 0 else None))
+        except asyncio.TimeoutError:
+            if not coalesced:
+                LLM_BREAKER.record_failure()
+                if cache is not None:
+                    future.add_done_callback(lambda done: self._cache_late_result(done, cache, cache_key))
+            return self._fallback_response("timeout", user_query, components, sentiment, urgency, language)
+        except Exception as e:
+            print(f"LLM Error: {e}")
+            LLM_ERRORS.inc()
+            if not coalesced:
+                LLM_BREAKER.record_failure()
+            return self._fallback_response("llm_error", user_query, components, sentiment, urgency, language)
+
+        if coalesced:
+            result.update({"tokens_used": 0, "prompt_tokens": 0, "completion_tokens": 0, "coalesced": True})
+        else:
+            LLM_BREAKER.record_success()
+            if cache is not None:
+                cache.set(cache_key, result)
+        return result
+
+    async def _complete(self, prompt: str, language: str, max_tokens: int = MAX_RESPONSE_LENGTH) -> Dict:
+        """Send one chat completion through the shared pool"""
+        client = self._get_client()
+        started = time.perf_counter()
+        async with self._semaphore:
+            with LLM_IN_FLIGHT.track(), stage_timer("llm"):
+                response = await client.post("/chat/completions", json={
+                    "model": self.model,
+                    "messages": [
+                        {"role": "system", "content": self._get_system_prompt(language)},
+                        {"role": "user", "content": prompt}
+                    ],
+                    "temperature": self.temperature,
+                    "max_tokens": max_tokens
+                })
+        response.raise_for_status()
+        data = response.json()
+
+        return {
+            "response": data["choices"][0]["message"]["content"].strip(),
+            "confidence": 0.95,
+            "model_used": self.model,
+            **record_usage(data.get("usage", {})),
+            "generation_time": round(time.perf_counter() - started, 3),
+            "path": "llm"
+        }
@@ -0,0 +1,105 @@
+"""
+Micro-batching for upstream calls
+Collects submissions for a few milliseconds and hands them to a handler as
+one batch, bounded by item count and by a token budget
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import Executor, Future
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+
+class BatchItem(NamedTuple):
+    payload: object
+    cost: int
+    future: Future
+
+
+BatchHandler = Callable[[List[BatchItem]], None]
+
+
+class MicroBatcher:
+    """Groups concurrent submissions into batches for ``handler``.
+
+    A batch is closed when ``window`` seconds have passed since its first
+    item, when it holds ``max_size`` items, or when the next item would push
+    the summed cost over ``max_cost``; that item starts the next batch.
+    Batches run on ``executor`` so collection continues while they are in
+    flight. The handler must resolve every item's future; any it leaves
+    pending when it returns or raises are failed for it.
+    """
+
+    def __init__(self, handler: BatchHandler, executor: Executor, window: float,
+                 max_size: int, max_cost: int, name: str = "batcher"):
+        self.handler = handler
+        self.executor = executor
+        self.window = window
+        self.max_size = max(1, max_size)
+        self.max_cost = max_cost
+        self.name = name
+        self.batches = 0
+        self.items = 0
+        self._queue: "queue.Queue[BatchItem]" = queue.Queue()
+        self._carry: Optional[BatchItem] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, payload: object, cost: int = 0) -> Future:
+        """Queue one item; the future resolves with its share of the batch result"""
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._collect, name=self.name, daemon=True)
+                    self._thread.start()
+        future: Future = Future()
+        self._queue.put(BatchItem(payload, cost, future))
+        return future
+
+    def _collect(self) -> None:
+        while True:
+            batch = self._next_batch()
+            self.batches += 1
+            self.items += len(batch)
+            self.executor.submit(self._run, batch)
+
+    def _next_batch(self) -> List[BatchItem]:
+        first = self._carry if self._carry is not None else self._queue.get()
+        self._carry = None
+        batch = [first]
+        cost = first.cost
+        closes_at = time.perf_counter() + self.window
+        while len(batch) < self.max_size:
+            remaining = closes_at - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if cost + item.cost > self.max_cost:
+                self._carry = item
+                break
+            batch.append(item)
+            cost += item.cost
+        return batch
+
+    def _run(self, batch: List[BatchItem]) -> None:
+        error: Optional[BaseException] = None
+        try:
+            self.handler(batch)
+        except Exception as e:
+            error = e
+        for item in batch:
+            if not item.future.done():
+                item.future.set_exception(error or RuntimeError(f"{self.name} left the item unanswered"))
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0
+        }
@@ -0,0 +1,299 @@
+"""
+Response caching for SECRM-EIGA
+Bounded LRU + TTL caches for LLM responses, in memory or backed by SQLite,
+and a memory-bounded cache for deterministic analysis results
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from config import LLM_CACHE_PATH, LLM_CACHE_SIZE, LLM_CACHE_TTL, RESULT_CACHE_BYTES
+from .metrics import REGISTRY
+
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace"""
+    return _WHITESPACE.sub(" ", _NON_WORD.sub(" ", text.lower())).strip()
+
+
+def prompt_fingerprint(user_query: str, context: str, language: str, model: str, temperature: float) -> str:
+    """Stable key for everything the LLM prompt depends on"""
+    payload = "\x1f".join([normalize_query(user_query), context, language, model, repr(temperature)])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def text_fingerprint(text: str) -> str:
+    """Content address for analysis results: hash of the lowered text plus its length"""
+    digest = hashlib.blake2b(text.lower().encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
+    return f"{digest}:{len(text)}"
+
+
+def clone_result(value):
+    """Copy nested dicts and lists so callers never share cached objects"""
+    if isinstance(value, dict):
+        return {key: clone_result(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [clone_result(item) for item in value]
+    return value
+
+
+def approx_size(value) -> int:
+    """Approximate memory held by a JSON-like value, in bytes"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(approx_size(key) + approx_size(item) for key, item in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(approx_size(item) for item in value)
+    return size
+
+
+class ResponseCache:
+    """In-memory LRU cache with per-entry TTL"""
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[Dict]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_at, value = entry
+            if now - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(value)
+
+    def set(self, key: str, value: Dict) -> None:
+        with self._lock:
+            self._entries[key] = (time.time(), dict(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, object]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": "memory",
+            "size": len(self),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+class SQLiteResponseCache(ResponseCache):
+    """LRU + TTL cache persisted to a SQLite file so it survives restarts"""
+
+    def __init__(self, path: str, max_entries: int = 10000, ttl_seconds: float = 3600):
+        super().__init__(max_entries, ttl_seconds)
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " stored_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache (accessed_at)")
+
+    def get(self, key: str) -> Optional[Dict]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, stored_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            value, stored_at = row
+            if now - stored_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return json.loads(value)
+
+    def set(self, key: str, value: Dict) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, stored_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now)
+            )
+            overflow = len(self) - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM llm_cache WHERE key IN ("
+                    " SELECT key FROM llm_cache ORDER BY accessed_at LIMIT ?)",
+                    (overflow,)
+                )
+                self.evictions += overflow
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+    def stats(self) -> Dict[str, object]:
+        stats = super().stats()
+        stats["backend"] = "sqlite"
+        stats["path"] = self.path
+        return stats
+
+
+class ResultCache:
+    """In-memory LRU cache of deterministic results, bounded by approximate size"""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries: "OrderedDict[Hashable, Tuple[int, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return clone_result(entry[1])
+
+    def set(self, key: Hashable, value: Dict) -> None:
+        size = approx_size(value)
+        if size > self.max_bytes:
+            return
+        value = clone_result(value)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[0]
+            self._entries[key] = (size, value)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, object]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Return the process-wide LLM response cache (None when disabled)"""
+    global _response_cache
+    if LLM_CACHE_SIZE <= 0:
+        return None
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                if LLM_CACHE_PATH:
+                    _response_cache = SQLiteResponseCache(LLM_CACHE_PATH, LLM_CACHE_SIZE, LLM_CACHE_TTL)
+                else:
+                    _response_cache = ResponseCache(LLM_CACHE_SIZE, LLM_CACHE_TTL)
+    return _response_cache
+
+
+_result_cache: Optional[ResultCache] = None
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """Return the process-wide analysis result cache (None when disabled)"""
+    global _result_cache
+    if RESULT_CACHE_BYTES <= 0:
+        return None
+    if _result_cache is None:
+        with _response_cache_lock:
+            if _result_cache is None:
+                _result_cache = ResultCache(RESULT_CACHE_BYTES)
+    return _result_cache
+
+
+def _cache_metrics() -> List[str]:
+    """Expose response and result cache counters on /api/metrics"""
+    lines = []
+    if _response_cache is not None:
+        stats = _response_cache.stats()
+        for name in ("hits", "misses", "evictions", "expirations"):
+            metric = f"secrm_eiga_llm_cache_{name}_total"
+            lines += [f"# TYPE {metric} counter", f"{metric} {stats[name]}"]
+        lines += ["# TYPE secrm_eiga_llm_cache_entries gauge", f"secrm_eiga_llm_cache_entries {stats['size']}"]
+    if _result_cache is not None:
+        stats = _result_cache.stats()
+        for name in ("hits", "misses", "evictions"):
+            metric = f"secrm_eiga_result_cache_{name}_total"
+            lines += [f"# TYPE {metric} counter", f"{metric} {stats[name]}"]
+        lines += ["# TYPE secrm_eiga_result_cache_bytes gauge", f"secrm_eiga_result_cache_bytes {stats['bytes']}"]
+    return lines
+
+
+REGISTRY.register_collector(_cache_metrics)
@@ -0,0 +1,301 @@
+"""
+Linear component classifier for SECRM
+Optional backend (SECRM_BACKEND=model) that scores every component for a
+whole batch with one sparse matrix product. Texts are featurized by hashing
+lowercase byte 4-grams straight into a CSR matrix, with no vocabulary to
+fit or ship. The weights are a .npy file opened memory-mapped, so forked
+workers share one copy through the page cache.
+
+Train it on labels bootstrapped from the current keyword rules:
+
+    python -m benchmarks.corpus --size 50000 > tickets.ndjson
+    python -m services.classifier train tickets.ndjson
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence
+
+from config import SECRM_BACKEND, SECRM_MODEL_PATH, SECRM_MODEL_THRESHOLD
+
+if TYPE_CHECKING:
+    # NumPy and SciPy are only loaded with the model backend
+    import numpy as np
+    from scipy.sparse import csr_matrix
+
+
+N_FEATURES = 2 ** 18
+NGRAM = 4
+FNV_OFFSET = 2166136261
+FNV_PRIME = 16777619
+# Same ceiling as the rule-based confidence
+MAX_CONFIDENCE = 0.95
+
+META_FILE = "meta.json"
+WEIGHTS_FILE = "weights.npy"
+BIAS_FILE = "bias.npy"
+
+
+def featurize(texts: Sequence[str], n_features: int = N_FEATURES, ngram: int = NGRAM) -> csr_matrix:
+    """Hashed byte n-gram counts, one row per text, scaled by 1/sqrt(n-grams in the row).
+
+    The whole batch is hashed as one byte array (FNV-1a over each window),
+    so the cost per text is a handful of vectorized passes, not a Python
+    loop over tokens. ``n_features`` must be a power of two.
+    """
+    import numpy as np
+    from scipy import sparse
+
+    n = len(texts)
+    encoded = [text.lower().encode("utf-8") for text in texts]
+    lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=n)
+    data = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.uint32)
+    windows = max(0, len(data) - ngram + 1)
+
+    hashes = np.full(len(data), FNV_OFFSET, dtype=np.uint32)
+    for offset in range(ngram):
+        hashes = hashes[:len(data) - offset]
+        hashes ^= data[offset:]
+        hashes *= np.uint32(FNV_PRIME)
+    hashes = hashes[:windows]
+
+    # Drop windows that run past the end of their text into the next one
+    valid = np.ones(windows, dtype=bool)
+    tails = (np.cumsum(lengths)[:, None] - np.arange(1, ngram)[None, :]).ravel()
+    valid[tails[(tails >= 0) & (tails < windows)]] = False
+    columns = (hashes[valid] & np.uint32(n_features - 1)).astype(np.int32)
+
+    counts = np.maximum(lengths - ngram + 1, 0)
+    scale = (1.0 / np.sqrt(np.maximum(counts, 1))).astype(np.float32)
+    indptr = np.concatenate(([0], np.cumsum(counts)))
+    return sparse.csr_matrix((np.repeat(scale, counts), columns, indptr), shape=(n, n_features))
+
+
+class ComponentClassifier:
+    """One trained model: label names, (n_features, labels) weights and bias"""
+
+    def __init__(self, path: str, mmap: bool = True):
+        import numpy as np
+
+        with open(os.path.join(path, META_FILE), encoding="utf-8") as handle:
+            self.meta = json.load(handle)
+        self.path = path
+        self.version = str(self.meta["version"])
+        self.labels: List[str] = list(self.meta["labels"])
+        self.n_features = int(self.meta["n_features"])
+        self.ngram = int(self.meta["ngram"])
+        self.weights = np.load(os.path.join(path, WEIGHTS_FILE), mmap_mode="r" if mmap else None)
+        self.bias = np.load(os.path.join(path, BIAS_FILE))
+        if self.weights.shape != (self.n_features, len(self.labels)) or self.bias.shape != (len(self.labels),):
+            raise ValueError(f"weights {self.weights.shape} and bias {self.bias.shape} do not match {META_FILE}")
+
+    def predict_proba(self, texts: Sequence[str]) -> np.ndarray:
+        """(texts, labels) probabilities from one sparse-dense product"""
+        import numpy as np
+
+        scores = featurize(texts, self.n_features, self.ngram) @ self.weights
+        scores += self.bias
+        return 1.0 / (1.0 + np.exp(-scores))
+
+    def components(self, texts: Sequence[str], hits_per_text: Sequence[Dict[str, List[str]]],
+                   keywords: Dict[str, Dict], threshold: float = SECRM_MODEL_THRESHOLD) -> List[List[Dict[str, object]]]:
+        """SECRM component lists for ``texts``, in the rule backend's schema.
+
+        Evidence is the rule triggers found for the label, which may be empty
+        when the model recognises a component the rules miss. Labels missing
+        from the live taxonomy are skipped.
+        """
+        if not texts:
+            return []
+        results = []
+        for probabilities, hits_by_name in zip(self.predict_proba(texts).tolist(), hits_per_text):
+            components = []
+            for name, probability in zip(self.labels, probabilities):
+                config = keywords.get(name)
+                if probability >= threshold and config is not None:
+                    components.append({
+                        "label": name,
+                        "confidence": round(min(MAX_CONFIDENCE, probability), 2),
+                        "evidence": hits_by_name.get(name, [])[:3],
+                        "severity": config["severity"],
+                        "category": config["category"]
+                    })
+            components.sort(key=lambda x: x["confidence"], reverse=True)
+            results.append(components)
+        return results
+
+
+_classifier: Optional[ComponentClassifier] = None
+_load_error: Optional[str] = None
+_load_lock = threading.Lock()
+
+
+def get_classifier() -> Optional[ComponentClassifier]:
+    """The model backend, or None to use the keyword rules.
+
+    Loaded once per process; a missing or broken artifact falls back to
+    the rules with one error message instead of failing requests.
+    """
+    global _classifier, _load_error
+    if SECRM_BACKEND != "model":
+        return None
+    if _classifier is None and _load_error is None:
+        with _load_lock:
+            if _classifier is None and _load_error is None:
+                try:
+                    _classifier = ComponentClassifier(SECRM_MODEL_PATH)
+                except (OSError, ValueError, KeyError) as e:
+                    _load_error = str(e)
+                    print(f"Classifier Error: cannot load {SECRM_MODEL_PATH}: {e}; using keyword rules")
+    return _classifier
+
+
+def status() -> Dict[str, object]:
+    classifier = get_classifier()
+    if classifier is None:
+        return {"backend": "rules", "error": _load_error}
+    return {
+        "backend": "model",
+        "version": classifier.version,
+        "labels": len(classifier.labels),
+        "threshold": SECRM_MODEL_THRESHOLD
+    }
+
+
+def _read_texts(path: Optional[str]) -> List[str]:
+    """Tickets from NDJSON (a ``text`` field per line) or plain text, one per line"""
+    handle = sys.stdin if path in (None, "-") else open(path, encoding="utf-8")
+    texts = []
+    with handle:
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                line = str(json.loads(line).get("text", ""))
+            texts.append(line)
+    return texts
+
+
+def bootstrap_labels(texts: Sequence[str]) -> np.ndarray:
+    """(texts, components) 0/1 targets from the live keyword rules"""
+    import numpy as np
+    from . import secrm, taxonomy
+
+    snapshot = taxonomy.current()
+    keywords = snapshot.sections["keywords"]
+    labels = np.zeros((len(texts), len(keywords)), dtype=np.int8)
+    for row, text in enumerate(texts):
+        hits = secrm._collect_hits(secrm.find_matches(text, snapshot), keywords)
+        labels[row] = [bool(hits[name]) for name in keywords]
+    return labels
+
+
+def train(texts: Sequence[str], output: str, holdout: float = 0.1, alpha: float = 1e-6,
+          epochs: int = 30, seed: int = 0) -> Dict[str, object]:
+    """Fit one logistic model per component and write the artifact to ``output``"""
+    import numpy as np
+    from sklearn.linear_model import SGDClassifier
+    from . import secrm, taxonomy  # noqa: F401 (secrm registers the keyword section)
+
+    names = list(taxonomy.current().sections["keywords"])
+    targets = bootstrap_labels(texts)
+    order = np.random.default_rng(seed).permutation(len(texts))
+    split = len(texts) - int(len(texts) * holdout)
+    features = featurize(texts)
+    train_rows, test_rows = order[:split], order[split:]
+    train_x = features[train_rows]
+
+    weights = np.zeros((N_FEATURES, len(names)), dtype=np.float32)
+    bias = np.zeros(len(names), dtype=np.float32)
+    for col, name in enumerate(names):
+        y = targets[train_rows, col]
+        if y.min() == y.max():
+            # Never (or always) present in the corpus: a constant answer
+            bias[col] = 10.0 if y.min() else -10.0
+            print(f"Classifier Warning: '{name}' is {'always' if y.min() else 'never'} present; not trained")
+            continue
+        model = SGDClassifier(loss="log_loss", alpha=alpha, max_iter=epochs, tol=1e-4, random_state=seed)
+        model.fit(train_x, y)
+        weights[:, col] = model.coef_[0]
+        bias[col] = model.intercept_[0]
+
+    evaluation: Dict[str, object] = {"holdout": len(test_rows)}
+    if len(test_rows):
+        predicted = (features[test_rows] @ weights + bias) >= 0
+        expected = targets[test_rows].astype(bool)
+        evaluation["exact_match"] = round(float((predicted == expected).all(axis=1).mean()), 4)
+        evaluation["label_accuracy"] = {
+            name: round(float((predicted[:, col] == expected[:, col]).mean()), 4) for col, name in enumerate(names)
+        }
+
+    meta = {
+        "version": time.strftime("%Y%m%d%H%M%S"),
+        "labels": names,
+        "n_features": N_FEATURES,
+        "ngram": NGRAM,
+        "taxonomy_version": taxonomy.current().version,
+        "samples": len(train_rows),
+        "alpha": alpha,
+        "epochs": epochs,
+        "evaluation": evaluation
+    }
+    os.makedirs(output, exist_ok=True)
+    # Arrays first and meta last, each swapped in whole, so a reader never
+    # pairs a new meta file with old weights of a different shape
+    for name, array in ((WEIGHTS_FILE, weights), (BIAS_FILE, bias)):
+        temporary = os.path.join(output, f".{name}.tmp")
+        with open(temporary, "wb") as handle:
+            np.save(handle, array)
+        os.replace(temporary, os.path.join(output, name))
+    temporary = os.path.join(output, f".{META_FILE}.tmp")
+    with open(temporary, "w", encoding="utf-8") as handle:
+        json.dump(meta, handle, indent=2)
+    os.replace(temporary, os.path.join(output, META_FILE))
+    return meta
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Train or inspect the SECRM component classifier")
+    commands = parser.add_subparsers(dest="command", required=True)
+    fit = commands.add_parser("train", help="bootstrap labels from the keyword rules and fit the model")
+    fit.add_argument("input", nargs="?", help="NDJSON or plain-text tickets (default: stdin)")
+    fit.add_argument("-o", "--output", default=SECRM_MODEL_PATH, help="artifact directory")
+    fit.add_argument("--holdout", type=float, default=0.1, help="fraction kept back for evaluation")
+    fit.add_argument("--alpha", type=float, default=1e-6, help="L2 regularization")
+    fit.add_argument("--epochs", type=int, default=30)
+    show = commands.add_parser("info", help="print an artifact's metadata")
+    show.add_argument("path", nargs="?", default=SECRM_MODEL_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == "info":
+        try:
+            sys.stdout.write(json.dumps(ComponentClassifier(args.path).meta, indent=2) + "\n")
+        except (OSError, ValueError, KeyError) as e:
+            sys.stderr.write(f"{e}\n")
+            return 1
+        return 0
+
+    texts = _read_texts(args.input)
+    if not texts:
+        sys.stderr.write("no tickets to train on\n")
+        return 1
+    started = time.perf_counter()
+    meta = train(texts, args.output, args.holdout, args.alpha, args.epochs)
+    sys.stdout.write(json.dumps({
+        "output": args.output,
+        "seconds": round(time.perf_counter() - started, 1),
+        **{key: meta[key] for key in ("version", "samples", "evaluation")}
+    }, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,293 @@
+"""
+Near-duplicate ticket clustering for SECRM-EIGA
+A streaming MinHash + LSH index over recent tickets. SECRM always runs on
+the new ticket; when its text is close enough to a live cluster and the
+fresh analysis finds the same components and urgency, the cluster's customer
+response is reused instead of calling the LLM again. Clusters expire after a
+fixed age and the index holds a bounded number of them
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional, Tuple
+
+from config import NEAR_DUPLICATE_CLUSTERS, NEAR_DUPLICATE_THRESHOLD, NEAR_DUPLICATE_TTL
+from .cache import clone_result, normalize_query
+from .eiga import eiga_from_response
+from .metrics import NEAR_DUPLICATES_REUSED
+from .secrm import analysis_scope, issue_profile
+from .taxonomy import current
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+SHINGLE_SIZE = 5
+NUM_PERMUTATIONS = 64
+# 16 bands of 4 rows: pairs at 0.75 similarity share a band 99% of the time,
+# pairs at 0.3 only 12%; candidates are then checked against the threshold
+BANDS = 16
+MERSENNE_PRIME = (1 << 31) - 1
+
+# Only answers that are worth repeating seed a cluster; fallbacks after a
+# timeout or an open circuit are not
+REUSABLE_PATHS = ("llm", "llm_batch", "cache", "retrieval", "demo_mode")
+
+_permutations = None
+
+
+def _get_permutations() -> Tuple[np.ndarray, np.ndarray]:
+    """Fixed (a, b) pairs of the universal hashes, the same in every process"""
+    global _permutations
+    if _permutations is None:
+        import numpy as np
+
+        rng = np.random.default_rng(1)
+        _permutations = (rng.integers(1, MERSENNE_PRIME, NUM_PERMUTATIONS, dtype=np.uint64)[:, None],
+                         rng.integers(0, MERSENNE_PRIME, NUM_PERMUTATIONS, dtype=np.uint64)[:, None])
+    return _permutations
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> List[int]:
+    """CRC32 of each character ``size``-gram of the normalized text"""
+    normalized = normalize_query(text)
+    if len(normalized) <= size:
+        return [zlib.crc32(normalized.encode("utf-8"))]
+    return list({zlib.crc32(normalized[i:i + size].encode("utf-8")) for i in range(len(normalized) - size + 1)})
+
+
+def signature(text: str) -> np.ndarray:
+    """MinHash signature: the minimum of each permuted shingle hash"""
+    import numpy as np
+
+    a, b = _get_permutations()
+    values = np.array(shingles(text), dtype=np.uint64)
+    return ((a * values + b) % MERSENNE_PRIME).min(axis=1).astype(np.uint32)
+
+
+def profile(secrm_data: Dict) -> Tuple[str, Tuple[str, ...]]:
+    """``issue_profile`` of a SECRM result"""
+    return issue_profile(secrm_data.get("urgency", "medium"), secrm_data.get("components", []))
+
+
+def _band_keys(sig: np.ndarray) -> List[Tuple[int, bytes]]:
+    rows = NUM_PERMUTATIONS // BANDS
+    return [(band, sig[band * rows:(band + 1) * rows].tobytes()) for band in range(BANDS)]
+
+
+class Cluster:
+    """A representative ticket and the customer response served to its near duplicates"""
+
+    __slots__ = ("id", "scope", "signature", "bands", "profile", "response", "created", "last_seen", "size")
+
+    def __init__(self, cluster_id: int, scope: str, sig: np.ndarray, ticket_profile: Tuple, response: Dict):
+        self.id = cluster_id
+        self.scope = scope
+        self.signature = sig
+        self.bands = _band_keys(sig)
+        self.profile = ticket_profile
+        self.response = clone_result(response)
+        self.created = self.last_seen = time.time()
+        self.size = 1
+
+
+class NearDuplicateIndex:
+    """Bounded, expiring MinHash LSH index of ticket clusters.
+
+    ``scope`` ties a cluster to the taxonomy and model that produced its
+    analysis, so a reload never serves results from the previous tables;
+    ``profile`` ties it to what that analysis found, so a near-duplicate
+    text that SECRM reads differently never gets its reply.
+    """
+
+    def __init__(self, max_clusters: int = 10000, ttl_seconds: float = 600, threshold: float = 0.75):
+        self.max_clusters = max_clusters
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+        self._clusters: "OrderedDict[int, Cluster]" = OrderedDict()
+        self._buckets: Dict[Tuple[int, bytes], set] = {}
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self._last_sweep = time.time()
+        self.lookups = 0
+        self.reused = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def lookup(self, text: str, scope: str,
+               ticket_profile: Tuple) -> Tuple[np.ndarray, Optional[Tuple[Cluster, float]]]:
+        """Signature of ``text`` and the closest live cluster with the same profile
+        at or above the threshold, if any"""
+        sig = signature(text)
+        bands = _band_keys(sig)
+        now = time.time()
+        with self._lock:
+            self.lookups += 1
+            candidates = set()
+            for key in bands:
+                candidates.update(self._buckets.get(key, ()))
+            best: Optional[Cluster] = None
+            best_similarity = 0.0
+            for cluster_id in candidates:
+                cluster = self._clusters[cluster_id]
+                if (cluster.scope != scope or cluster.profile != ticket_profile
+                        or now - cluster.created > self.ttl_seconds):
+                    continue
+                similarity = float((cluster.signature == sig).mean())
+                if similarity >= self.threshold and similarity > best_similarity:
+                    best, best_similarity = cluster, similarity
+            if best is None:
+                return sig, None
+            best.size += 1
+            best.last_seen = now
+            self._clusters.move_to_end(best.id)
+            self.reused += 1
+        NEAR_DUPLICATES_REUSED.inc()
+        return sig, (best, best_similarity)
+
+    def add(self, sig: np.ndarray, scope: str, ticket_profile: Tuple, response: Dict) -> Cluster:
+        """Start a new cluster with ``sig`` as its representative"""
+        with self._lock:
+            cluster = Cluster(self._next_id, scope, sig, ticket_profile, response)
+            self._next_id += 1
+            self._clusters[cluster.id] = cluster
+            for key in cluster.bands:
+                self._buckets.setdefault(key, set()).add(cluster.id)
+            if cluster.created - self._last_sweep > self.ttl_seconds / 4:
+                self._sweep(cluster.created)
+            while len(self._clusters) > self.max_clusters:
+                self._remove(next(iter(self._clusters)))
+                self.evictions += 1
+        return cluster
+
+    def _sweep(self, now: float) -> None:
+        self._last_sweep = now
+        for cluster in [c for c in self._clusters.values() if now - c.created > self.ttl_seconds]:
+            self._remove(cluster.id)
+            self.expirations += 1
+
+    def _remove(self, cluster_id: int) -> None:
+        cluster = self._clusters.pop(cluster_id)
+        for key in cluster.bands:
+            members = self._buckets.get(key)
+            if members is not None:
+                members.discard(cluster_id)
+                if not members:
+                    del self._buckets[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clusters.clear()
+            self._buckets.clear()
+
+    def __len__(self) -> int:
+        return len(self._clusters)
+
+    def stats(self, top: int = 5) -> Dict[str, object]:
+        now = time.time()
+        with self._lock:
+            live = [c for c in self._clusters.values() if now - c.created <= self.ttl_seconds]
+            largest = sorted(live, key=lambda c: c.size, reverse=True)[:top]
+            clustered = sum(c.size for c in live)
+        return {
+            "enabled": True,
+            "clusters": len(live),
+            "max_clusters": self.max_clusters,
+            "ttl_seconds": self.ttl_seconds,
+            "threshold": self.threshold,
+            "lookups": self.lookups,
+            "reused": self.reused,
+            "reuse_rate": round(self.reused / self.lookups, 4) if self.lookups else 0.0,
+            "tickets_clustered": clustered,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "largest_clusters": [
+                {
+                    "id": c.id,
+                    "size": c.size,
+                    "components": list(c.profile[1]),
+                    "urgency": c.profile[0],
+                    "age_seconds": round(now - c.created, 1)
+                }
+                for c in largest
+            ]
+        }
+
+
+_index: Optional[NearDuplicateIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> Optional[NearDuplicateIndex]:
+    """Return the process-wide near-duplicate index (None when disabled)"""
+    global _index
+    if NEAR_DUPLICATE_CLUSTERS <= 0:
+        return None
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = NearDuplicateIndex(NEAR_DUPLICATE_CLUSTERS, NEAR_DUPLICATE_TTL, NEAR_DUPLICATE_THRESHOLD)
+    return _index
+
+
+def reused_result(cluster: Cluster, similarity: float, secrm_data: Dict) -> Dict:
+    """EIGA output for the fresh ``secrm_data`` around the cluster's customer response"""
+    response = clone_result(cluster.response)
+    response.update({
+        "tokens_used": 0, "prompt_tokens": 0, "completion_tokens": 0,
+        "generation_time": 0.0, "cached": True, "path": "near_duplicate"
+    })
+    eiga_result = eiga_from_response(secrm_data, response)
+    eiga_result["near_duplicate"] = {
+        "cluster_id": cluster.id,
+        "similarity": round(similarity, 2),
+        "cluster_size": cluster.size
+    }
+    return eiga_result
+
+
+class Lookup(NamedTuple):
+    """Outcome of ``check``: what ``remember`` needs, and the reused EIGA result on a hit"""
+    index: NearDuplicateIndex
+    signature: np.ndarray
+    scope: str
+    profile: Tuple
+    reused: Optional[Dict]
+
+
+def check(text: str, secrm_data: Dict) -> Optional[Lookup]:
+    """Look ``text`` up in the index, given its fresh SECRM analysis
+    (None when near-duplicate reuse is disabled)"""
+    index = get_index()
+    if index is None:
+        return None
+    scope = analysis_scope(current())
+    ticket_profile = profile(secrm_data)
+    sig, match = index.lookup(text, scope, ticket_profile)
+    reused = reused_result(*match, secrm_data) if match is not None else None
+    return Lookup(index, sig, scope, ticket_profile, reused)
+
+
+def remember(lookup: Optional[Lookup], eiga_result: Dict) -> None:
+    """Start a cluster from a freshly generated response that missed the index"""
+    if lookup is None or lookup.reused is not None:
+        return
+    metadata = eiga_result.get("llm_metadata", {})
+    if metadata.get("path", "llm") in REUSABLE_PATHS:
+        response = {
+            "response": eiga_result["customer_response"],
+            "model_used": metadata.get("model_used", "unknown"),
+            "confidence": metadata.get("confidence", 0.0)
+        }
+        if "retrieved" in metadata:
+            response["retrieved"] = metadata["retrieved"]
+        lookup.index.add(lookup.signature, lookup.scope, lookup.profile, response)
+
+
+def stats() -> Dict[str, object]:
+    index = get_index()
+    return index.stats() if index is not None else {"enabled": False}
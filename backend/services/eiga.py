@@ -1,8 +1,12 @@
 from __future__ import annotations
 
-from typing import Dict, List
+from typing import Dict, Iterator, List, Optional, Tuple
 import random
+import sys
 from .llm_service import LLMService
+from .metrics import timed
+from .secrm import SEVERITY_LEVELS
+from .taxonomy import Taxonomy, check_mapping, check_word_list, current, register_compiler, register_section
 
 
 RESPONSE_TEMPLATES = {
@@ -99,10 +103,143 @@ TECHNICAL_RECOMMENDATIONS = {
 }
 
 
-def generate_customer_response(components: List[Dict], sentiment: Dict, urgency: str) -> str:
+NO_ISSUE_RESPONSE = "Thank you for your feedback. I'm here to help with any questions or concerns you may have about your product."
+GENERIC_RESPONSE = "I understand your concerns and I'm here to help resolve any issues you're experiencing."
+URGENCY_ACKNOWLEDGMENTS = {
+    "urgent": " I'm treating this as an urgent matter and will ensure you receive immediate assistance.",
+    "high": " I'm prioritizing your case to ensure a quick resolution."
+}
+APOLOGY = " I sincerely apologize for any frustration this has caused."
+
+RETENTION_RECOMMENDATION = {
+    "type": "Retention",
+    "title": "Customer Retention Strategy",
+    "description": "High churn risk detected - immediate retention actions required",
+    "action": "Offer expedited replacement, compensation, or upgrade path"
+}
+
+
+def _check_templates(component: str, templates: object) -> None:
+    def check_template(severity: str, text: object) -> None:
+        if severity not in SEVERITY_LEVELS:
+            raise ValueError(f"severity must be one of {', '.join(SEVERITY_LEVELS)}")
+        if not isinstance(text, str):
+            raise ValueError("template must be a string")
+    check_mapping(templates, check_template)
+
+
+def _check_impact(level: str, impact: object) -> None:
+    def check_field(key: str, value: object) -> None:
+        if not isinstance(value, str):
+            raise ValueError("must be a string")
+    check_mapping(impact, check_field, required=("churn_risk", "action", "priority", "response_time"))
+
+
+def _compile_customer_responses(sections: Dict[str, object]) -> Dict[Tuple[Optional[str], str, str, bool], str]:
+    """Every (primary component, severity, urgency, apology) response, interned"""
+    response_templates = sections["response_templates"]
+    table = {}
+    for component in list(response_templates) + [None]:
+        for severity in SEVERITY_LEVELS:
+            if component is None:
+                base_response = GENERIC_RESPONSE
+            else:
+                templates = response_templates[component]
+                base_response = templates.get(severity, templates.get("medium", ""))
+            for urgency in list(URGENCY_ACKNOWLEDGMENTS) + [""]:
+                for apologize in (False, True):
+                    text = base_response + URGENCY_ACKNOWLEDGMENTS.get(urgency, "") + (APOLOGY if apologize else "")
+                    table[(component, severity, urgency, apologize)] = sys.intern(text)
+    return table
+
+
+def _impact_recommendation(impact: Dict[str, str]) -> Dict[str, str]:
+    return {
+        "type": "Business Impact",
+        "title": f"Customer Risk Assessment: {impact['churn_risk']}",
+        "description": f"Priority: {impact['priority']} | Response Time: {impact['response_time']}",
+        "action": impact['action']
+    }
+
+
+def _technical_recommendation(component_name: str, severity: str, confidence_pct: int,
+                              actions: List[str]) -> Dict[str, str]:
+    return {
+        "type": "Technical Action",
+        "title": f"Address {component_name.replace('_', ' ').title()} Issues",
+        "description": f"Severity: {severity.title()} | Confidence: {confidence_pct}%",
+        "action": actions[0]  # Primary recommendation
+    }
+
+
+def _issue_fragment(label: str, severity: str, confidence_pct: int) -> str:
+    return f"{label} issue ({severity}, {confidence_pct}% confidence)"
+
+
+def _sentiment_fragment(name: str, pct: int) -> str:
+    return f"Customer sentiment: {name} ({pct}%). "
+
+
+def _compile_technical_recommendations(sections: Dict[str, object]) -> Dict[Tuple[str, str, int], Dict[str, str]]:
+    """Every (component, severity, confidence %) recommendation SECRM can produce"""
+    return {
+        (name, severity, pct): _technical_recommendation(name, severity, pct, actions)
+        for name, actions in sections["technical_recommendations"].items()
+        for severity in SEVERITY_LEVELS + ("unknown",)
+        for pct in range(101)
+    }
+
+
+def _compile_impact_recommendations(sections: Dict[str, object]) -> Dict[str, Dict[str, str]]:
+    return {level: _impact_recommendation(impact) for level, impact in sections["business_impact"].items()}
+
+
+def _compile_issue_fragments(sections: Dict[str, object]) -> Dict[Tuple[str, str, int], str]:
+    return {
+        (label, severity, pct): sys.intern(_issue_fragment(label, severity, pct))
+        for label in sections["keywords"]
+        for severity in SEVERITY_LEVELS + ("unknown",)
+        for pct in range(101)
+    }
+
+
+def _compile_sentiment_fragments(sections: Dict[str, object]) -> Dict[Tuple[str, int], str]:
+    return {
+        (name, pct): sys.intern(_sentiment_fragment(name, pct))
+        for name in sections["sentiment_keywords"]
+        for pct in range(101)
+    }
+
+
+# The module tables above are the built-in taxonomy. The decision tables are
+# compiled per taxonomy snapshot and shared between calls; results get their
+# own copies of the recommendation dicts, so a caller that edits a result can
+# never rewrite the snapshot for later requests.
+register_section("response_templates", RESPONSE_TEMPLATES, lambda value: check_mapping(value, _check_templates))
+register_section("business_impact", BUSINESS_IMPACT,
+                 lambda value: check_mapping(value, _check_impact, required=SEVERITY_LEVELS))
+register_section(
+    "technical_recommendations", TECHNICAL_RECOMMENDATIONS,
+    lambda value: check_mapping(value, lambda name, actions: check_word_list(actions, lowercase=False))
+)
+register_compiler("customer_responses", ("response_templates",), _compile_customer_responses)
+register_compiler("impact_recommendations", ("business_impact",), _compile_impact_recommendations)
+register_compiler("technical_fragments", ("technical_recommendations",), _compile_technical_recommendations)
+register_compiler("issue_fragments", ("keywords",), _compile_issue_fragments)
+register_compiler("sentiment_fragments", ("sentiment_keywords",), _compile_sentiment_fragments)
+
+URGENCY_FRAGMENTS = {
+    urgency: sys.intern(f"Urgency level: {urgency.title()}.")
+    for urgency in ("urgent", "high", "medium", "low")
+}
+
+
+def generate_customer_response(components: List[Dict], sentiment: Dict, urgency: str,
+                               taxonomy: Optional[Taxonomy] = None) -> str:
     """Generate empathetic customer response based on analysis"""
+    taxonomy = taxonomy or current()
     if not components:
-        return "Thank you for your feedback. I'm here to help with any questions or concerns you may have about your product."
+        return NO_ISSUE_RESPONSE
     
     # Find the highest severity component
     highest_severity = "low"
@@ -121,30 +258,23 @@ def generate_customer_response(components: List[Dict], sentiment: Dict, urgency:
             highest_severity = "medium"
             primary_component = comp["label"]
     
-    # Generate response based on primary component and severity
-    if primary_component and primary_component in RESPONSE_TEMPLATES:
-        base_response = RESPONSE_TEMPLATES[primary_component].get(highest_severity, 
-                                                                 RESPONSE_TEMPLATES[primary_component].get("medium", ""))
-    else:
-        base_response = "I understand your concerns and I'm here to help resolve any issues you're experiencing."
-    
-    # Add urgency acknowledgment
-    if urgency == "urgent":
-        base_response += " I'm treating this as an urgent matter and will ensure you receive immediate assistance."
-    elif urgency == "high":
-        base_response += " I'm prioritizing your case to ensure a quick resolution."
-    
-    # Add sentiment acknowledgment
-    if sentiment.get("negative", 0) > 0.5:
-        base_response += " I sincerely apologize for any frustration this has caused."
-    
-    return base_response
+    if primary_component not in taxonomy.sections["response_templates"]:
+        primary_component = None
+    return taxonomy.compiled["customer_responses"][(
+        primary_component,
+        highest_severity,
+        urgency if urgency in URGENCY_ACKNOWLEDGMENTS else "",
+        sentiment.get("negative", 0) > 0.5
+    )]
 
 
-def generate_business_recommendations(components: List[Dict], urgency: str) -> List[Dict[str, str]]:
+@timed("business_recommendations")
+def generate_business_recommendations(components: List[Dict], urgency: str,
+                                      taxonomy: Optional[Taxonomy] = None) -> List[Dict[str, str]]:
     """Generate business-focused recommendations"""
-    recommendations = []
-    
+    taxonomy = taxonomy or current()
+    technical_recommendations = taxonomy.sections["technical_recommendations"]
+    technical_fragments = taxonomy.compiled["technical_fragments"]
     # Determine overall risk level
     risk_level = "low"
     if urgency == "urgent":
@@ -157,105 +287,174 @@ def generate_business_recommendations(components: List[Dict], urgency: str) -> L
         risk_level = "medium"
     
     # Business impact assessment
-    impact = BUSINESS_IMPACT.get(risk_level, BUSINESS_IMPACT["low"])
-    
-    recommendations.append({
-        "type": "Business Impact",
-        "title": f"Customer Risk Assessment: {impact['churn_risk']}",
-        "description": f"Priority: {impact['priority']} | Response Time: {impact['response_time']}",
-        "action": impact['action']
-    })
+    recommendations = [dict(taxonomy.compiled["impact_recommendations"][risk_level])]
     
     # Technical recommendations for each component
     for comp in components:
         component_name = comp["label"]
-        if component_name in TECHNICAL_RECOMMENDATIONS:
-            tech_recs = TECHNICAL_RECOMMENDATIONS[component_name]
-            recommendations.append({
-                "type": "Technical Action",
-                "title": f"Address {component_name.replace('_', ' ').title()} Issues",
-                "description": f"Severity: {comp.get('severity', 'unknown').title()} | Confidence: {comp.get('confidence', 0)*100:.0f}%",
-                "action": tech_recs[0]  # Primary recommendation
-            })
+        if component_name in technical_recommendations:
+            severity = comp.get("severity", "unknown")
+            pct = round(comp.get("confidence", 0) * 100)
+            fragment = technical_fragments.get((component_name, severity, pct))
+            if fragment is None:
+                # Values SECRM never produces, e.g. client-supplied /api/eiga data
+                fragment = _technical_recommendation(component_name, severity, pct,
+                                                     technical_recommendations[component_name])
+            recommendations.append(dict(fragment))
     
     # Customer retention actions
     if risk_level in ["critical", "high"]:
-        recommendations.append({
-            "type": "Retention",
-            "title": "Customer Retention Strategy",
-            "description": "High churn risk detected - immediate retention actions required",
-            "action": "Offer expedited replacement, compensation, or upgrade path"
-        })
+        recommendations.append(dict(RETENTION_RECOMMENDATION))
     
     return recommendations
 
 
-def run_eiga(secrm_data: Dict, original_text: str) -> Dict[str, object]:
+def generate_final_analysis(components: List[Dict], sentiment: Dict, urgency: str,
+                            taxonomy: Optional[Taxonomy] = None) -> str:
+    """Summarize detected issues, sentiment and urgency in one paragraph"""
+    taxonomy = taxonomy or current()
+    issue_fragments = taxonomy.compiled["issue_fragments"]
+    analysis_parts = []
+    for comp in components:
+        severity = comp.get("severity", "unknown")
+        pct = round(comp.get("confidence", 0) * 100)
+        fragment = issue_fragments.get((comp["label"], severity, pct))
+        analysis_parts.append(fragment if fragment is not None else _issue_fragment(comp["label"], severity, pct))
+    
+    if analysis_parts:
+        final_analysis = f"Detected issues: {', '.join(analysis_parts)}. "
+    else:
+        final_analysis = "No critical issues detected. "
+    
+    # Add sentiment summary
+    dominant_sentiment = max(sentiment.items(), key=lambda x: x[1]) if sentiment else ("neutral", 0)
+    name, pct = dominant_sentiment[0], round(dominant_sentiment[1] * 100)
+    summary = taxonomy.compiled["sentiment_fragments"].get((name, pct))
+    final_analysis += summary if summary is not None else _sentiment_fragment(name, pct)
+    
+    # Add urgency assessment
+    final_analysis += URGENCY_FRAGMENTS.get(urgency) or f"Urgency level: {urgency.title()}."
+    
+    return final_analysis
+
+
+def _dominant_sentiment(sentiment: Dict) -> str:
+    """Convert sentiment dict to string for LLM"""
+    if sentiment:
+        return max(sentiment.items(), key=lambda x: x[1])[0]
+    return "neutral"
+
+
+@timed("eiga")
+def run_eiga(secrm_data: Dict, original_text: str, llm_service: Optional[LLMService] = None) -> Dict[str, object]:
     """Enhanced EIGA with LLM-powered intelligent response generation"""
     components = secrm_data.get("components", [])
     sentiment = secrm_data.get("sentiment", {})
     urgency = secrm_data.get("urgency", "medium")
     language = secrm_data.get("language", "en")
     
-    # Initialize LLM service
-    llm_service = LLMService()
-    
-    # Convert sentiment dict to string for LLM
-    sentiment_str = "neutral"
-    if sentiment:
-        dominant_sentiment = max(sentiment.items(), key=lambda x: x[1])
-        sentiment_str = dominant_sentiment[0]
+    # Initialize LLM service unless the caller shares one
+    if llm_service is None:
+        llm_service = LLMService()
     
     # Generate intelligent response using LLM
     llm_result = llm_service.generate_response(
         user_query=original_text,
         components=components,
-        sentiment=sentiment_str,
+        sentiment=_dominant_sentiment(sentiment),
         urgency=urgency,
         language=language
     )
     
-    # Generate intelligent suggestions
-    intelligent_suggestions = llm_service.generate_suggestions(components, sentiment_str)
+    return _assemble_eiga_result(secrm_data, llm_result, llm_service)
+
+
+def stream_eiga(secrm_data: Dict, original_text: str, llm_service: Optional[LLMService] = None) -> Iterator[Tuple[str, object]]:
+    """EIGA that yields ("token", text) pieces of the response, then ("result", eiga_result)"""
+    if llm_service is None:
+        llm_service = LLMService()
     
-    # Generate business recommendations
-    business_recommendations = generate_business_recommendations(components, urgency)
+    llm_result = None
+    for event in llm_service.stream_response(
+        user_query=original_text,
+        components=secrm_data.get("components", []),
+        sentiment=_dominant_sentiment(secrm_data.get("sentiment", {})),
+        urgency=secrm_data.get("urgency", "medium"),
+        language=secrm_data.get("language", "en")
+    ):
+        if "delta" in event:
+            yield "token", event["delta"]
+        else:
+            llm_result = event["result"]
     
-    # Create detailed analysis
-    analysis_parts = []
-    if components:
-        for comp in components:
-            severity = comp.get("severity", "unknown")
-            confidence = comp.get("confidence", 0)
-            analysis_parts.append(f"{comp['label']} issue ({severity}, {confidence*100:.0f}% confidence)")
+    yield "result", _assemble_eiga_result(secrm_data, llm_result, llm_service)
+
+
+async def run_eiga_async(secrm_data: Dict, original_text: str, llm_service) -> Dict[str, object]:
+    """EIGA for asyncio callers; ``llm_service`` is an ``AsyncLLMService``"""
+    llm_result = await llm_service.generate_response(
+        user_query=original_text,
+        components=secrm_data.get("components", []),
+        sentiment=_dominant_sentiment(secrm_data.get("sentiment", {})),
+        urgency=secrm_data.get("urgency", "medium"),
+        language=secrm_data.get("language", "en")
+    )
     
-    if analysis_parts:
-        final_analysis = f"Detected issues: {', '.join(analysis_parts)}. "
-    else:
-        final_analysis = "No critical issues detected. "
+    return _assemble_eiga_result(secrm_data, llm_result, llm_service)
+
+
+def eiga_from_response(secrm_data: Dict, llm_result: Dict, llm_service: Optional[LLMService] = None) -> Dict[str, object]:
+    """EIGA for ``secrm_data`` around a response generated earlier (a near duplicate's)"""
+    if llm_service is None:
+        llm_service = LLMService()
+    return _assemble_eiga_result(secrm_data, llm_result, llm_service)
+
+
+def _assemble_eiga_result(secrm_data: Dict, llm_result: Dict, llm_service: LLMService) -> Dict[str, object]:
+    """Build the EIGA response around an LLM result"""
+    components = secrm_data.get("components", [])
+    sentiment = secrm_data.get("sentiment", {})
+    urgency = secrm_data.get("urgency", "medium")
+    snapshot = current()
+    business_impact = snapshot.sections["business_impact"]
     
-    # Add sentiment summary
-    dominant_sentiment = max(sentiment.items(), key=lambda x: x[1]) if sentiment else ("neutral", 0)
-    final_analysis += f"Customer sentiment: {dominant_sentiment[0]} ({dominant_sentiment[1]*100:.0f}%). "
+    # Generate intelligent suggestions
+    intelligent_suggestions = llm_service.generate_suggestions(components, _dominant_sentiment(sentiment))
     
-    # Add urgency assessment
-    final_analysis += f"Urgency level: {urgency.title()}."
+    llm_metadata = {
+        "model_used": llm_result["model_used"],
+        "confidence": llm_result["confidence"],
+        "tokens_used": llm_result["tokens_used"],
+        "prompt_tokens": llm_result.get("prompt_tokens", 0),
+        "completion_tokens": llm_result.get("completion_tokens", 0),
+        "generation_time": llm_result["generation_time"],
+        "cached": llm_result.get("cached", False),
+        "path": llm_result.get("path", "llm")
+    }
+    if "retrieved" in llm_result:
+        # Which resolved ticket the reply came from
+        llm_metadata["retrieved"] = llm_result["retrieved"]
     
     return {
         "customer_response": llm_result["response"],
-        "llm_metadata": {
-            "model_used": llm_result["model_used"],
-            "confidence": llm_result["confidence"],
-            "tokens_used": llm_result["tokens_used"],
-            "generation_time": llm_result["generation_time"]
-        },
+        "llm_metadata": llm_metadata,
         "intelligent_suggestions": intelligent_suggestions,
-        "business_recommendations": business_recommendations,
-        "final_analysis": final_analysis,
+        "business_recommendations": generate_business_recommendations(components, urgency, snapshot),
+        "final_analysis": generate_final_analysis(components, sentiment, urgency, snapshot),
         "sentiment_breakdown": sentiment,
         "urgency_level": urgency,
         "component_count": len(components),
-        "risk_assessment": BUSINESS_IMPACT.get(urgency, BUSINESS_IMPACT["medium"])
+        "risk_assessment": dict(business_impact.get(urgency, business_impact["medium"]))
     }
 
 
+def run_eiga_batch(secrm_results: List[Dict], original_texts: List[str]) -> List[Dict[str, object]]:
+    """Run EIGA over many SECRM results with a single shared LLM service"""
+    if len(secrm_results) != len(original_texts):
+        raise ValueError("secrm_results and original_texts must have the same length")
+    
+    llm_service = LLMService()
+    return [
+        run_eiga(secrm_data=secrm_data, original_text=text, llm_service=llm_service)
+        for secrm_data, text in zip(secrm_results, original_texts)
+    ]
@@ -0,0 +1,314 @@
+"""
+Durable job queue for SECRM-EIGA
+Pipeline requests accepted as jobs: the caller gets a job id at once, the
+ticket waits in a SQLite table and a pool of worker threads runs the
+pipeline, most urgent lane first. Results are kept for polling.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from config import (
+    JOB_LEASE_SECONDS, JOB_MAX_ATTEMPTS, JOB_MAX_QUEUED, JOB_MAX_WAITERS, JOB_RETENTION, JOB_WORKERS,
+    JOBS_DB_PATH
+)
+from .analytics import record_pipeline_result
+from .pipeline import compact_pipeline_result, encode_pipeline_result, run_pipeline
+from .secrm import run_secrm
+from .serialization import dumps
+
+
+# Lanes by SECRM urgency: a lower number is claimed first, then oldest first
+PRIORITIES = {"urgent": 0, "high": 1, "medium": 2, "low": 3}
+DEFAULT_PRIORITY = 2
+# How often idle workers and long-polls look for work or results written by
+# other processes; jobs from this process wake them immediately
+POLL_INTERVAL = 0.25
+MAINTENANCE_INTERVAL = 30
+FINISHED = ("done", "failed")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    urgency TEXT NOT NULL,
+    text TEXT NOT NULL,
+    compact INTEGER NOT NULL,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL,
+    started REAL,
+    lease_until REAL,
+    finished REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_lane ON jobs (status, priority, created);
+"""
+
+# Next job: queued, or running on a worker whose lease ran out (a crashed
+# process); the subquery and the update are one statement, so two workers
+# never claim the same job
+_CLAIM = """
+UPDATE jobs SET status = 'running', started = ?1, lease_until = ?1 + ?2, attempts = attempts + 1
+WHERE id = (
+    SELECT id FROM jobs
+    WHERE status = 'queued' OR (status = 'running' AND lease_until < ?1 AND attempts < ?3)
+    ORDER BY priority, created LIMIT 1
+)
+RETURNING id, text, compact, attempts
+"""
+
+_FIELDS = ("id", "status", "urgency", "priority", "attempts", "created", "started", "finished", "error", "result")
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def encode_job(job: Dict) -> str:
+    """JSON for a job record; a finished job's stored result is spliced in unparsed"""
+    result = job.get("result")
+    head = dumps({
+        "job_id": job["id"],
+        "status": job["status"],
+        "urgency": job["urgency"],
+        "attempts": job["attempts"],
+        "created": job["created"],
+        "started": job["started"],
+        "finished": job["finished"],
+        **({"error": job["error"]} if job.get("error") else {})
+    })
+    return head if result is None else f'{head[:-1]},"result":{result}}}'
+
+
+class QueueFull(Exception):
+    """More than JOB_MAX_QUEUED jobs are waiting"""
+
+
+class JobQueue:
+    """SQLite-backed queue drained by ``workers`` threads in this process.
+
+    Every process serving the API may run workers on the same file; SQLite
+    serializes the claims. A job whose worker dies is claimed again once its
+    lease expires, up to ``max_attempts`` times.
+    """
+
+    def __init__(self, path: str = JOBS_DB_PATH, workers: int = JOB_WORKERS,
+                 lease_seconds: float = JOB_LEASE_SECONDS, max_attempts: int = JOB_MAX_ATTEMPTS,
+                 retention: float = JOB_RETENTION, max_queued: int = JOB_MAX_QUEUED,
+                 max_waiters: int = JOB_MAX_WAITERS):
+        self.path = path
+        self.workers = workers
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retention = retention
+        self.max_queued = max_queued
+        self.max_waiters = max_waiters
+        self.waiters = 0
+        self._conn = _connect(path)
+        self._lock = threading.Lock()
+        # Notified when a job is submitted or finishes in this process
+        self._changed = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._last_maintenance = 0.0
+        self.completed = 0
+        self.failed = 0
+
+    # Submitting and reading --------------------------------------------------
+
+    def submit(self, text: str, compact: bool = False) -> Dict[str, object]:
+        """Queue one ticket in the lane of its SECRM urgency"""
+        urgency = run_secrm(text).get("urgency", "medium")
+        priority = PRIORITIES.get(urgency, DEFAULT_PRIORITY)
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            queued = self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+            if self.max_queued > 0 and queued >= self.max_queued:
+                raise QueueFull(f"{queued} jobs are already queued")
+            with self._conn:
+                self._conn.execute(
+                    "INSERT INTO jobs (id, status, priority, urgency, text, compact, created) VALUES (?, 'queued', ?, ?, ?, ?, ?)",
+                    (job_id, priority, urgency, text, int(compact), now)
+                )
+            ahead = self._conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND (priority < ? OR (priority = ? AND created < ?))",
+                (priority, priority, now)
+            ).fetchone()[0]
+        self.start()
+        with self._changed:
+            self._changed.notify_all()
+        return {"job_id": job_id, "status": "queued", "urgency": urgency, "lane": priority, "ahead": ahead}
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(f"SELECT {', '.join(_FIELDS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(zip(_FIELDS, row)) if row is not None else None
+
+    def wait(self, job_id: str, timeout: float) -> Optional[Dict]:
+        """``get``, but hold on for up to ``timeout`` seconds until the job finishes.
+
+        A waiting poll holds a server thread, so at most ``max_waiters`` wait
+        at once; beyond that the current status is returned immediately.
+        """
+        with self._changed:
+            if self.waiters >= self.max_waiters:
+                return self.get(job_id)
+            self.waiters += 1
+        try:
+            deadline = time.monotonic() + timeout
+            while True:
+                job = self.get(job_id)
+                remaining = deadline - time.monotonic()
+                if job is None or job["status"] in FINISHED or remaining <= 0:
+                    return job
+                with self._changed:
+                    self._changed.wait(min(remaining, POLL_INTERVAL))
+        finally:
+            with self._changed:
+                self.waiters -= 1
+
+    # Workers -------------------------------------------------------------------
+
+    def start(self) -> None:
+        """Start the worker threads once per process (idempotent)"""
+        if self._threads or self.workers <= 0:
+            return
+        with self._lock:
+            if not self._threads:
+                for number in range(self.workers):
+                    thread = threading.Thread(target=self._work, name=f"job-worker-{number}", daemon=True)
+                    thread.start()
+                    self._threads.append(thread)
+
+    def _claim(self) -> Optional[tuple]:
+        with self._lock:
+            with self._conn:
+                return self._conn.execute(_CLAIM, (time.time(), self.lease_seconds, self.max_attempts)).fetchone()
+
+    def _finish(self, job_id: str, status: str, result: Optional[str] = None, error: Optional[str] = None) -> None:
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, result = ?, error = ?, finished = ?, lease_until = NULL"
+                    " WHERE id = ? AND status = 'running'",
+                    (status, result, error, time.time(), job_id)
+                )
+        with self._changed:
+            self._changed.notify_all()
+
+    def _work(self) -> None:
+        while True:
+            try:
+                self._maintain()
+                job = self._claim()
+            except sqlite3.Error as e:
+                print(f"Job Error: {e}")
+                job = None
+            if job is None:
+                with self._changed:
+                    self._changed.wait(POLL_INTERVAL)
+                continue
+            self._run(*job)
+
+    def _run(self, job_id: str, text: str, compact: int, attempts: int) -> None:
+        started = time.perf_counter()
+        try:
+            result = run_pipeline(text)
+            record_pipeline_result(result, (time.perf_counter() - started) * 1000)
+            encoded = dumps(compact_pipeline_result(result)) if compact else encode_pipeline_result(result)
+        except Exception as e:
+            print(f"Job Error: {job_id}: {e}")
+            if attempts < self.max_attempts:
+                with self._lock:
+                    with self._conn:
+                        self._conn.execute(
+                            "UPDATE jobs SET status = 'queued', lease_until = NULL, error = ? WHERE id = ?",
+                            (str(e), job_id)
+                        )
+            else:
+                self.failed += 1
+                self._finish(job_id, "failed", error=str(e))
+            return
+        self.completed += 1
+        self._finish(job_id, "done", result=encoded)
+
+    def _maintain(self) -> None:
+        """Fail jobs that used up their attempts and drop finished jobs past retention"""
+        now = time.time()
+        if now - self._last_maintenance < MAINTENANCE_INTERVAL:
+            return
+        self._last_maintenance = now
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = 'worker lost after ' || attempts || ' attempts',"
+                    " finished = ?1, lease_until = NULL WHERE status = 'running' AND lease_until < ?1 AND attempts >= ?2",
+                    (now, self.max_attempts)
+                )
+                self._conn.execute("DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished < ?",
+                                   (now - self.retention,))
+
+    def stats(self) -> Dict[str, object]:
+        now = time.time()
+        with self._lock:
+            statuses = dict(self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+            lanes = self._conn.execute(
+                "SELECT urgency, COUNT(*), MIN(created) FROM jobs WHERE status = 'queued' GROUP BY urgency"
+            ).fetchall()
+        return {
+            "enabled": True,
+            "workers": len(self._threads),
+            "long_polls": {"waiting": self.waiters, "max": self.max_waiters},
+            "jobs": {status: statuses.get(status, 0) for status in ("queued", "running", "done", "failed")},
+            "queued_by_urgency": {urgency: {"count": count, "oldest_seconds": round(now - oldest, 1)}
+                                  for urgency, count, oldest in lanes},
+            "completed_here": self.completed,
+            "failed_here": self.failed
+        }
+
+
+_queue: Optional[JobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_queue() -> Optional[JobQueue]:
+    """Return the process-wide job queue (None when disabled)"""
+    global _queue
+    if not JOBS_DB_PATH:
+        return None
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = JobQueue()
+    return _queue
+
+
+def _after_fork_in_child() -> None:
+    # Worker threads and SQLite connections do not survive a fork; the child
+    # opens its own queue on first use
+    global _queue, _queue_lock
+    _queue = None
+    _queue_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def start_workers() -> None:
+    """Drain jobs left by earlier runs or other processes without waiting for a submit"""
+    job_queue = get_queue()
+    if job_queue is not None:
+        job_queue.start()
@@ -3,16 +3,275 @@ LLM Service for SECRM-EIGA
 Provides intelligent response generation using OpenAI GPT models
 """
 
-import openai
+import itertools
 import json
 import random
-from typing import Dict, List, Optional
-from config import OPENAI_API_KEY, OPENAI_MODEL, OPENAI_TEMPERATURE, DEMO_MODE
+import re
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Dict, Iterator, List, Optional, Tuple
+from config import (
+    OPENAI_API_KEY, OPENAI_MODEL, OPENAI_TEMPERATURE, DEMO_MODE, MAX_RESPONSE_LENGTH,
+    LLM_BATCH_MAX_SIZE, LLM_BATCH_MAX_TOKENS, LLM_BATCH_WINDOW_MS,
+    LLM_BREAKER_COOLDOWN, LLM_BREAKER_FAILURES, LLM_DEADLINE, LLM_MAX_CONCURRENCY, LLM_REQUEST_TIMEOUT
+)
+from .batching import BatchItem, MicroBatcher
+from .cache import get_response_cache, prompt_fingerprint
+from .metrics import (
+    DEMO_RESPONSES, LLM_BATCH_SIZE, LLM_ERRORS, LLM_IN_FLIGHT, LLM_PROMPT_TOKENS, STAGE_LATENCY, stage_timer
+)
+from .resilience import CircuitBreaker
+from .retrieval import retrieved_response
+from .tokens import condense_query, count_static, count_tokens, estimated_usage, record_usage, response_budget
+
+
+TROUBLESHOOTING_STEPS = {
+    "battery": """First, please perform a soft reset by holding down the power button for 10-15 seconds until the device restarts. This clears temporary system glitches without affecting your data. Next, check your battery usage in the settings menu to identify any apps consuming excessive power. Finally, ensure you're using the original charger and cable, as third-party accessories can cause charging issues. If the problem persists after these steps, we may need to run a battery diagnostic test.""",
+    
+    "overheating": """First, immediately turn off your device and let it cool down for at least 15 minutes in a well-ventilated area. Once cooled, restart the device and check for any pending software updates in the settings menu, as outdated firmware can cause thermal issues. Next, close all unnecessary applications and avoid using the device while charging. If overheating continues, please contact our technical support team immediately as this could indicate a hardware issue that needs professional attention.""",
+    
+    "performance": """First, please perform a soft reset by holding down the power button for 10-15 seconds until the device restarts. This clears temporary system glitches and frees up memory. Next, go to your device settings and clear the cache for recently used applications. Finally, check for any pending software updates in the settings menu, as outdated firmware can often cause performance problems. If the device is still running slowly after these steps, we can run deeper diagnostics to identify the specific cause.""",
+    
+    "display": """First, please perform a soft reset by holding down the power button for 10-15 seconds until the device restarts. This can resolve temporary display glitches. Next, check your display settings and adjust the brightness and resolution to see if that improves the issue. Finally, test the display by opening different applications to see if the problem is consistent across all screens. If you notice dead pixels or persistent display issues, we may need to arrange for a professional service appointment.""",
+    
+    "network": """First, please restart your device and your router by unplugging the router for 30 seconds, then plugging it back in. Next, check your network settings and ensure you're connected to the correct Wi-Fi network. Try forgetting the network and reconnecting with the correct password. Finally, check for any pending software updates in the settings menu, as outdated network drivers can cause connectivity issues. If the problem persists, we may need to update your device's network drivers.""",
+    
+    "audio": """First, please perform a soft reset by holding down the power button for 10-15 seconds until the device restarts. This can resolve temporary audio glitches. Next, check your audio settings and ensure the volume is turned up and not muted. Try using different audio outputs (speakers, headphones) to isolate the issue. Finally, check for any pending software updates in the settings menu, as outdated audio drivers can cause sound problems. If the issue continues, we may need to run audio diagnostics to identify the specific cause."""
+}
+DEFAULT_TROUBLESHOOTING_STEPS = """First, please perform a soft reset by holding down the power button for 10-15 seconds until the device restarts. This clears temporary system glitches without affecting your data. Next, check for any pending software updates in the settings menu, as outdated firmware can often cause various issues. Finally, if the problem persists, please contact our technical support team for further assistance."""
+
+COMPONENT_SUGGESTIONS = {
+    "battery": "I recommend checking your charging habits, running a battery diagnostic, and ensuring your device's software is up to date. These steps often resolve battery-related issues.",
+    "overheating": "Please ensure your device has proper ventilation, close unnecessary applications, and avoid using it while charging. If the issue persists, we may need to check for hardware problems.",
+    "performance": "Try restarting your device, clearing cache, and checking for software updates. If performance issues continue, we can run deeper diagnostics to identify the specific cause.",
+    "display": "Let's check your display settings, test for dead pixels, and verify the connection. Display issues can often be resolved with simple adjustments or may require professional service.",
+    "network": "Network connectivity issues can usually be resolved by checking your connection settings, restarting your router, or updating your device's network drivers.",
+    "audio": "Audio problems often stem from software settings, driver issues, or hardware connections. Let's systematically test each component to identify the root cause."
+}
+DEFAULT_COMPONENT_SUGGESTION = "Let's work through some systematic troubleshooting steps to identify and resolve this issue."
+
+# Per component: (severity that gets the escalated suggestion, escalated, default)
+SUGGESTION_RULES = {
+    "battery": ("high", "🔋 Schedule immediate battery replacement - high degradation detected",
+                "🔋 Optimize charging habits and run battery calibration"),
+    "overheating": ("critical", "🌡️ URGENT: Stop using device immediately - thermal protection needed",
+                    "🌡️ Improve ventilation and reduce processor load"),
+    "performance": (None, None, "⚡ Clear cache, update software, and optimize system settings"),
+    "display": (None, None, "📱 Test display components and check for hardware issues"),
+    "network": (None, None, "📶 Troubleshoot connectivity and update network drivers"),
+    "audio": (None, None, "🔊 Test audio components and update sound drivers")
+}
+SENTIMENT_SUGGESTIONS = {
+    "negative": "💬 Prioritize this customer for immediate follow-up",
+    "positive": "⭐ Excellent opportunity for positive review and referral"
+}
+
+DEMO_OPENING = "Thank you for contacting us about this issue. I'm here to help you resolve this problem with your device. Let me provide you with some specific guidance based on the information you've shared."
+DEMO_URGENCY_NOTES = {
+    "high": " Given the urgency of this issue, I recommend we address this immediately.",
+    "critical": " This appears to be a critical issue that requires immediate attention for your safety and device protection."
+}
+DEMO_APPROACH = " Let's work through some systematic troubleshooting steps to identify and resolve this issue."
+
+SYSTEM_PROMPT = """You are an expert electronics customer service representative with deep technical knowledge. 
+You specialize in diagnosing and resolving issues with consumer electronics, smartphones, laptops, gaming hardware, and smart home devices.
+
+Your responses should be:
+- Technically accurate and specific
+- Empathetic and understanding
+- Actionable with clear next steps
+- Professional yet approachable
+- Focused on customer satisfaction
+
+Always prioritize customer safety and provide appropriate warnings for potentially dangerous situations."""
+
+# Shared by the single-ticket and the batched prompts
+RESPONSE_STRUCTURE = """1. **Opening**: Start with "Thank you for contacting us about this issue. I'm here to help you resolve this problem with your device. Let me provide you with some specific guidance based on the information you've shared."
+
+2. **Urgency Assessment**: If urgent, add "Given the urgency of this issue, I recommend we address this immediately."
+
+3. **Systematic Approach**: Include "Let's work through some systematic troubleshooting steps to identify and resolve this issue."
+
+4. **Step-by-Step Instructions**: Provide 2-3 specific, actionable steps with:
+   - Clear instructions (e.g., "First, please perform a soft reset by holding down the power button for 10-15 seconds")
+   - Explanation of what each step does
+   - What to expect after each step
+
+5. **Professional Tone**: Maintain empathy while being technically accurate
+6. **Next Steps**: Guide them on what to do if the issue persists"""
+
+BATCH_OUTPUT_FORMAT = (
+    'Return only a JSON object of the form {"responses": [{"id": "<ticket id>", "response": "<response text>"}]} '
+    "with exactly one entry per ticket."
+)
+# JSON keys and quoting around each response in a batched reply
+BATCH_TOKENS_PER_TICKET = 30
+
+
+def _compile_demo_responses() -> Dict[tuple, str]:
+    """Every (urgency, component) demo response; None is the generic component"""
+    return {
+        (urgency, component): sys.intern(
+            DEMO_OPENING + DEMO_URGENCY_NOTES.get(urgency, "") + DEMO_APPROACH + " "
+            + TROUBLESHOOTING_STEPS.get(component, DEFAULT_TROUBLESHOOTING_STEPS)
+        )
+        for urgency in list(DEMO_URGENCY_NOTES) + [""]
+        for component in list(TROUBLESHOOTING_STEPS) + [None]
+    }
+
+
+DEMO_RESPONSE_TEXTS = _compile_demo_responses()
+
+
+_openai = None
+
+
+def _openai_client():
+    """Import the OpenAI SDK on the first real completion; demo mode never loads it"""
+    global _openai
+    if _openai is None:
+        import openai
+        openai.api_key = OPENAI_API_KEY
+        _openai = openai
+    return _openai
+
+
+def _probe_llm() -> None:
+    """Cheapest possible completion, used to test whether OpenAI has recovered"""
+    _openai_client().ChatCompletion.create(
+        model=OPENAI_MODEL,
+        messages=[{"role": "user", "content": "ping"}],
+        max_tokens=1,
+        request_timeout=LLM_DEADLINE or LLM_REQUEST_TIMEOUT
+    )
+
+
+# Shared by every LLMService (sync and async) in the process
+LLM_BREAKER = CircuitBreaker("llm", LLM_BREAKER_FAILURES, LLM_BREAKER_COOLDOWN, probe=_probe_llm)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Threads that run the OpenAI calls, so callers can stop waiting at the deadline"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=LLM_MAX_CONCURRENCY, thread_name_prefix="llm")
+    return _executor
+
+
+def _wait(future: Future, deadline: Optional[float]):
+    """Result of ``future`` within the request deadline; raises FutureTimeout past it"""
+    if deadline is None:
+        deadline = LLM_DEADLINE
+    return future.result(timeout=deadline if deadline > 0 else None)
+
+
+_batcher: Optional[MicroBatcher] = None
+_batcher_lock = threading.Lock()
+
+
+def get_batcher() -> Optional[MicroBatcher]:
+    """The process-wide LLM micro-batcher (None when LLM_BATCH_WINDOW_MS is 0)"""
+    global _batcher
+    if LLM_BATCH_WINDOW_MS <= 0 or LLM_BATCH_MAX_SIZE <= 1:
+        return None
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                shared_tokens = count_static(SYSTEM_PROMPT) + count_static(RESPONSE_STRUCTURE + BATCH_OUTPUT_FORMAT)
+                _batcher = MicroBatcher(_run_llm_batch, _get_executor(), LLM_BATCH_WINDOW_MS / 1000,
+                                        LLM_BATCH_MAX_SIZE, LLM_BATCH_MAX_TOKENS - shared_tokens,
+                                        name="llm-batcher")
+    return _batcher
+
+
+def _record_call(started: float, failed: bool = False) -> None:
+    """Breaker bookkeeping for batched calls: errors and calls past the deadline count as failures"""
+    if failed or (LLM_DEADLINE > 0 and time.perf_counter() - started > LLM_DEADLINE):
+        LLM_BREAKER.record_failure()
+    else:
+        LLM_BREAKER.record_success()
+
+
+def _run_llm_batch(batch: List[BatchItem]) -> None:
+    """Micro-batch handler: one completion for all tickets, split back per ticket.
+
+    Payloads are ``(service, user_query, context, language, prompt, max_tokens)``. A lone
+    ticket is sent with its normal prompt; tickets missing from a batched
+    reply are retried one by one with their own prompt.
+    """
+    LLM_BATCH_SIZE.observe(len(batch))
+    service = batch[0].payload[0]
+    started = time.perf_counter()
+    if len(batch) == 1:
+        _, _, _, language, prompt, max_tokens = batch[0].payload
+        try:
+            result = service._complete(prompt, language, max_tokens)
+        except Exception:
+            _record_call(started, failed=True)
+            raise
+        _record_call(started)
+        batch[0].future.set_result(result)
+        return
+    
+    tickets = {f"t{index}": item for index, item in enumerate(batch, 1)}
+    try:
+        replies, usage, generation_time = service._complete_batch(
+            [(ticket_id, *item.payload[1:4]) for ticket_id, item in tickets.items()],
+            sum(item.payload[5] + BATCH_TOKENS_PER_TICKET for item in batch)
+        )
+    except Exception:
+        _record_call(started, failed=True)
+        raise
+    _record_call(started)
+    
+    share = record_usage(usage, share=len(batch))
+    for ticket_id, item in tickets.items():
+        reply = replies.get(ticket_id)
+        if reply:
+            item.future.set_result({
+                "response": reply,
+                "confidence": 0.95,
+                "model_used": service.model,
+                **share,
+                "generation_time": generation_time,
+                "path": "llm_batch",
+                "batch_size": len(batch)
+            })
+        else:
+            _, _, _, language, prompt, max_tokens = item.payload
+            try:
+                item.future.set_result(service._complete(prompt, language, max_tokens))
+            except Exception as e:
+                item.future.set_exception(e)
+
+
+def _parse_batch_reply(text: str) -> Dict[str, str]:
+    """Ticket id -> response from a batched JSON reply, tolerating text around the object"""
+    try:
+        data = json.loads(text)
+    except ValueError:
+        start, end = text.find("{"), text.rfind("}")
+        try:
+            data = json.loads(text[start:end + 1]) if 0 <= start < end else {}
+        except ValueError:
+            data = {}
+    entries = data.get("responses") if isinstance(data, dict) else data
+    replies = {}
+    for entry in entries if isinstance(entries, list) else []:
+        if isinstance(entry, dict) and isinstance(entry.get("response"), str):
+            replies[str(entry.get("id"))] = entry["response"].strip()
+    return replies
+
 
 class LLMService:
     def __init__(self):
-        if not DEMO_MODE:
-            openai.api_key = OPENAI_API_KEY
         self.model = OPENAI_MODEL
         self.temperature = OPENAI_TEMPERATURE
     
@@ -21,44 +280,245 @@ class LLMService:
                          components: List[Dict], 
                          sentiment: str, 
                          urgency: str,
-                         language: str = "en") -> Dict:
+                         language: str = "en",
+                         deadline: Optional[float] = None) -> Dict:
         """
         Generate intelligent response using LLM
+        
+        Waits at most ``deadline`` seconds (default LLM_DEADLINE) for the
+        completion, then answers with the template response instead. The
+        result's ``path`` says which route produced it.
         """
+        # A proven reply to a closely matching resolved ticket needs no completion
+        retrieved = retrieved_response(user_query, language, urgency, components)
+        if retrieved is not None:
+            return retrieved
+        
         if DEMO_MODE:
-            return self._generate_demo_response(user_query, components, sentiment, urgency, language)
+            return self._fallback_response("demo_mode", user_query, components, sentiment, urgency, language)
         
+        batched = False
         try:
             # Prepare context for LLM
             context = self._prepare_context(components, sentiment, urgency, language)
             
-            # Create prompt for LLM
-            prompt = self._create_prompt(user_query, context, language)
+            # Serve duplicate prompts from the cache without calling the API
+            cache = get_response_cache()
+            cache_key = prompt_fingerprint(user_query, context, language, self.model, self.temperature)
+            if cache is not None:
+                cached = cache.get(cache_key)
+                if cached is not None:
+                    cached.update({"tokens_used": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                                   "generation_time": 0.0, "cached": True, "path": "cache"})
+                    return cached
+            
+            # Skip the upstream entirely while it is known to be failing
+            if not LLM_BREAKER.allow():
+                return self._fallback_response("circuit_open", user_query, components, sentiment, urgency, language)
+            
+            # Create prompt for LLM within the token budget
+            query, prompt, _, max_tokens = self._plan_request(user_query, components, context, urgency, language)
+            
+            # Call OpenAI API on the LLM threads and wait no longer than the deadline.
+            # With micro-batching on, concurrent prompts share one completion and
+            # the batch does the breaker bookkeeping once per upstream call.
+            batcher = get_batcher()
+            batched = batcher is not None
+            if batched:
+                cost = count_tokens(f"{query} {context}") + BATCH_TOKENS_PER_TICKET + max_tokens
+                future = batcher.submit((self, query, context, language, prompt, max_tokens), cost)
+            else:
+                future = _get_executor().submit(self._complete, prompt, language, max_tokens)
+            try:
+                result = _wait(future, deadline)
+            except FutureTimeout:
+                if not batched:
+                    LLM_BREAKER.record_failure()
+                if cache is not None:
+                    # A late answer still serves the next identical prompt
+                    future.add_done_callback(lambda done: self._cache_late_result(done, cache, cache_key))
+                return self._fallback_response("timeout", user_query, components, sentiment, urgency, language)
+            if not batched:
+                LLM_BREAKER.record_success()
             
-            # Call OpenAI API
-            response = openai.ChatCompletion.create(
+            if cache is not None:
+                cache.set(cache_key, result)
+            return result
+            
+        except Exception as e:
+            print(f"LLM Error: {e}")
+            LLM_ERRORS.inc()
+            if not batched:
+                LLM_BREAKER.record_failure()
+            return self._fallback_response("llm_error", user_query, components, sentiment, urgency, language)
+    
+    def _complete(self, prompt: str, language: str, max_tokens: int = MAX_RESPONSE_LENGTH) -> Dict:
+        """One blocking chat completion; runs on the LLM executor"""
+        started = time.perf_counter()
+        with LLM_IN_FLIGHT.track(), stage_timer("llm"):
+            response = _openai_client().ChatCompletion.create(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": self._get_system_prompt(language)},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=self.temperature,
-                max_tokens=500
+                max_tokens=max_tokens,
+                request_timeout=LLM_REQUEST_TIMEOUT
             )
-            
-            llm_response = response.choices[0].message.content.strip()
-            
-            return {
-                "response": llm_response,
-                "confidence": 0.95,
-                "model_used": self.model,
-                "tokens_used": response.usage.total_tokens,
-                "generation_time": 0.0  # Would be calculated in real implementation
-            }
-            
+        generation_time = time.perf_counter() - started
+        
+        return {
+            "response": response.choices[0].message.content.strip(),
+            "confidence": 0.95,
+            "model_used": self.model,
+            **record_usage(response.usage),
+            "generation_time": round(generation_time, 3),
+            "path": "llm"
+        }
+    
+    def _complete_batch(self, tickets: List[tuple], max_tokens: int) -> tuple:
+        """One completion answering several ``(id, user_query, context, language)`` tickets.
+        
+        Returns (replies by ticket id, OpenAI usage, generation time).
+        """
+        started = time.perf_counter()
+        with LLM_IN_FLIGHT.track(), stage_timer("llm_batch"):
+            response = _openai_client().ChatCompletion.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": self._get_system_prompt("en")},
+                    {"role": "user", "content": self._create_batch_prompt(tickets)}
+                ],
+                temperature=self.temperature,
+                max_tokens=max_tokens,
+                response_format={"type": "json_object"},
+                request_timeout=LLM_REQUEST_TIMEOUT
+            )
+        generation_time = round(time.perf_counter() - started, 3)
+        
+        return _parse_batch_reply(response.choices[0].message.content), response.usage, generation_time
+    
+    @staticmethod
+    def _cache_late_result(future: Future, cache, cache_key: str) -> None:
+        if future.cancelled() or future.exception() is not None:
+            return
+        cache.set(cache_key, future.result())
+    
+    def _fallback_response(self, reason: str, user_query: str, components: List[Dict],
+                           sentiment: str, urgency: str, language: str) -> Dict:
+        """Template response served instead of the LLM, tagged with the reason"""
+        DEMO_RESPONSES.inc(reason=reason)
+        result = self._generate_demo_response(user_query, components, sentiment, urgency, language)
+        result["path"] = reason
+        return result
+    
+    def stream_response(self,
+                        user_query: str,
+                        components: List[Dict],
+                        sentiment: str,
+                        urgency: str,
+                        language: str = "en",
+                        deadline: Optional[float] = None) -> Iterator[Dict]:
+        """
+        Stream the response as {"delta": text} events followed by one {"result": dict}
+        
+        The deadline bounds the wait for the first token; once tokens flow the
+        completion is streamed to the end.
+        """
+        retrieved = retrieved_response(user_query, language, urgency, components)
+        if retrieved is not None:
+            yield from self._stream_text(retrieved)
+            return
+        
+        if DEMO_MODE:
+            yield from self._stream_text(self._fallback_response("demo_mode", user_query, components, sentiment, urgency, language))
+            return
+        
+        context = self._prepare_context(components, sentiment, urgency, language)
+        cache = get_response_cache()
+        cache_key = prompt_fingerprint(user_query, context, language, self.model, self.temperature)
+        if cache is not None:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                cached.update({"tokens_used": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                               "generation_time": 0.0, "cached": True, "path": "cache"})
+                yield from self._stream_text(cached)
+                return
+        
+        if not LLM_BREAKER.allow():
+            yield from self._stream_text(self._fallback_response("circuit_open", user_query, components, sentiment, urgency, language))
+            return
+        
+        parts = []
+        complete = False
+        started = time.perf_counter()
+        LLM_IN_FLIGHT.inc()
+        try:
+            _, prompt, prompt_tokens, max_tokens = self._plan_request(user_query, components, context, urgency, language)
+            opened = _get_executor().submit(self._open_stream, prompt, language, max_tokens)
+            try:
+                stream = _wait(opened, deadline)
+            except FutureTimeout:
+                LLM_BREAKER.record_failure()
+                yield from self._stream_text(self._fallback_response("timeout", user_query, components, sentiment, urgency, language))
+                return
+            for chunk in stream:
+                delta = chunk.choices[0].delta.get("content")
+                if delta:
+                    if not parts:
+                        delta = delta.lstrip()
+                    parts.append(delta)
+                    yield {"delta": delta}
+            complete = True
+            LLM_BREAKER.record_success()
         except Exception as e:
             print(f"LLM Error: {e}")
-            return self._generate_demo_response(user_query, components, sentiment, urgency, language)
+            LLM_ERRORS.inc()
+            LLM_BREAKER.record_failure()
+            if not parts:
+                yield from self._stream_text(self._fallback_response("llm_error", user_query, components, sentiment, urgency, language))
+                return
+        finally:
+            LLM_IN_FLIGHT.dec()
+            generation_time = time.perf_counter() - started
+            STAGE_LATENCY.observe(generation_time, stage="llm_stream")
+        
+        response = "".join(parts).strip()
+        result = {
+            "response": response,
+            "confidence": 0.95,
+            "model_used": self.model,
+            # Streamed completions report no usage; count it here
+            **estimated_usage(prompt_tokens, response),
+            "generation_time": round(generation_time, 3),
+            "path": "llm"
+        }
+        if cache is not None and complete:
+            cache.set(cache_key, result)
+        yield {"result": result}
+    
+    def _open_stream(self, prompt: str, language: str, max_tokens: int = MAX_RESPONSE_LENGTH) -> Iterator:
+        """Start a streamed completion and wait for its first chunk"""
+        stream = iter(_openai_client().ChatCompletion.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": self._get_system_prompt(language)},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=self.temperature,
+            max_tokens=max_tokens,
+            stream=True,
+            request_timeout=LLM_REQUEST_TIMEOUT
+        ))
+        first = next(stream, None)
+        return stream if first is None else itertools.chain((first,), stream)
+    
+    def _stream_text(self, result: Dict) -> Iterator[Dict]:
+        """Replay a finished response word by word"""
+        for piece in re.findall(r"\S+\s*", result["response"]):
+            yield {"delta": piece}
+        yield {"result": result}
     
     def _prepare_context(self, components: List[Dict], sentiment: str, urgency: str, language: str) -> str:
         """Prepare context information for LLM"""
@@ -79,6 +539,20 @@ class LLMService:
         
         return " | ".join(context_parts)
     
+    def _plan_request(self, user_query: str, components: List[Dict], context: str,
+                      urgency: str, language: str) -> Tuple[str, str, int, int]:
+        """Fit the ticket into the prompt budget: (query sent, prompt, prompt tokens, max_tokens)
+        
+        Long queries are cut down to the sentences around the SECRM evidence;
+        the completion budget follows urgency and the number of components.
+        """
+        evidence = [term for comp in components for term in comp.get('evidence', ())]
+        query, _ = condense_query(user_query, evidence)
+        prompt = self._create_prompt(query, context, language)
+        prompt_tokens = count_static(self._get_system_prompt(language)) + count_tokens(prompt)
+        LLM_PROMPT_TOKENS.observe(prompt_tokens)
+        return query, prompt, prompt_tokens, response_budget(urgency, len(components))
+    
     def _create_prompt(self, user_query: str, context: str, language: str) -> str:
         """Create prompt for LLM"""
         language_instruction = ""
@@ -92,36 +566,38 @@ Technical Context: {context}
 
 Please provide a comprehensive, step-by-step customer service response that follows this structure:
 
-1. **Opening**: Start with "Thank you for contacting us about this issue. I'm here to help you resolve this problem with your device. Let me provide you with some specific guidance based on the information you've shared."
+{RESPONSE_STRUCTURE}{language_instruction}
 
-2. **Urgency Assessment**: If urgent, add "Given the urgency of this issue, I recommend we address this immediately."
+Make the response detailed, helpful, and easy to follow for non-technical users.
+"""
+    
+    def _create_batch_prompt(self, tickets: List[tuple]) -> str:
+        """One prompt for several tickets; the shared instructions are sent once"""
+        blocks = []
+        for ticket_id, user_query, context, language in tickets:
+            block = f'Ticket "{ticket_id}":\nCustomer Query: "{user_query}"\nTechnical Context: {context}'
+            if language != "en":
+                block += f"\nRespond to this ticket in {self._get_language_name(language)}."
+            blocks.append(block)
+        tickets_text = "\n\n".join(blocks)
+        
+        return f"""
+Answer each of the following {len(tickets)} customer tickets separately.
 
-3. **Systematic Approach**: Include "Let's work through some systematic troubleshooting steps to identify and resolve this issue."
+{tickets_text}
 
-4. **Step-by-Step Instructions**: Provide 2-3 specific, actionable steps with:
-   - Clear instructions (e.g., "First, please perform a soft reset by holding down the power button for 10-15 seconds")
-   - Explanation of what each step does
-   - What to expect after each step
+For every ticket, write a comprehensive, step-by-step customer service response that follows this structure:
 
-5. **Professional Tone**: Maintain empathy while being technically accurate
-6. **Next Steps**: Guide them on what to do if the issue persists{language_instruction}
+{RESPONSE_STRUCTURE}
 
-Make the response detailed, helpful, and easy to follow for non-technical users.
+Make each response detailed, helpful, and easy to follow for non-technical users.
+
+{BATCH_OUTPUT_FORMAT}
 """
     
     def _get_system_prompt(self, language: str) -> str:
         """Get system prompt for LLM"""
-        base_prompt = """You are an expert electronics customer service representative with deep technical knowledge. 
-You specialize in diagnosing and resolving issues with consumer electronics, smartphones, laptops, gaming hardware, and smart home devices.
-
-Your responses should be:
-- Technically accurate and specific
-- Empathetic and understanding
-- Actionable with clear next steps
-- Professional yet approachable
-- Focused on customer satisfaction
-
-Always prioritize customer safety and provide appropriate warnings for potentially dangerous situations."""
+        base_prompt = SYSTEM_PROMPT
         
         if language != "en":
             base_prompt += f"\n\nRespond in {self._get_language_name(language)}."
@@ -144,22 +620,11 @@ Always prioritize customer safety and provide appropriate warnings for potential
         
         # Get primary component
         primary_component = components[0].get('component', 'general') if components else 'general'
+        if primary_component not in TROUBLESHOOTING_STEPS:
+            primary_component = None
         
-        # Start with standard opening
-        response = "Thank you for contacting us about this issue. I'm here to help you resolve this problem with your device. Let me provide you with some specific guidance based on the information you've shared."
-        
-        # Add urgency-specific content
-        if urgency == "high":
-            response += " Given the urgency of this issue, I recommend we address this immediately."
-        elif urgency == "critical":
-            response += " This appears to be a critical issue that requires immediate attention for your safety and device protection."
-        
-        # Add systematic approach
-        response += " Let's work through some systematic troubleshooting steps to identify and resolve this issue."
-        
-        # Add component-specific detailed steps
-        detailed_steps = self._get_detailed_troubleshooting_steps(primary_component)
-        response += f" {detailed_steps}"
+        # Opening, urgency note, approach and component-specific steps, precompiled
+        response = DEMO_RESPONSE_TEXTS[(urgency if urgency in DEMO_URGENCY_NOTES else "", primary_component)]
         
         return {
             "response": response,
@@ -171,69 +636,24 @@ Always prioritize customer safety and provide appropriate warnings for potential
     
     def _get_detailed_troubleshooting_steps(self, component: str) -> str:
         """Get detailed step-by-step troubleshooting instructions"""
-        steps = {
-            "battery": """First, please perform a soft reset by holding down the power button for 10-15 seconds until the device restarts. This clears temporary system glitches without affecting your data. Next, check your battery usage in the settings menu to identify any apps consuming excessive power. Finally, ensure you're using the original charger and cable, as third-party accessories can cause charging issues. If the problem persists after these steps, we may need to run a battery diagnostic test.""",
-            
-            "overheating": """First, immediately turn off your device and let it cool down for at least 15 minutes in a well-ventilated area. Once cooled, restart the device and check for any pending software updates in the settings menu, as outdated firmware can cause thermal issues. Next, close all unnecessary applications and avoid using the device while charging. If overheating continues, please contact our technical support team immediately as this could indicate a hardware issue that needs professional attention.""",
-            
-            "performance": """First, please perform a soft reset by holding down the power button for 10-15 seconds until the device restarts. This clears temporary system glitches and frees up memory. Next, go to your device settings and clear the cache for recently used applications. Finally, check for any pending software updates in the settings menu, as outdated firmware can often cause performance problems. If the device is still running slowly after these steps, we can run deeper diagnostics to identify the specific cause.""",
-            
-            "display": """First, please perform a soft reset by holding down the power button for 10-15 seconds until the device restarts. This can resolve temporary display glitches. Next, check your display settings and adjust the brightness and resolution to see if that improves the issue. Finally, test the display by opening different applications to see if the problem is consistent across all screens. If you notice dead pixels or persistent display issues, we may need to arrange for a professional service appointment.""",
-            
-            "network": """First, please restart your device and your router by unplugging the router for 30 seconds, then plugging it back in. Next, check your network settings and ensure you're connected to the correct Wi-Fi network. Try forgetting the network and reconnecting with the correct password. Finally, check for any pending software updates in the settings menu, as outdated network drivers can cause connectivity issues. If the problem persists, we may need to update your device's network drivers.""",
-            
-            "audio": """First, please perform a soft reset by holding down the power button for 10-15 seconds until the device restarts. This can resolve temporary audio glitches. Next, check your audio settings and ensure the volume is turned up and not muted. Try using different audio outputs (speakers, headphones) to isolate the issue. Finally, check for any pending software updates in the settings menu, as outdated audio drivers can cause sound problems. If the issue continues, we may need to run audio diagnostics to identify the specific cause."""
-        }
-        return steps.get(component, """First, please perform a soft reset by holding down the power button for 10-15 seconds until the device restarts. This clears temporary system glitches without affecting your data. Next, check for any pending software updates in the settings menu, as outdated firmware can often cause various issues. Finally, if the problem persists, please contact our technical support team for further assistance.""")
+        return TROUBLESHOOTING_STEPS.get(component, DEFAULT_TROUBLESHOOTING_STEPS)
     
     def _get_component_suggestions(self, component: str) -> str:
         """Get component-specific suggestions"""
-        suggestions = {
-            "battery": "I recommend checking your charging habits, running a battery diagnostic, and ensuring your device's software is up to date. These steps often resolve battery-related issues.",
-            "overheating": "Please ensure your device has proper ventilation, close unnecessary applications, and avoid using it while charging. If the issue persists, we may need to check for hardware problems.",
-            "performance": "Try restarting your device, clearing cache, and checking for software updates. If performance issues continue, we can run deeper diagnostics to identify the specific cause.",
-            "display": "Let's check your display settings, test for dead pixels, and verify the connection. Display issues can often be resolved with simple adjustments or may require professional service.",
-            "network": "Network connectivity issues can usually be resolved by checking your connection settings, restarting your router, or updating your device's network drivers.",
-            "audio": "Audio problems often stem from software settings, driver issues, or hardware connections. Let's systematically test each component to identify the root cause."
-        }
-        return suggestions.get(component, "Let's work through some systematic troubleshooting steps to identify and resolve this issue.")
+        return COMPONENT_SUGGESTIONS.get(component, DEFAULT_COMPONENT_SUGGESTION)
     
     def generate_suggestions(self, components: List[Dict], sentiment: str) -> List[str]:
         """Generate intelligent suggestions based on analysis"""
         suggestions = []
         
         for component in components:
-            comp_name = component.get('component', '')
-            severity = component.get('severity', 'medium')
-            
-            if comp_name == 'battery':
-                if severity == 'high':
-                    suggestions.append("🔋 Schedule immediate battery replacement - high degradation detected")
-                else:
-                    suggestions.append("🔋 Optimize charging habits and run battery calibration")
-            
-            elif comp_name == 'overheating':
-                if severity == 'critical':
-                    suggestions.append("🌡️ URGENT: Stop using device immediately - thermal protection needed")
-                else:
-                    suggestions.append("🌡️ Improve ventilation and reduce processor load")
-            
-            elif comp_name == 'performance':
-                suggestions.append("⚡ Clear cache, update software, and optimize system settings")
-            
-            elif comp_name == 'display':
-                suggestions.append("📱 Test display components and check for hardware issues")
-            
-            elif comp_name == 'network':
-                suggestions.append("📶 Troubleshoot connectivity and update network drivers")
-            
-            elif comp_name == 'audio':
-                suggestions.append("🔊 Test audio components and update sound drivers")
+            rule = SUGGESTION_RULES.get(component.get('component', ''))
+            if rule is not None:
+                escalate_on, escalated, default = rule
+                suggestions.append(escalated if component.get('severity', 'medium') == escalate_on else default)
         
         # Add sentiment-based suggestions
-        if sentiment == 'negative':
-            suggestions.append("💬 Prioritize this customer for immediate follow-up")
-        elif sentiment == 'positive':
-            suggestions.append("⭐ Excellent opportunity for positive review and referral")
+        if sentiment in SENTIMENT_SUGGESTIONS:
+            suggestions.append(SENTIMENT_SUGGESTIONS[sentiment])
         
         return suggestions[:5]  # Limit to 5 suggestions
@@ -0,0 +1,72 @@
+"""
+Keyword matcher for SECRM
+Aho-Corasick automaton that finds every configured trigger in a single pass
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from typing import Dict, FrozenSet, Iterable, List
+
+
+class KeywordMatcher:
+    """Compiled multi-pattern substring matcher.
+
+    The automaton is built once from a set of lowercase patterns and answers
+    "which patterns occur anywhere in this text" with one linear scan, which
+    is exactly the semantics of running ``pattern in text`` for each pattern.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns: List[str] = sorted({p for p in patterns if p})
+        self._transitions: List[Dict[str, int]] = [{}]
+        self._outputs: List[FrozenSet[str]] = [frozenset()]
+        self._build()
+
+    def _build(self) -> None:
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[set] = [set()]
+
+        # Trie of all patterns
+        for pattern in self.patterns:
+            state = 0
+            for ch in pattern:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    outputs.append(set())
+                state = nxt
+            outputs[state].add(pattern)
+
+        # Breadth-first failure links, folded into a full transition table so
+        # scanning never has to walk failure chains
+        fail = [0] * len(goto)
+        transitions: List[Dict[str, int]] = [dict(goto[0])]
+        transitions.extend({} for _ in range(len(goto) - 1))
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            outputs[state] |= outputs[fail[state]]
+            table = dict(transitions[fail[state]])
+            for ch, nxt in goto[state].items():
+                fail[nxt] = transitions[fail[state]].get(ch, 0)
+                table[ch] = nxt
+                queue.append(nxt)
+            transitions[state] = table
+
+        self._transitions = transitions
+        self._outputs = [frozenset(out) for out in outputs]
+
+    def find(self, lowered: str) -> FrozenSet[str]:
+        """Return the set of patterns occurring in already-lowercased text"""
+        transitions = self._transitions
+        outputs = self._outputs
+        found: set = set()
+        state = 0
+        for ch in lowered:
+            state = transitions[state].get(ch, 0)
+            if outputs[state]:
+                found |= outputs[state]
+        return frozenset(found)
@@ -0,0 +1,226 @@
+"""
+Metrics for SECRM-EIGA
+Lightweight counters, gauges and latency histograms rendered in the
+Prometheus text exposition format
+"""
+
+from __future__ import annotations
+
+import bisect
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        # Unlabelled series are exported as 0 before their first update
+        self._values: Dict[LabelValues, float] = {} if self.labelnames else {(): 0}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    @contextmanager
+    def track(self, **labels: str) -> Iterator[None]:
+        """Count the enclosed block as in flight"""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [bucket counts..., +Inf count], sum
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        self.observe_key(self._key(labels), value)
+
+    def observe_key(self, key: LabelValues, value: float) -> None:
+        """Observe with label values already resolved, for hot paths"""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    def count(self, **labels: str) -> int:
+        entry = self._values.get(self._key(labels))
+        return sum(entry[0]) if entry else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(counts), total[0]) for key, (counts, total) in self._values.items()]
+        lines = self.header()
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], List[str]]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], List[str]]) -> None:
+        """Add a callable that returns already-formatted exposition lines"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_LATENCY = REGISTRY.register(Histogram(
+    "secrm_eiga_stage_duration_seconds", "Time spent in each pipeline stage", ("stage",)))
+REQUEST_LATENCY = REGISTRY.register(Histogram(
+    "secrm_eiga_request_duration_seconds", "HTTP request latency", ("endpoint",)))
+REQUESTS = REGISTRY.register(Counter(
+    "secrm_eiga_requests_total", "HTTP requests handled", ("endpoint", "status")))
+IN_FLIGHT = REGISTRY.register(Gauge(
+    "secrm_eiga_requests_in_flight", "HTTP requests currently being handled", ("endpoint",)))
+LLM_IN_FLIGHT = REGISTRY.register(Gauge(
+    "secrm_eiga_llm_calls_in_flight", "OpenAI calls currently waiting for a response"))
+LLM_ERRORS = REGISTRY.register(Counter(
+    "secrm_eiga_llm_errors_total", "OpenAI calls that raised an error"))
+DEMO_RESPONSES = REGISTRY.register(Counter(
+    "secrm_eiga_demo_responses_total", "Template responses served instead of the LLM", ("reason",)))
+TOKENS = REGISTRY.register(Counter(
+    "secrm_eiga_llm_tokens_total", "Tokens reported by OpenAI", ("kind",)))
+LLM_PROMPT_TOKENS = REGISTRY.register(Histogram(
+    "secrm_eiga_llm_prompt_tokens", "Counted prompt tokens per OpenAI request",
+    buckets=(64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)))
+LLM_QUERIES_CONDENSED = REGISTRY.register(Counter(
+    "secrm_eiga_llm_queries_condensed_total", "Customer queries cut down to fit LLM_QUERY_MAX_TOKENS"))
+LLM_BATCH_SIZE = REGISTRY.register(Histogram(
+    "secrm_eiga_llm_batch_size", "Tickets per micro-batched OpenAI call", buckets=(1, 2, 4, 8, 16, 32, 64)))
+ADMISSION_REJECTED = REGISTRY.register(Counter(
+    "secrm_eiga_admission_rejected_total", "Requests turned away by admission control", ("lane", "reason")))
+RETRIEVALS = REGISTRY.register(Counter(
+    "secrm_eiga_retrievals_total", "Resolved-ticket lookups made before calling the LLM", ("result",)))
+NEAR_DUPLICATES_REUSED = REGISTRY.register(Counter(
+    "secrm_eiga_near_duplicates_reused_total", "Tickets answered from a near-duplicate cluster"))
+LLM_CIRCUIT_OPEN = REGISTRY.register(Gauge(
+    "secrm_eiga_circuit_open", "1 while the circuit breaker for a dependency is open", ("dependency",)))
+
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    """Record the duration of the enclosed block under ``stage``"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.observe_key((stage,), time.perf_counter() - started)
+
+
+def timed(stage: str) -> Callable:
+    """Decorator form of ``stage_timer``"""
+    def decorator(func: Callable) -> Callable:
+        key = (stage,)
+        clock = time.perf_counter
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                STAGE_LATENCY.observe_key(key, clock() - started)
+        return wrapper
+    return decorator
+
+
+def render_latest() -> str:
+    return REGISTRY.render()
@@ -0,0 +1,119 @@
+"""
+Process-pool execution for the SECRM-EIGA pipeline
+Spreads CPU-bound batch work across cores with chunked dispatch
+"""
+
+from __future__ import annotations
+
+import atexit
+import os
+import threading
+from collections import deque
+from typing import TYPE_CHECKING, Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from config import PIPELINE_CHUNK_SIZE, PIPELINE_WORKERS
+from .pipeline import run_pipeline_batch, warm_up
+
+if TYPE_CHECKING:
+    # multiprocessing is only loaded once a pool is actually started
+    from concurrent.futures import Future, ProcessPoolExecutor
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def resolve_workers(workers: Optional[int] = None) -> int:
+    """Turn a configured worker count into a concrete one (0 means all cores)"""
+    if workers is None:
+        workers = PIPELINE_WORKERS
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return workers
+
+
+def _warm_worker() -> None:
+    """Pool initializer: build the compiled keyword tables once per worker"""
+    from . import taxonomy
+
+    warm_up()
+    # Each worker follows taxonomy file changes on its own
+    taxonomy.start_watcher()
+
+
+def get_pool(workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """Return the shared process pool, creating it on first use"""
+    global _pool, _pool_workers
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = resolve_workers(workers)
+    with _pool_lock:
+        if _pool is not None and _pool_workers != workers:
+            _pool.shutdown(wait=True)
+            _pool = None
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers, initializer=_warm_worker)
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown_pool() -> None:
+    """Stop the shared pool if one is running"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+            _pool = None
+
+
+atexit.register(shutdown_pool)
+
+
+def _chunks(texts: List[str], size: int) -> List[List[str]]:
+    return [texts[i:i + size] for i in range(0, len(texts), size)]
+
+
+def run_pipeline_parallel(texts: List[str], workers: Optional[int] = None,
+                          chunk_size: int = PIPELINE_CHUNK_SIZE) -> List[Dict[str, object]]:
+    """Run the pipeline over ``texts`` using the process pool.
+
+    Texts are sent to workers in chunks of ``chunk_size`` so each IPC round
+    trip carries a whole batch. Small inputs or a single worker run in-process.
+    """
+    workers = resolve_workers(workers)
+    if workers <= 1 or len(texts) <= chunk_size:
+        return run_pipeline_batch(texts)
+
+    results: List[Dict[str, object]] = []
+    for chunk_result in get_pool(workers).map(run_pipeline_batch, _chunks(texts, chunk_size)):
+        results.extend(chunk_result)
+    return results
+
+
+def imap_batches(batches: Iterable[Tuple[Any, List[str]]], workers: Optional[int] = None,
+                 max_pending: Optional[int] = None,
+                 fn: Callable[[List[str]], List[Any]] = run_pipeline_batch) -> Iterator[Tuple[Any, List[Any]]]:
+    """Run ``(key, texts)`` batches through the pool, yielding ``(key, fn(texts))`` in order.
+
+    At most ``max_pending`` batches (default two per worker) are in flight,
+    so a streaming caller keeps bounded memory however long the input is.
+    Keys stay in this process; only the texts are shipped to workers.
+    """
+    workers = resolve_workers(workers)
+    if workers <= 1:
+        for key, texts in batches:
+            yield key, fn(texts)
+        return
+
+    pool = get_pool(workers)
+    max_pending = max_pending or workers * 2
+    pending: Deque[Tuple[Any, Future]] = deque()
+    for key, texts in batches:
+        pending.append((key, pool.submit(fn, texts)))
+        if len(pending) >= max_pending:
+            done_key, future = pending.popleft()
+            yield done_key, future.result()
+    while pending:
+        done_key, future = pending.popleft()
+        yield done_key, future.result()
@@ -0,0 +1,116 @@
+"""
+SECRM -> EIGA pipeline helpers
+Shared by the Flask endpoints and batch callers
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List
+
+from . import dedup
+from .secrm import run_secrm, run_secrm_batch
+from .eiga import run_eiga, run_eiga_batch
+from .llm_service import LLMService
+from .serialization import dumps
+
+
+# One ticket per language table, so the first real request finds every path warm
+WARM_UP_TEXTS = [
+    "My phone battery drains fast and the screen flickers",
+    "La batería de mi portátil se calienta mucho",
+    "Mon écran ne s'allume plus"
+]
+
+# EIGA fields that restate SECRM output; left out of the compact shape
+COMPACT_DROPPED_FIELDS = ("sentiment_breakdown", "urgency_level", "component_count")
+
+
+def build_pipeline_result(secrm_data: Dict, eiga_result: Dict) -> Dict[str, object]:
+    """Combine SECRM and EIGA output into the /api/pipeline response shape"""
+    return {
+        "secrm_analysis": secrm_data,
+        "eiga_analysis": eiga_result,
+        "components": secrm_data.get("components", []),
+        **eiga_result
+    }
+
+
+def compact_pipeline_result(result: Dict[str, object]) -> Dict[str, object]:
+    """Opt-in response shape with each piece of data exactly once"""
+    eiga_result = result["eiga_analysis"]
+    return {
+        "secrm_analysis": result["secrm_analysis"],
+        **{key: value for key, value in eiga_result.items() if key not in COMPACT_DROPPED_FIELDS}
+    }
+
+
+def encode_pipeline_result(result: Dict[str, object]) -> str:
+    """JSON for a ``build_pipeline_result`` dict, encoding the EIGA block once.
+
+    The full shape carries the EIGA output twice (nested and spread at the top
+    level), so its encoded form is spliced into both places instead of being
+    serialized twice. The output matches ``dumps(result)`` byte for byte.
+    """
+    eiga = dumps(result["eiga_analysis"])
+    head = ('{"secrm_analysis":' + dumps(result["secrm_analysis"])
+            + ',"eiga_analysis":' + eiga
+            + ',"components":' + dumps(result["components"]))
+    return head + ("}" if eiga == "{}" else "," + eiga[1:])
+
+
+def warm_up() -> None:
+    """Build the compiled taxonomy tables and pay the first-call costs (NumPy,
+    the tokenizer) up front; never calls the LLM"""
+    from . import taxonomy
+    from .tokens import count_tokens
+
+    taxonomy.current()
+    run_secrm_batch(WARM_UP_TEXTS)
+    count_tokens(WARM_UP_TEXTS[0])
+
+
+def run_pipeline(text: str) -> Dict[str, object]:
+    """Run the full pipeline for one text, reusing a near-duplicate's response when enabled"""
+    secrm_data = run_secrm(text)
+    lookup = dedup.check(text, secrm_data)
+    if lookup is not None and lookup.reused is not None:
+        return build_pipeline_result(secrm_data, lookup.reused)
+    eiga_result = run_eiga(secrm_data=secrm_data, original_text=text)
+    dedup.remember(lookup, eiga_result)
+    return build_pipeline_result(secrm_data, eiga_result)
+
+
+def run_pipeline_batch(texts: List[str]) -> List[Dict[str, object]]:
+    """Run the full pipeline for many texts at once, reusing near-duplicate responses when enabled.
+
+    Tickets are looked up one at a time after the batched SECRM pass, so a
+    reworded ticket later in the batch reuses the response generated for an
+    earlier one.
+    """
+    secrm_results = run_secrm_batch(texts)
+    if dedup.get_index() is None:
+        eiga_results = run_eiga_batch(secrm_results, texts)
+    else:
+        llm_service = LLMService()
+        eiga_results = []
+        for secrm_data, text in zip(secrm_results, texts):
+            lookup = dedup.check(text, secrm_data)
+            if lookup.reused is not None:
+                eiga_results.append(lookup.reused)
+                continue
+            eiga_result = run_eiga(secrm_data=secrm_data, original_text=text, llm_service=llm_service)
+            dedup.remember(lookup, eiga_result)
+            eiga_results.append(eiga_result)
+    return [
+        build_pipeline_result(secrm_data, eiga_result)
+        for secrm_data, eiga_result in zip(secrm_results, eiga_results)
+    ]
+
+
+def run_pipeline_batch_json(texts: List[str]) -> List[str]:
+    """Run the pipeline for many texts and return each result JSON-encoded.
+
+    Used by the process pool so encoding happens in the workers and only
+    compact strings cross the process boundary.
+    """
+    return [encode_pipeline_result(result) for result in run_pipeline_batch(texts)]
@@ -0,0 +1,102 @@
+"""
+Circuit breaker for the LLM dependency
+Opens after repeated failed or timed-out calls so requests go straight to the
+template response, and probes the upstream in the background until it
+recovers instead of letting user requests find out the hard way.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from .metrics import LLM_CIRCUIT_OPEN
+
+
+CLOSED = "closed"
+OPEN = "open"
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with a background recovery probe.
+
+    ``probe`` is called from a daemon thread every ``cooldown`` seconds while
+    the breaker is open; it should make the cheapest possible upstream call
+    and raise (or return False) on failure. The first successful probe
+    closes the breaker.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, cooldown: float,
+                 probe: Optional[Callable[[], object]] = None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.probe = probe
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.trips = 0
+        self.probes = 0
+        self._lock = threading.Lock()
+        self._prober: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.failure_threshold > 0
+
+    def allow(self) -> bool:
+        """Whether a request may call the upstream right now"""
+        return self.state == CLOSED or not self.enabled
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.consecutive_failures = 0
+
+    def record_failure(self) -> None:
+        """Count a failed or timed-out call; trips the breaker at the threshold"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == OPEN or self.consecutive_failures < self.failure_threshold:
+                return
+            self.state = OPEN
+            self.opened_at = time.time()
+            self.trips += 1
+            LLM_CIRCUIT_OPEN.set(1, dependency=self.name)
+            print(f"{self.name} circuit opened after {self.consecutive_failures} consecutive failures")
+            if self.probe is not None and (self._prober is None or not self._prober.is_alive()):
+                self._prober = threading.Thread(target=self._probe_until_closed,
+                                                name=f"{self.name}-probe", daemon=True)
+                self._prober.start()
+
+    def close(self) -> None:
+        with self._lock:
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self.opened_at = None
+            LLM_CIRCUIT_OPEN.set(0, dependency=self.name)
+
+    def _probe_until_closed(self) -> None:
+        while self.state == OPEN:
+            time.sleep(self.cooldown)
+            self.probes += 1
+            try:
+                healthy = self.probe() is not False
+            except Exception as e:
+                print(f"{self.name} probe failed: {e}")
+                healthy = False
+            if healthy:
+                print(f"{self.name} circuit closed after a successful probe")
+                self.close()
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "failure_threshold": self.failure_threshold,
+            "opened_at": self.opened_at,
+            "trips": self.trips,
+            "probes": self.probes
+        }
@@ -0,0 +1,374 @@
+"""
+Resolved-ticket retrieval for SECRM-EIGA
+Past tickets and the agent replies that resolved them, stored as hashed
+term vectors in a memory-mapped matrix. EIGA serves the reply of the
+closest resolved ticket when it is similar enough and SECRM found the same
+urgency and components in both, and only calls the LLM otherwise. Adds
+append to the matrix in place; nothing is rebuilt.
+
+    python -m services.retrieval add resolved.ndjson     # {"text": ..., "reply": ...} per line
+    python -m services.retrieval search "my battery drains overnight"
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from config import RETRIEVAL_DIMENSIONS, RETRIEVAL_PATH, RETRIEVAL_THRESHOLD
+from .cache import normalize_query
+from .metrics import RETRIEVALS
+from .secrm import issue_profile, run_secrm_batch
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+META_FILE = "meta.json"
+VECTORS_FILE = "vectors.f32"
+RECORDS_FILE = "records.ndjson"
+LOCK_FILE = ".lock"
+# The vector file grows by at least this many rows at a time
+MIN_GROWTH = 1024
+
+
+def profile_key(profile: Tuple[str, Tuple[str, ...]]) -> str:
+    """``issue_profile`` as one comparable string, e.g. ``urgent|battery,overheating``"""
+    urgency, labels = profile
+    return f"{urgency}|{','.join(labels)}"
+
+
+def _record_profile(record: Dict) -> str:
+    # Records written before profiles were stored are analysed when first read
+    if "urgency" not in record:
+        secrm_data = run_secrm_batch([record["text"]])[0]
+        return profile_key(issue_profile(secrm_data["urgency"], secrm_data["components"]))
+    return profile_key((record["urgency"], tuple(sorted(record.get("components", [])))))
+
+
+def _terms(text: str) -> List[str]:
+    """Words and word bigrams; character bigrams for scripts written without spaces"""
+    words = normalize_query(text).split()
+    terms = words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+    for word in words:
+        if not word.isascii() and len(word) > 1:
+            terms += [word[i:i + 2] for i in range(len(word) - 1)]
+    return terms
+
+
+def embed(text: str, dimensions: int = RETRIEVAL_DIMENSIONS) -> np.ndarray:
+    """Unit-length signed feature-hashing vector of ``text``'s terms.
+
+    Hashed counts rather than TF-IDF: a vector never depends on the rest of
+    the index, so adding tickets never invalidates the stored ones.
+    """
+    import numpy as np
+
+    vector = np.zeros(dimensions, dtype=np.float32)
+    hashes = np.array([zlib.crc32(term.encode("utf-8")) for term in _terms(text)], dtype=np.int64)
+    if len(hashes):
+        signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+        np.add.at(vector, (hashes & 0x7FFFFFFF) % dimensions, signs)
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+    return vector
+
+
+@contextmanager
+def _file_lock(path: str) -> Iterator[None]:
+    """Exclusive lock across processes where fcntl exists (one writer at a time)"""
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+    with open(path, "a") as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+class _View(NamedTuple):
+    """One consistent state of the index: readers never see a half-finished add"""
+    stamp: tuple
+    count: int
+    end: int
+    vectors: Optional[np.ndarray]
+    offsets: List[int]
+    languages: np.ndarray
+    profiles: np.ndarray
+
+
+class ResolvedIndex:
+    """Append-only index of resolved tickets in ``path``.
+
+    ``vectors.f32`` holds ``capacity`` rows of float32, of which the first
+    ``count`` (from ``meta.json``) are live; ``records.ndjson`` holds the
+    ticket text and reply, one line per row. Other processes pick up adds
+    the next time they search.
+    """
+
+    def __init__(self, path: str, dimensions: int = RETRIEVAL_DIMENSIONS):
+        self.path = path
+        self.dimensions = dimensions
+        self.capacity = 0
+        self._lock = threading.Lock()
+        self._view = self._empty_view()
+        self.searches = 0
+        self.hits = 0
+        self._refresh()
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _empty_view(self) -> _View:
+        import numpy as np
+
+        return _View((), 0, 0, None, [], np.array([], dtype=object), np.array([], dtype=object))
+
+    def _read_meta(self) -> Optional[Dict]:
+        try:
+            with open(self._file(META_FILE), encoding="utf-8") as handle:
+                return json.load(handle)
+        except FileNotFoundError:
+            return None
+
+    def _refresh(self) -> _View:
+        """Re-read ``meta.json`` if another writer changed it; only new records are scanned"""
+        import numpy as np
+
+        try:
+            info = os.stat(self._file(META_FILE))
+        except FileNotFoundError:
+            return self._view
+        # meta.json is replaced, never rewritten, so a new inode marks a new version
+        # even when two adds land within one timestamp tick
+        stamp = (info.st_ino, info.st_mtime_ns)
+        view = self._view
+        if stamp == view.stamp:
+            return view
+        with self._lock:
+            view = self._view
+            meta = self._read_meta()
+            if meta is None or stamp == view.stamp:
+                return view
+            self.dimensions = int(meta["dimensions"])
+            count = int(meta["count"])
+            vectors = view.vectors
+            if vectors is None or int(meta["capacity"]) != self.capacity:
+                self.capacity = int(meta["capacity"])
+                vectors = np.memmap(self._file(VECTORS_FILE), dtype=np.float32, mode="r",
+                                    shape=(self.capacity, self.dimensions))
+            offsets = list(view.offsets)
+            languages = list(view.languages)
+            profiles = list(view.profiles)
+            with open(self._file(RECORDS_FILE), "rb") as handle:
+                position = view.end
+                handle.seek(position)
+                while len(offsets) < count:
+                    line = handle.readline()
+                    if not line:
+                        break
+                    record = json.loads(line)
+                    offsets.append(position)
+                    languages.append(record.get("language", "en"))
+                    profiles.append(_record_profile(record))
+                    position += len(line)
+            self._view = _View(stamp, len(offsets), position, vectors, offsets,
+                               np.array(languages, dtype=object), np.array(profiles, dtype=object))
+            return self._view
+
+    def _record(self, row: int, view: _View) -> Dict:
+        with open(self._file(RECORDS_FILE), "rb") as handle:
+            handle.seek(view.offsets[row])
+            return json.loads(handle.readline())
+
+    def search(self, text: str, language: Optional[str] = None, threshold: float = RETRIEVAL_THRESHOLD,
+               profile: Optional[Tuple[str, Tuple[str, ...]]] = None) -> Optional[Dict]:
+        """The closest resolved ticket in ``language`` and with the same ``issue_profile``
+        (when given) with cosine similarity >= ``threshold``"""
+        import numpy as np
+
+        view = self._refresh()
+        self.searches += 1
+        if view.count == 0:
+            return None
+        scores = view.vectors[:view.count] @ embed(text, self.dimensions)
+        if language is not None:
+            scores = np.where(view.languages == language, scores, -1.0)
+        if profile is not None:
+            scores = np.where(view.profiles == profile_key(profile), scores, -1.0)
+        row = int(np.argmax(scores))
+        similarity = float(scores[row])
+        if similarity < threshold:
+            return None
+        self.hits += 1
+        record = self._record(row, view)
+        record["similarity"] = round(similarity, 3)
+        return record
+
+    def add_many(self, tickets: Iterable[Dict]) -> List[int]:
+        """Append resolved tickets (``text``, ``reply``, optional ``language``, detected when
+        missing); returns their ids. Each is stored with the urgency and components
+        SECRM finds in it, which a search must match."""
+        import numpy as np
+
+        tickets = [ticket for ticket in tickets if ticket.get("text") and ticket.get("reply")]
+        if not tickets:
+            return []
+        os.makedirs(self.path, exist_ok=True)
+        with _file_lock(self._file(LOCK_FILE)):
+            view = self._refresh()
+            count = view.count
+            needed = count + len(tickets)
+            capacity = self.capacity
+            if needed > capacity:
+                capacity = max(needed, capacity * 2, MIN_GROWTH)
+            analyses = run_secrm_batch([ticket["text"] for ticket in tickets])
+            rows = np.stack([embed(ticket["text"], self.dimensions) for ticket in tickets])
+            now = time.time()
+            ids = list(range(count, needed))
+
+            # Vectors first, then records, then meta: until meta.json names
+            # the new count, readers ignore the rows being written
+            with open(self._file(VECTORS_FILE), "ab") as handle:
+                handle.truncate(capacity * self.dimensions * 4)
+            with open(self._file(VECTORS_FILE), "r+b") as handle:
+                handle.seek(count * self.dimensions * 4)
+                handle.write(rows.astype(np.float32).tobytes())
+            with open(self._file(RECORDS_FILE), "ab") as handle:
+                # Drop whatever an interrupted add left past the last live record
+                handle.truncate(view.end)
+                for ticket_id, ticket, secrm_data in zip(ids, tickets, analyses):
+                    urgency, labels = issue_profile(secrm_data["urgency"], secrm_data["components"])
+                    record = {
+                        "id": ticket_id,
+                        "text": ticket["text"],
+                        "reply": ticket["reply"],
+                        "language": ticket.get("language") or secrm_data["language"],
+                        "urgency": urgency,
+                        "components": list(labels),
+                        "added": now
+                    }
+                    handle.write((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+            temporary = self._file(f".{META_FILE}.tmp")
+            with open(temporary, "w", encoding="utf-8") as handle:
+                json.dump({"dimensions": self.dimensions, "capacity": capacity, "count": needed}, handle)
+            os.replace(temporary, self._file(META_FILE))
+        self._refresh()
+        return ids
+
+    def add(self, text: str, reply: str, language: Optional[str] = None) -> int:
+        return self.add_many([{"text": text, "reply": reply, "language": language}])[0]
+
+    def __len__(self) -> int:
+        return self._refresh().count
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "enabled": True,
+            "tickets": len(self),
+            "capacity": self.capacity,
+            "dimensions": self.dimensions,
+            "threshold": RETRIEVAL_THRESHOLD,
+            "searches": self.searches,
+            "hits": self.hits,
+            "hit_rate": round(self.hits / self.searches, 4) if self.searches else 0.0
+        }
+
+
+_index: Optional[ResolvedIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> Optional[ResolvedIndex]:
+    """Return the process-wide resolved-ticket index (None when disabled)"""
+    global _index
+    if not RETRIEVAL_PATH:
+        return None
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = ResolvedIndex(RETRIEVAL_PATH)
+    return _index
+
+
+def retrieved_response(user_query: str, language: str, urgency: str, components: List[Dict]) -> Optional[Dict]:
+    """An LLM-shaped result built from the best matching resolved ticket, if one is close
+    enough and has the urgency and components SECRM found in ``user_query``"""
+    index = get_index()
+    if index is None:
+        return None
+    started = time.perf_counter()
+    try:
+        match = index.search(user_query, language, profile=issue_profile(urgency, components))
+    except Exception as e:
+        # A damaged index must not take the LLM path down with it
+        print(f"Retrieval Error: {e}")
+        return None
+    if match is None:
+        RETRIEVALS.inc(result="miss")
+        return None
+    RETRIEVALS.inc(result="hit")
+    return {
+        "response": match["reply"],
+        "confidence": round(min(0.95, match["similarity"]), 2),
+        "model_used": "retrieval",
+        "tokens_used": 0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "generation_time": round(time.perf_counter() - started, 3),
+        "path": "retrieval",
+        "retrieved": {"ticket_id": match["id"], "similarity": match["similarity"]}
+    }
+
+
+def stats() -> Dict[str, object]:
+    index = get_index()
+    return index.stats() if index is not None else {"enabled": False}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Manage the resolved-ticket retrieval index")
+    parser.add_argument("-p", "--path", default=RETRIEVAL_PATH or None, required=not RETRIEVAL_PATH,
+                        help="index directory (default: RETRIEVAL_PATH)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add", help="append resolved tickets from NDJSON")
+    add.add_argument("input", nargs="?", help='NDJSON with "text", "reply" and optional "language" (default: stdin)')
+    search = commands.add_parser("search", help="show the closest resolved ticket")
+    search.add_argument("text")
+    search.add_argument("--language")
+    search.add_argument("--threshold", type=float, default=0.0)
+    commands.add_parser("info", help="print index statistics")
+    args = parser.parse_args(argv)
+
+    index = ResolvedIndex(args.path)
+    if args.command == "add":
+        handle = sys.stdin if args.input in (None, "-") else open(args.input, encoding="utf-8")
+        with handle:
+            tickets = [json.loads(line) for line in handle if line.strip()]
+        started = time.perf_counter()
+        ids = index.add_many(tickets)
+        sys.stdout.write(json.dumps({"added": len(ids), "tickets": len(index),
+                                     "seconds": round(time.perf_counter() - started, 2)}) + "\n")
+    elif args.command == "search":
+        match = index.search(args.text, args.language, args.threshold)
+        sys.stdout.write(json.dumps(match, ensure_ascii=False, indent=2) + "\n")
+    else:
+        sys.stdout.write(json.dumps(index.stats(), indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
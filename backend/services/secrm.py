@@ -1,8 +1,15 @@
 from __future__ import annotations
 
-from typing import Dict, List
+from collections import Counter
+from typing import AbstractSet, Dict, List, Optional, Tuple
 import re
 
+from .cache import clone_result, get_result_cache, text_fingerprint
+from .classifier import get_classifier
+from .matcher import KeywordMatcher
+from .metrics import timed
+from .taxonomy import Taxonomy, check_mapping, check_word_list, current, register_compiler, register_section
+
 
 KEYWORDS = {
     "battery": {
@@ -55,6 +62,7 @@ SENTIMENT_KEYWORDS = {
 
 # Multi-language support
 LANGUAGE_DETECTION = {
+    "english": ["the", "and", "is", "it", "to", "a", "in", "my", "of", "i", "this", "with", "was", "for", "have", "on", "but", "when", "you", "not"],
     "spanish": ["el", "la", "de", "que", "y", "a", "en", "un", "es", "se", "no", "te", "lo", "le", "da", "su", "por", "son", "con", "para"],
     "french": ["le", "de", "et", "à", "un", "il", "être", "et", "en", "avoir", "que", "pour", "dans", "ce", "son", "une", "sur", "avec", "ne", "se"],
     "german": ["der", "die", "und", "in", "den", "von", "zu", "das", "mit", "sich", "des", "auf", "für", "ist", "im", "dem", "nicht", "ein", "eine", "als"],
@@ -62,15 +70,102 @@ LANGUAGE_DETECTION = {
     "japanese": ["の", "に", "は", "を", "た", "が", "で", "て", "と", "し", "れ", "さ", "ある", "いる", "も", "する", "から", "な", "こと", "として"]
 }
 
+# ISO 639-1 codes, as expected by LLMService._get_language_name
+LANGUAGE_CODES = {"english": "en", "spanish": "es", "french": "fr", "german": "de", "chinese": "zh", "japanese": "ja"}
+
+# No spaces between words, so these are scored by script instead of by token
+CJK_LANGUAGES = {"chinese", "japanese"}
+# Roughly two characters per word in Chinese and Japanese text
+CJK_CHAR_WEIGHT = 0.5
+
+URGENT_WORDS = ["urgent", "emergency", "critical", "immediately", "asap", "broken", "not working", "dangerous", "fire", "explode"]
+RETURN_WORDS = ["return", "refund", "exchange", "replace", "warranty", "lawsuit", "legal", "complaint"]
+SAFETY_WORDS = ["burn", "shock", "danger", "unsafe", "hazard"]
+
+SEVERITY_LEVELS = ("critical", "high", "medium", "low")
+
+
+def _check_component(name: str, config: object) -> None:
+    check_mapping(config, lambda key, value: None, required=("triggers", "severity", "category"))
+    check_word_list(config["triggers"])
+    if config["severity"] not in SEVERITY_LEVELS:
+        raise ValueError(f"severity must be one of {', '.join(SEVERITY_LEVELS)}")
+    if not isinstance(config["category"], str):
+        raise ValueError("category must be a string")
+
+
+def _check_language(lang: str, keywords: object) -> None:
+    if lang not in LANGUAGE_CODES:
+        raise ValueError(f"unsupported language, expected one of {', '.join(LANGUAGE_CODES)}")
+    check_word_list(keywords)
+
+
+def _compile_matcher(sections: Dict[str, object]) -> KeywordMatcher:
+    """Build one matcher over every trigger, sentiment and urgency keyword"""
+    patterns = []
+    for config in sections["keywords"].values():
+        patterns.extend(config["triggers"])
+    for keywords in sections["sentiment_keywords"].values():
+        patterns.extend(keywords)
+    patterns.extend(sections["urgent_words"])
+    patterns.extend(sections["return_words"])
+    patterns.extend(sections["safety_words"])
+    return KeywordMatcher(patterns)
+
+
+def _compile_language_index(sections: Dict[str, object]) -> Dict[str, Tuple[str, ...]]:
+    """Map each function word to the codes of every language that uses it"""
+    index: Dict[str, List[str]] = {}
+    for lang, keywords in sections["language_detection"].items():
+        if lang in CJK_LANGUAGES:
+            continue
+        for word in dict.fromkeys(keywords):
+            index.setdefault(word, []).append(LANGUAGE_CODES[lang])
+    return {word: tuple(codes) for word, codes in index.items()}
+
+
+# The module tables above are the built-in taxonomy; TAXONOMY_PATH can
+# override them. Compiled structures live on the taxonomy snapshot.
+register_section("keywords", KEYWORDS, lambda value: check_mapping(value, _check_component))
+register_section(
+    "sentiment_keywords", SENTIMENT_KEYWORDS,
+    lambda value: check_mapping(value, lambda name, words: check_word_list(words),
+                                required=("positive", "negative", "neutral"))
+)
+register_section("language_detection", LANGUAGE_DETECTION, lambda value: check_mapping(value, _check_language))
+register_section("urgent_words", URGENT_WORDS, check_word_list)
+register_section("return_words", RETURN_WORDS, check_word_list)
+register_section("safety_words", SAFETY_WORDS, check_word_list)
+register_compiler(
+    "matcher",
+    ("keywords", "sentiment_keywords", "urgent_words", "return_words", "safety_words"),
+    _compile_matcher
+)
+register_compiler("language_index", ("language_detection",), _compile_language_index)
+
+_TOKEN = re.compile(r"\w+")
+_KANA = re.compile(r"[\u3040-\u30ff\u31f0-\u31ff\uff66-\uff9f]")
+_HAN = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]")
+
 
-def extract_sentiment(text: str) -> Dict[str, float]:
+def find_matches(text: str, taxonomy: Optional[Taxonomy] = None) -> AbstractSet[str]:
+    """Return every known keyword that occurs in the text"""
+    taxonomy = taxonomy or current()
+    return taxonomy.compiled["matcher"].find(text.lower())
+
+
+def extract_sentiment(text: str, matches: Optional[AbstractSet[str]] = None,
+                      taxonomy: Optional[Taxonomy] = None) -> Dict[str, float]:
     """Extract sentiment scores from text"""
-    lowered = text.lower()
-    scores = {"positive": 0, "negative": 0, "neutral": 0}
+    taxonomy = taxonomy or current()
+    if matches is None:
+        matches = find_matches(text, taxonomy)
+    sentiment_keywords = taxonomy.sections["sentiment_keywords"]
+    scores = dict.fromkeys(sentiment_keywords, 0)
     
-    for sentiment, keywords in SENTIMENT_KEYWORDS.items():
+    for sentiment, keywords in sentiment_keywords.items():
         for keyword in keywords:
-            if keyword in lowered:
+            if keyword in matches:
                 scores[sentiment] += 1
     
     total = sum(scores.values())
@@ -81,36 +176,46 @@ def extract_sentiment(text: str) -> Dict[str, float]:
     return scores
 
 
-def detect_language(text: str) -> str:
-    """Detect the language of the input text"""
-    words = text.lower().split()
-    language_scores = {}
+@timed("detect_language")
+def detect_language(text: str, taxonomy: Optional[Taxonomy] = None) -> str:
+    """Detect the language of the input text as an ISO 639-1 code"""
+    language_index = (taxonomy or current()).compiled["language_index"]
+    scores = dict.fromkeys(LANGUAGE_CODES.values(), 0.0)
+    kana = han = 0
     
-    for lang, keywords in LANGUAGE_DETECTION.items():
-        score = sum(1 for word in words if word in keywords)
-        language_scores[lang] = score
+    for token, count in Counter(_TOKEN.findall(text.lower())).items():
+        codes = language_index.get(token)
+        if codes is not None:
+            for code in codes:
+                scores[code] += count
+        elif not token.isascii():
+            kana += len(_KANA.findall(token)) * count
+            han += len(_HAN.findall(token)) * count
     
-    if language_scores:
-        detected_lang = max(language_scores.items(), key=lambda x: x[1])[0]
-        if language_scores[detected_lang] > 0:
-            return detected_lang
+    # Japanese mixes kanji with kana; Chinese never uses kana
+    if kana:
+        scores["ja"] += (kana + han) * CJK_CHAR_WEIGHT
+    else:
+        scores["zh"] += han * CJK_CHAR_WEIGHT
     
-    return "english"
+    # English is listed first, so it wins ties
+    detected_lang = max(scores.items(), key=lambda x: x[1])[0]
+    return detected_lang if scores[detected_lang] > 0 else "en"
 
 
-def calculate_urgency(text: str, components: List[Dict]) -> str:
+def calculate_urgency(text: str, components: List[Dict], matches: Optional[AbstractSet[str]] = None,
+                      taxonomy: Optional[Taxonomy] = None) -> str:
     """Calculate urgency level based on components and text"""
-    urgent_words = ["urgent", "emergency", "critical", "immediately", "asap", "broken", "not working", "dangerous", "fire", "explode"]
-    return_words = ["return", "refund", "exchange", "replace", "warranty", "lawsuit", "legal", "complaint"]
-    safety_words = ["burn", "shock", "danger", "unsafe", "hazard"]
-    
-    lowered = text.lower()
+    taxonomy = taxonomy or current()
+    if matches is None:
+        matches = find_matches(text, taxonomy)
+    sections = taxonomy.sections
     
-    if any(word in lowered for word in safety_words):
+    if any(word in matches for word in sections["safety_words"]):
         return "urgent"
-    elif any(word in lowered for word in urgent_words):
+    elif any(word in matches for word in sections["urgent_words"]):
         return "urgent"
-    elif any(word in lowered for word in return_words):
+    elif any(word in matches for word in sections["return_words"]):
         return "high"
     elif any(comp.get("severity") == "critical" for comp in components):
         return "high"
@@ -135,20 +240,18 @@ def calculate_confidence_score(components: List[Dict], text_length: int) -> floa
     return round(overall_confidence, 2)
 
 
-def run_secrm(text: str) -> List[Dict[str, object]]:
-    """Enhanced SECRM with better component recognition"""
-    lowered = text.lower()
+def _collect_hits(matches: AbstractSet[str], keywords: Dict[str, Dict]) -> Dict[str, List[str]]:
+    """Map each component to its matched triggers, in trigger order"""
+    return {
+        name: [trigger for trigger in config["triggers"] if trigger in matches]
+        for name, config in keywords.items()
+    }
+
+
+def _rule_components(hits_by_name: Dict[str, List[str]], keywords: Dict[str, Dict]) -> List[Dict[str, object]]:
     components: List[Dict[str, object]] = []
-    
-    for name, config in KEYWORDS.items():
-        triggers = config["triggers"]
-        hits = []
-        
-        # Check for exact matches and partial matches
-        for trigger in triggers:
-            if trigger in lowered:
-                hits.append(trigger)
-        
+    for name, hits in hits_by_name.items():
+        config = keywords[name]
         if hits:
             # Calculate confidence based on number of hits and trigger specificity
             base_confidence = 0.3 + (len(hits) * 0.15)
@@ -170,15 +273,96 @@ def run_secrm(text: str) -> List[Dict[str, object]]:
     
     # Sort by confidence
     components.sort(key=lambda x: x["confidence"], reverse=True)
+    return components
+
+
+def _rule_components_batch(names: List[str], keywords: Dict[str, Dict], all_hits: List[Dict[str, List[str]]],
+                           hit_counts, multi_counts):
+    """``_rule_components`` for a batch: component lists and the per-row critical flag"""
+    import numpy as np
+    
+    # Component confidence: 0.3 + 0.15 per hit, +0.1 per multi-word hit, capped
+    confidence = 0.3 + (hit_counts * 0.15)
+    for k in range(int(multi_counts.max(initial=0))):
+        confidence = np.where(multi_counts > k, confidence + 0.1, confidence)
+    confidence = np.minimum(0.95, confidence).tolist()
+    
+    critical = np.array([keywords[name]["severity"] == "critical" for name in names])
+    has_critical = ((hit_counts > 0) & critical).any(axis=1)
+    
+    components_per_row = []
+    for row, hits_by_name in enumerate(all_hits):
+        components = []
+        for col, name in enumerate(names):
+            hits = hits_by_name[name]
+            if hits:
+                config = keywords[name]
+                components.append({
+                    "label": name,
+                    "confidence": round(confidence[row][col], 2),
+                    "evidence": hits[:3],
+                    "severity": config["severity"],
+                    "category": config["category"]
+                })
+        components.sort(key=lambda x: x["confidence"], reverse=True)
+        components_per_row.append(components)
+    return components_per_row, has_critical
+
+
+def analysis_scope(snapshot: Taxonomy) -> str:
+    """Namespace for reusable analyses: the taxonomy digest plus the model version, if any"""
+    classifier = get_classifier()
+    return snapshot.digest if classifier is None else f"{snapshot.digest}:{classifier.version}"
+
+
+def issue_profile(urgency: str, components: List[Dict]) -> Tuple[str, Tuple[str, ...]]:
+    """Urgency and component labels: a stored reply is only reused for the same ones"""
+    return urgency, tuple(sorted(comp.get("label", "") for comp in components))
+
+
+def _timestamp() -> str:
+    return __import__('datetime').datetime.now().isoformat()
+
+
+@timed("secrm")
+def run_secrm(text: str) -> List[Dict[str, object]]:
+    """Enhanced SECRM with better component recognition"""
+    # One snapshot for the whole analysis, even if a reload lands mid-request
+    snapshot = current()
+    cache = get_result_cache()
+    if cache is None:
+        return _analyze_text(text, snapshot)
+    
+    # Identical bodies (retries, auto-generated tickets) are served from memory
+    key = ("secrm", analysis_scope(snapshot), text_fingerprint(text))
+    result = cache.get(key)
+    if result is not None:
+        result["analysis_timestamp"] = _timestamp()
+        return result
+    result = _analyze_text(text, snapshot)
+    cache.set(key, result)
+    return result
+
+
+def _analyze_text(text: str, snapshot: Taxonomy) -> Dict[str, object]:
+    # Single pass over the text; everything below reads from this match set
+    matches = find_matches(text, snapshot)
+    keywords = snapshot.sections["keywords"]
+    hits_by_name = _collect_hits(matches, keywords)
+    classifier = get_classifier()
+    if classifier is not None:
+        components = classifier.components([text], [hits_by_name], keywords)[0]
+    else:
+        components = _rule_components(hits_by_name, keywords)
     
     # Add sentiment analysis
-    sentiment = extract_sentiment(text)
+    sentiment = extract_sentiment(text, matches, snapshot)
     
     # Add urgency assessment
-    urgency = calculate_urgency(text, components)
+    urgency = calculate_urgency(text, components, matches, snapshot)
     
     # Detect language
-    detected_language = detect_language(text)
+    detected_language = detect_language(text, snapshot)
     
     # Calculate overall confidence
     overall_confidence = calculate_confidence_score(components, len(text))
@@ -191,7 +375,133 @@ def run_secrm(text: str) -> List[Dict[str, object]]:
         "overall_confidence": overall_confidence,
         "text_length": len(text),
         "word_count": len(text.split()),
-        "analysis_timestamp": __import__('datetime').datetime.now().isoformat()
+        "analysis_timestamp": _timestamp()
     }
 
 
+@timed("secrm_batch")
+def run_secrm_batch(texts: List[str]) -> List[Dict[str, object]]:
+    """Run SECRM over many texts, scoring them together as NumPy arrays.
+
+    Produces exactly what ``run_secrm`` returns for each text. Texts already
+    in the result cache, and repeats within the batch, are analyzed once.
+    """
+    snapshot = current()
+    cache = get_result_cache()
+    if cache is None:
+        return _analyze_batch(texts, snapshot)
+    
+    scope = analysis_scope(snapshot)
+    keys = [("secrm", scope, text_fingerprint(text)) for text in texts]
+    found: Dict[tuple, Dict[str, object]] = {}
+    pending: Dict[tuple, str] = {}
+    for key, text in zip(keys, texts):
+        if key in found or key in pending:
+            continue
+        result = cache.get(key)
+        if result is None:
+            pending[key] = text
+        else:
+            found[key] = result
+    
+    if pending:
+        for key, result in zip(pending, _analyze_batch(list(pending.values()), snapshot)):
+            cache.set(key, result)
+            found[key] = result
+    
+    timestamp = _timestamp()
+    results = []
+    handed_out = set()
+    for key in keys:
+        # Repeats within the batch get their own copy
+        result = clone_result(found[key]) if key in handed_out else found[key]
+        handed_out.add(key)
+        result["analysis_timestamp"] = timestamp
+        results.append(result)
+    return results
+
+
+def _analyze_batch(texts: List[str], snapshot: Taxonomy) -> List[Dict[str, object]]:
+    # The arithmetic follows the same operation order as the per-item
+    # functions and the final rounding is done on Python floats, so the
+    # results are bit-identical to _analyze_text
+    import numpy as np  # only batch scoring needs it; keeps it off the cold-start path
+    
+    sections = snapshot.sections
+    keywords = sections["keywords"]
+    sentiment_keywords = sections["sentiment_keywords"]
+    names = list(keywords)
+    sentiments = list(sentiment_keywords)
+    n = len(texts)
+    
+    hit_counts = np.zeros((n, len(names)), dtype=np.int64)
+    multi_counts = np.zeros((n, len(names)), dtype=np.int64)
+    sentiment_counts = np.zeros((n, len(sentiments)), dtype=np.int64)
+    safety = np.zeros(n, dtype=bool)
+    urgent = np.zeros(n, dtype=bool)
+    returns = np.zeros(n, dtype=bool)
+    all_hits = []
+    
+    for row, text in enumerate(texts):
+        matches = find_matches(text, snapshot)
+        hits_by_name = _collect_hits(matches, keywords)
+        all_hits.append(hits_by_name)
+        for col, name in enumerate(names):
+            hits = hits_by_name[name]
+            hit_counts[row, col] = len(hits)
+            multi_counts[row, col] = sum(1 for hit in hits if len(hit.split()) > 1)
+        for col, sentiment in enumerate(sentiments):
+            sentiment_counts[row, col] = sum(1 for keyword in sentiment_keywords[sentiment] if keyword in matches)
+        safety[row] = any(word in matches for word in sections["safety_words"])
+        urgent[row] = any(word in matches for word in sections["urgent_words"])
+        returns[row] = any(word in matches for word in sections["return_words"])
+    
+    classifier = get_classifier()
+    if classifier is not None:
+        # All texts scored by the model in one sparse matrix product
+        components_per_row = classifier.components(texts, all_hits, keywords)
+        has_critical = np.array([any(comp["severity"] == "critical" for comp in components)
+                                 for components in components_per_row], dtype=bool)
+    else:
+        components_per_row, has_critical = _rule_components_batch(names, keywords, all_hits, hit_counts, multi_counts)
+    
+    # Urgency from keyword flags and critical components
+    urgency = np.select([safety | urgent, returns | has_critical], ["urgent", "high"], "medium").tolist()
+    
+    # Sentiment ratios
+    sentiment_totals = sentiment_counts.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sentiment_ratios = (sentiment_counts / sentiment_totals[:, None]).tolist()
+    
+    # Overall confidence: sequential sum of component confidences (cumsum keeps
+    # the same summation order as sum()), blended with a text length factor
+    lengths = np.array([len(text) for text in texts], dtype=np.int64)
+    component_total = np.array([len(components) for components in components_per_row], dtype=np.int64)
+    width = int(component_total.max(initial=0))
+    component_confidence = np.zeros((n, max(width, 1)))
+    for row, components in enumerate(components_per_row):
+        for col, comp in enumerate(components):
+            component_confidence[row, col] = comp["confidence"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_confidence = np.cumsum(component_confidence, axis=1)[:, -1] / component_total
+    length_factor = np.minimum(1.0, lengths / 200)
+    overall = ((mean_confidence * 0.7) + (length_factor * 0.3)).tolist()
+    
+    results = []
+    for row, text in enumerate(texts):
+        if sentiment_totals[row] > 0:
+            sentiment = {key: round(sentiment_ratios[row][col], 2) for col, key in enumerate(sentiments)}
+        else:
+            sentiment = {key: 0 for key in sentiments}
+        results.append({
+            "components": components_per_row[row],
+            "sentiment": sentiment,
+            "urgency": urgency[row],
+            "language": detect_language(text, snapshot),
+            "overall_confidence": round(overall[row], 2) if component_total[row] else 0.0,
+            "text_length": len(text),
+            "word_count": len(text.split()),
+            "analysis_timestamp": _timestamp()
+        })
+    
+    return results
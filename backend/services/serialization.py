@@ -0,0 +1,64 @@
+"""
+JSON encoding for SECRM-EIGA API responses
+Uses orjson when it is installed, otherwise a compact stdlib encoder
+"""
+
+from __future__ import annotations
+
+import json
+from json.encoder import c_make_encoder, encode_basestring
+
+from config import JSON_BACKEND
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+if c_make_encoder is not None:
+    # One reusable C encoder instead of a new one per JSONEncoder.encode call
+    _iterencode = c_make_encoder(None, _encoder.default, encode_basestring, None,
+                                 ":", ",", False, False, True)
+
+    def _stdlib_dumps(obj) -> str:
+        if isinstance(obj, str):
+            return encode_basestring(obj)
+        return "".join(_iterencode(obj, 0))
+else:
+    _stdlib_dumps = _encoder.encode
+
+
+def _use_orjson() -> bool:
+    if JSON_BACKEND == "stdlib":
+        return False
+    if orjson is None:
+        if JSON_BACKEND == "orjson":
+            print("JSON Warning: JSON_BACKEND=orjson but orjson is not installed; using stdlib")
+        return False
+    return True
+
+
+USE_ORJSON = _use_orjson()
+
+
+def dumps(obj) -> str:
+    """Compact JSON text (no whitespace, UTF-8 kept as is)"""
+    if USE_ORJSON:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    return _stdlib_dumps(obj)
+
+
+def dumps_bytes(obj) -> bytes:
+    """``dumps`` encoded as UTF-8, ready for a response body"""
+    if USE_ORJSON:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return _stdlib_dumps(obj).encode("utf-8")
+
+
+def loads(data):
+    """Parse JSON from str or bytes"""
+    if USE_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
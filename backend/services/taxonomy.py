@@ -0,0 +1,319 @@
+"""
+Keyword taxonomy for SECRM-EIGA
+The keyword and template tables live in an immutable, versioned snapshot.
+Built-in defaults come from the SECRM and EIGA modules; TAXONOMY_PATH points
+at a JSON file that overrides any of its sections. Reloads rebuild only the
+compiled structures whose input sections changed, then swap the snapshot in
+with a single reference assignment, so readers never block and never see a
+half-built table.
+
+Export the built-in taxonomy as a starting file:
+
+    python -m services.taxonomy export -o taxonomy.json
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from config import TAXONOMY_PATH, TAXONOMY_POLL_INTERVAL
+
+
+Sections = Dict[str, object]
+Builder = Callable[[Sections], object]
+
+_defaults: Sections = {}
+_validators: Dict[str, Callable[[object], None]] = {}
+# name -> (input sections, builder)
+_compilers: Dict[str, Tuple[Tuple[str, ...], Builder]] = {}
+
+
+class TaxonomyError(ValueError):
+    """The taxonomy file is missing, unreadable or fails validation"""
+
+
+class Taxonomy:
+    """One immutable taxonomy version with its compiled lookup structures.
+
+    Grab a snapshot once per request with ``current()`` and read everything
+    from it; a concurrent reload replaces the module reference but never
+    mutates a published snapshot.
+    """
+
+    __slots__ = ("version", "source", "loaded_at", "sections", "hashes", "digest", "compiled")
+
+    def __init__(self, version: str, source: Optional[str], sections: Sections,
+                 hashes: Dict[str, str], compiled: Dict[str, object]):
+        self.version = version
+        self.source = source
+        self.loaded_at = time.time()
+        self.sections = sections
+        self.hashes = hashes
+        self.compiled = compiled
+        self.digest = hashlib.sha256("".join(hashes[name] for name in sorted(hashes)).encode()).hexdigest()[:16]
+
+    def info(self) -> Dict[str, object]:
+        return {
+            "version": self.version,
+            "source": self.source or "builtin",
+            "digest": self.digest,
+            "loaded_at": self.loaded_at,
+            "sections": dict(self.hashes)
+        }
+
+
+def check_word_list(value: object, lowercase: bool = True) -> None:
+    """Validator for a non-empty list of (lowercase) strings"""
+    if not isinstance(value, list) or not value:
+        raise ValueError("expected a non-empty list of strings")
+    for word in value:
+        if not isinstance(word, str) or not word:
+            raise ValueError(f"{word!r} is not a non-empty string")
+        if lowercase and word != word.lower():
+            raise ValueError(f"{word!r} must be lowercase; text is lowercased before matching")
+
+
+def check_mapping(value: object, check_item: Callable[[str, object], None],
+                  required: Sequence[str] = ()) -> None:
+    """Validator for a dict, checking every ``(key, item)`` and the required keys"""
+    if not isinstance(value, dict) or not value:
+        raise ValueError("expected a non-empty object")
+    missing = [key for key in required if key not in value]
+    if missing:
+        raise ValueError(f"missing keys: {', '.join(missing)}")
+    for key, item in value.items():
+        try:
+            check_item(key, item)
+        except (TypeError, ValueError, KeyError) as e:
+            raise ValueError(f"{key}: {e}") from e
+
+
+def register_section(name: str, default: object, validate: Optional[Callable[[object], None]] = None) -> None:
+    """Declare a taxonomy section with its built-in value"""
+    global _current
+    _defaults[name] = default
+    if validate is not None:
+        _validators[name] = validate
+    _current = None
+
+
+def register_compiler(name: str, inputs: Sequence[str], build: Builder) -> None:
+    """Declare a compiled structure rebuilt whenever one of ``inputs`` changes"""
+    global _current
+    _compilers[name] = (tuple(inputs), build)
+    _current = None
+
+
+def _section_hash(value: object) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+
+
+def load_sections(path: Optional[str]) -> Tuple[str, Sections]:
+    """Read ``path`` over the built-in defaults and validate every section"""
+    sections = dict(_defaults)
+    version = "builtin"
+    if path:
+        try:
+            with open(path, encoding="utf-8") as handle:
+                data = json.load(handle)
+        except (OSError, ValueError) as e:
+            raise TaxonomyError(f"cannot read {path}: {e}") from e
+        if not isinstance(data, dict) or "version" not in data:
+            raise TaxonomyError(f"{path} must be a JSON object with a 'version' field")
+        version = str(data["version"])
+        unknown = set(data) - set(_defaults) - {"version"}
+        if unknown:
+            raise TaxonomyError(f"unknown sections: {', '.join(sorted(unknown))}")
+        sections.update((name, value) for name, value in data.items() if name != "version")
+    for name, validate in _validators.items():
+        try:
+            validate(sections[name])
+        except (TypeError, ValueError, KeyError) as e:
+            raise TaxonomyError(f"invalid section '{name}': {e}") from e
+    return version, sections
+
+
+def build(version: str, sections: Sections, source: Optional[str] = None,
+          previous: Optional[Taxonomy] = None) -> Tuple[Taxonomy, List[str]]:
+    """Compile a snapshot, reusing structures from ``previous`` whose inputs are unchanged"""
+    hashes = {name: _section_hash(value) for name, value in sections.items()}
+    compiled: Dict[str, object] = {}
+    rebuilt: List[str] = []
+    for name, (inputs, builder) in _compilers.items():
+        if (previous is not None and name in previous.compiled
+                and all(previous.hashes.get(section) == hashes[section] for section in inputs)):
+            compiled[name] = previous.compiled[name]
+        else:
+            compiled[name] = builder(sections)
+            rebuilt.append(name)
+    return Taxonomy(version, source, sections, hashes, compiled), rebuilt
+
+
+_current: Optional[Taxonomy] = None
+_reload_lock = threading.Lock()
+_last_reload: Dict[str, object] = {}
+
+
+def current() -> Taxonomy:
+    """Return the live snapshot; builds it on first use"""
+    snapshot = _current
+    if snapshot is None:
+        with _reload_lock:
+            if _current is None:
+                _initialize()
+            snapshot = _current
+    return snapshot
+
+
+def _initialize() -> None:
+    global _current
+    try:
+        version, sections = load_sections(TAXONOMY_PATH)
+        source = TAXONOMY_PATH or None
+    except TaxonomyError as e:
+        print(f"Taxonomy Error: {e}; using the built-in taxonomy")
+        version, sections = load_sections(None)
+        source = None
+    _current, _ = build(version, sections, source)
+
+
+def reload(path: Optional[str] = None) -> Dict[str, object]:
+    """Load ``path`` (default TAXONOMY_PATH) and swap it in.
+
+    Raises TaxonomyError and keeps serving the previous snapshot if the file
+    is invalid. Only one reload runs at a time; readers are never blocked.
+    """
+    global _current
+    path = path or TAXONOMY_PATH
+    current()
+    with _reload_lock:
+        previous = _current
+        version, sections = load_sections(path)
+        started = time.perf_counter()
+        snapshot, rebuilt = build(version, sections, path or None, previous)
+        _current = snapshot
+    changed = [name for name, digest in snapshot.hashes.items() if previous.hashes.get(name) != digest]
+    _last_reload.update({
+        "at": snapshot.loaded_at,
+        "version": snapshot.version,
+        "changed_sections": changed,
+        "rebuilt": rebuilt,
+        "compile_ms": round((time.perf_counter() - started) * 1000, 2)
+    })
+    return dict(_last_reload)
+
+
+def status() -> Dict[str, object]:
+    info = current().info()
+    info["last_reload"] = dict(_last_reload) or None
+    info["watching"] = _watcher is not None and _watcher.is_alive()
+    return info
+
+
+class TaxonomyWatcher(threading.Thread):
+    """Polls the taxonomy file and reloads it in the background when it changes"""
+
+    def __init__(self, path: str, interval: float):
+        super().__init__(name="taxonomy-watcher", daemon=True)
+        self.path = path
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._signature = self._stat()
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            signature = self._stat()
+            if signature is None or signature == self._signature:
+                continue
+            self._signature = signature
+            try:
+                result = reload(self.path)
+                print(f"Taxonomy reloaded: version {result['version']}, rebuilt {result['rebuilt'] or 'nothing'}")
+            except TaxonomyError as e:
+                print(f"Taxonomy Error: {e}; keeping version {current().version}")
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+
+_watcher: Optional[TaxonomyWatcher] = None
+
+
+def _after_fork_in_child() -> None:
+    # A forked worker inherits the snapshot but not the watcher thread, and
+    # must not inherit a reload lock the parent happened to be holding
+    global _reload_lock, _watcher
+    _reload_lock = threading.Lock()
+    _watcher = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def start_watcher() -> Optional[TaxonomyWatcher]:
+    """Start the file watcher once per process (no-op without TAXONOMY_PATH)"""
+    global _watcher
+    if not TAXONOMY_PATH or TAXONOMY_POLL_INTERVAL <= 0:
+        return None
+    with _reload_lock:
+        if _watcher is None or not _watcher.is_alive():
+            _watcher = TaxonomyWatcher(TAXONOMY_PATH, TAXONOMY_POLL_INTERVAL)
+            _watcher.start()
+    return _watcher
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    # Importing the pipeline registers every section and compiler
+    from . import pipeline  # noqa: F401
+
+    parser = argparse.ArgumentParser(description="Export or check a SECRM-EIGA taxonomy file")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="write the built-in taxonomy as JSON")
+    export.add_argument("-o", "--output", help="output file (default: stdout)")
+    export.add_argument("--version", default=time.strftime("%Y.%m.%d"), help="version to stamp on the file")
+    check = commands.add_parser("check", help="validate a taxonomy file and show what it changes")
+    check.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        encoded = json.dumps({"version": args.version, **_defaults}, indent=2, ensure_ascii=False)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as handle:
+                handle.write(encoded + "\n")
+        else:
+            sys.stdout.write(encoded + "\n")
+        return 0
+
+    try:
+        version, sections = load_sections(args.path)
+    except TaxonomyError as e:
+        sys.stderr.write(f"{e}\n")
+        return 1
+    baseline, _ = build("builtin", dict(_defaults))
+    snapshot, rebuilt = build(version, sections, args.path, baseline)
+    changed = [name for name, digest in snapshot.hashes.items() if baseline.hashes[name] != digest]
+    sys.stdout.write(json.dumps({"version": version, "changed_sections": changed, "rebuilt": rebuilt}, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    # Run the imported module's main so the SECRM/EIGA registrations land
+    # in the same registry the CLI reads
+    from services.taxonomy import main as registry_main
+    sys.exit(registry_main())
@@ -0,0 +1,177 @@
+"""
+Token accounting for SECRM-EIGA
+Counts prompt tokens before a request is sent (with tiktoken when it is
+installed, otherwise with a word-piece estimate), condenses long tickets to
+the sentences around the SECRM evidence and sizes the completion budget
+"""
+
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Tuple
+
+from config import LLM_QUERY_MAX_TOKENS, MAX_RESPONSE_LENGTH, OPENAI_MODEL, TOKENIZER
+from .metrics import LLM_QUERIES_CONDENSED, TOKENS
+
+
+# Completion budget by SECRM urgency, plus a little room per extra detected
+# component; never more than MAX_RESPONSE_LENGTH
+RESPONSE_TOKENS = {
+    "urgent": 500,
+    "high": 450,
+    "medium": 350
+}
+DEFAULT_RESPONSE_TOKENS = 350
+EXTRA_COMPONENT_TOKENS = 50
+
+GAP_MARKER = " … "
+
+_PIECE = re.compile(r"\w+|[^\w\s]")
+_SENTENCE = re.compile(r"(?<=[.!?])\s+|(?<=[。！？])|\n+")
+
+_encoding = None
+_encoding_loaded = False
+
+
+def _get_encoding():
+    """The tiktoken encoding for OPENAI_MODEL, or None to use the estimate"""
+    global _encoding, _encoding_loaded
+    if _encoding_loaded:
+        return _encoding
+    _encoding_loaded = True
+    if TOKENIZER == "estimate":
+        return None
+    try:
+        import tiktoken
+    except ImportError:
+        if TOKENIZER == "tiktoken":
+            print("Token Warning: TOKENIZER=tiktoken but tiktoken is not installed; using the estimate")
+        return None
+    try:
+        try:
+            _encoding = tiktoken.encoding_for_model(OPENAI_MODEL)
+        except KeyError:
+            _encoding = tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # The BPE files are fetched on first use and may be unreachable
+        print(f"Token Warning: cannot load tiktoken encoding: {e}; using the estimate")
+    return _encoding
+
+
+def _piece_tokens(piece: str) -> int:
+    if piece.isascii():
+        return (len(piece) + 3) // 4
+    # CJK and other scripts without spaces: roughly a token per character
+    return len(piece)
+
+
+def count_tokens(text: str) -> int:
+    """Number of prompt tokens ``text`` costs"""
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return sum(_piece_tokens(piece) for piece in _PIECE.findall(text))
+
+
+@lru_cache(maxsize=128)
+def count_static(text: str) -> int:
+    """``count_tokens`` for fixed strings such as the system prompts, tokenized once"""
+    return count_tokens(text)
+
+
+def truncate(text: str, max_tokens: int) -> str:
+    """The longest prefix of ``text`` within ``max_tokens``"""
+    encoding = _get_encoding()
+    if encoding is not None:
+        tokens = encoding.encode(text)
+        return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens]).rstrip()
+    used = 0
+    for match in _PIECE.finditer(text):
+        piece = match.group()
+        cost = _piece_tokens(piece)
+        if used + cost > max_tokens:
+            # Cut inside the piece that overflows: one long word, log line or
+            # run of CJK text must not take the whole rest of the budget with it
+            room = max_tokens - used
+            return text[:match.start() + (room * 4 if piece.isascii() else room)].rstrip()
+        used += cost
+    return text
+
+
+def condense_query(text: str, evidence: Iterable[str], max_tokens: int = LLM_QUERY_MAX_TOKENS) -> Tuple[str, bool]:
+    """Fit a customer ticket into ``max_tokens`` (0 = no limit).
+
+    Sentences containing SECRM evidence go first, then the opening sentence,
+    then the neighbours of evidence sentences, then the rest; the kept
+    sentences stay in their original order with a marker where text was
+    dropped. Returns (text, whether it was condensed).
+    """
+    if max_tokens <= 0 or count_tokens(text) <= max_tokens:
+        return text, False
+    LLM_QUERIES_CONDENSED.inc()
+    sentences = [sentence for sentence in _SENTENCE.split(text.strip()) if sentence and not sentence.isspace()]
+    terms = [term.lower() for term in evidence if term]
+    hits = [index for index, sentence in enumerate(sentences)
+            if any(term in sentence.lower() for term in terms)]
+    order = hits + [0] + [near for index in hits for near in (index - 1, index + 1)] + list(range(len(sentences)))
+
+    chosen = set()
+    used = 0
+    for index in order:
+        if not 0 <= index < len(sentences) or index in chosen:
+            continue
+        cost = count_tokens(sentences[index]) + 1
+        if used + cost <= max_tokens:
+            chosen.add(index)
+            used += cost
+    if not chosen:
+        # A single sentence over the budget: keep the start of the most relevant one
+        return truncate(sentences[hits[0] if hits else 0], max_tokens) + GAP_MARKER.rstrip(), True
+
+    kept = sorted(chosen)
+    parts = [sentences[kept[0]]]
+    for previous, index in zip(kept, kept[1:]):
+        parts.append((GAP_MARKER if index > previous + 1 else " ") + sentences[index])
+    if kept[0] > 0:
+        parts.insert(0, GAP_MARKER.lstrip())
+    if kept[-1] < len(sentences) - 1:
+        parts.append(GAP_MARKER.rstrip())
+    return "".join(parts), True
+
+
+def response_budget(urgency: str, component_count: int, ceiling: int = MAX_RESPONSE_LENGTH) -> int:
+    """``max_tokens`` for a ticket of this urgency and number of detected components"""
+    budget = RESPONSE_TOKENS.get(urgency, DEFAULT_RESPONSE_TOKENS)
+    budget += EXTRA_COMPONENT_TOKENS * max(0, component_count - 1)
+    return min(budget, ceiling)
+
+
+def _usage_field(usage, name: str) -> int:
+    value = usage.get(name) if isinstance(usage, dict) else getattr(usage, name, None)
+    return int(value or 0)
+
+
+def record_usage(usage, share: int = 1) -> Dict[str, int]:
+    """Export an OpenAI ``usage`` (SDK object or dict) and return this request's part of it.
+
+    ``share`` splits a batched completion evenly between its tickets; the
+    aggregate counters always see the full usage.
+    """
+    total = _usage_field(usage, "total_tokens")
+    prompt = _usage_field(usage, "prompt_tokens")
+    completion = _usage_field(usage, "completion_tokens") or max(0, total - prompt)
+    TOKENS.inc(prompt, kind="prompt")
+    TOKENS.inc(completion, kind="completion")
+    return {
+        "tokens_used": (total or prompt + completion) // share,
+        "prompt_tokens": prompt // share,
+        "completion_tokens": completion // share
+    }
+
+
+def estimated_usage(prompt_tokens: int, completion: Optional[str]) -> Dict[str, int]:
+    """Usage for streamed completions, which report none: counted locally"""
+    completion_tokens = count_tokens(completion) if completion else 0
+    return record_usage({"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                         "total_tokens": prompt_tokens + completion_tokens})
@@ -0,0 +1,85 @@
+import threading
+import time
+
+import pytest
+
+from services import admission
+from services.admission import AdmissionController, Lane, RateLimiter
+
+
+def test_rate_limiter_allows_the_burst_then_asks_to_wait():
+    limiter = RateLimiter(rate=2.0, burst=2)
+    assert limiter.take("a") == 0
+    assert limiter.take("a") == 0
+    assert limiter.take("a") == pytest.approx(0.5, abs=0.05)
+    # Buckets are per client
+    assert limiter.take("b") == 0
+
+
+def test_rate_limited_request_gets_429_with_retry_after(monkeypatch):
+    monkeypatch.setattr(admission, "ADMISSION_CHEAP_RATE", 0.1)
+    monkeypatch.setattr(admission, "ADMISSION_CHEAP_BURST", 1)
+    controller = AdmissionController()
+    assert controller.admit("cheap", "client") is None
+    controller.release("cheap", 0.001)
+    rejection = controller.admit("cheap", "client")
+    assert (rejection.status, rejection.reason) == (429, "rate_limited")
+    assert rejection.retry_after == 10
+    assert controller.stats()["rejected"] == {"cheap:rate_limited": 1}
+
+
+def test_rate_limited_response_carries_the_header(monkeypatch):
+    from app import create_app
+
+    monkeypatch.setattr(admission, "ADMISSION_CHEAP_RATE", 0.5)
+    monkeypatch.setattr(admission, "ADMISSION_CHEAP_BURST", 1)
+    monkeypatch.setattr(admission, "_controller", AdmissionController())
+    client = create_app().test_client()
+    assert client.post("/api/secrm", json={"text": "battery"}).status_code == 200
+    response = client.post("/api/secrm", json={"text": "battery"})
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "2"
+
+
+def _hold(lane: Lane, seconds: float) -> threading.Thread:
+    assert lane.acquire() is None
+    thread = threading.Thread(target=lambda: (time.sleep(seconds), lane.release(seconds)))
+    thread.start()
+    return thread
+
+
+def test_lane_queues_a_request_until_a_slot_frees():
+    lane = Lane("test", max_in_flight=1, target=0.5)
+    holder = _hold(lane, 0.05)
+    started = time.monotonic()
+    assert lane.acquire() is None
+    assert 0.03 < time.monotonic() - started < 0.5
+    assert lane.in_flight == 1
+    holder.join()
+
+
+def test_lane_sheds_at_once_when_the_queue_would_miss_the_target():
+    lane = Lane("test", max_in_flight=1, target=0.2)
+    lane.service_time = 1.0
+    holder = _hold(lane, 0.3)
+    started = time.monotonic()
+    wait = lane.acquire()
+    assert wait == pytest.approx(1.0)
+    assert time.monotonic() - started < 0.05
+    holder.join()
+
+
+def test_lane_sheds_after_waiting_out_the_target():
+    lane = Lane("test", max_in_flight=1, target=0.1)
+    holder = _hold(lane, 0.4)
+    started = time.monotonic()
+    assert lane.acquire() == pytest.approx(0.1)
+    assert 0.09 < time.monotonic() - started < 0.3
+    assert lane.waiting == 0
+    holder.join()
+
+
+def test_llm_lane_leaves_threads_for_the_cheap_lane():
+    from config import ADMISSION_LLM_MAX_IN_FLIGHT, SERVER_THREADS
+
+    assert 0 < ADMISSION_LLM_MAX_IN_FLIGHT < SERVER_THREADS
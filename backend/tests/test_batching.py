@@ -0,0 +1,162 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from services import llm_service
+from services.batching import BatchItem, MicroBatcher
+from services.llm_service import _parse_batch_reply, _run_llm_batch
+
+
+class Recorder:
+    """Handler that answers every item with its payload and remembers the batches"""
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, batch):
+        self.batches.append([item.payload for item in batch])
+        for item in batch:
+            item.future.set_result(item.payload)
+
+
+@pytest.fixture
+def executor():
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        yield executor
+
+
+def submit_all(batcher, costs):
+    futures = [batcher.submit(index, cost) for index, cost in enumerate(costs)]
+    return [future.result(timeout=2) for future in futures]
+
+
+def test_window_closes_a_batch(executor):
+    handler = Recorder()
+    batcher = MicroBatcher(handler, executor, window=0.05, max_size=10, max_cost=1000)
+    assert submit_all(batcher, [1, 1, 1]) == [0, 1, 2]
+    assert handler.batches == [[0, 1, 2]]
+    # Items after the window closed go into the next batch
+    assert batcher.submit("late", 1).result(timeout=2) == "late"
+    assert handler.batches[-1] == ["late"]
+    assert batcher.stats() == {"batches": 2, "items": 4, "mean_batch_size": 2.0}
+
+
+def test_max_size_closes_a_batch(executor):
+    handler = Recorder()
+    batcher = MicroBatcher(handler, executor, window=0.2, max_size=2, max_cost=1000)
+    started = time.perf_counter()
+    submit_all(batcher, [1, 1, 1, 1])
+    assert handler.batches == [[0, 1], [2, 3]]
+    assert time.perf_counter() - started < 0.2
+
+
+def test_token_budget_closes_a_batch_and_carries_the_item_over(executor):
+    handler = Recorder()
+    batcher = MicroBatcher(handler, executor, window=0.05, max_size=10, max_cost=10)
+    assert submit_all(batcher, [4, 4, 4, 1]) == [0, 1, 2, 3]
+    # The item that would go over budget starts the next batch, in order
+    assert handler.batches == [[0, 1], [2, 3]]
+
+
+def test_a_failing_handler_fails_every_item(executor):
+    def handler(batch):
+        batch[0].future.set_result("answered")
+        raise ValueError("upstream down")
+
+    batcher = MicroBatcher(handler, executor, window=0.05, max_size=10, max_cost=1000)
+    futures = [batcher.submit(index, 1) for index in range(3)]
+    assert futures[0].result(timeout=2) == "answered"
+    for future in futures[1:]:
+        with pytest.raises(ValueError, match="upstream down"):
+            future.result(timeout=2)
+
+
+def test_items_left_pending_by_the_handler_are_failed(executor):
+    def handler(batch):
+        batch[0].future.set_result("answered")
+
+    batcher = MicroBatcher(handler, executor, window=0.05, max_size=10, max_cost=1000, name="test-batcher")
+    futures = [batcher.submit(index, 1) for index in range(2)]
+    assert futures[0].result(timeout=2) == "answered"
+    with pytest.raises(RuntimeError, match="test-batcher left the item unanswered"):
+        futures[1].result(timeout=2)
+
+
+class StubService:
+    model = "stub-model"
+
+    def __init__(self, replies, fail=False):
+        self.replies = replies
+        self.fail = fail
+        self.batched = []
+        self.single = []
+
+    def _complete(self, prompt, language, max_tokens):
+        self.single.append(prompt)
+        return {"response": f"single {prompt}", "path": "llm"}
+
+    def _complete_batch(self, tickets, max_tokens):
+        if self.fail:
+            raise ConnectionError("upstream down")
+        self.batched.append((tickets, max_tokens))
+        return self.replies, {"prompt_tokens": 300, "completion_tokens": 90, "total_tokens": 390}, 0.5
+
+
+def make_batch(service, count):
+    from concurrent.futures import Future
+
+    return [BatchItem((service, f"query {i}", f"context {i}", "en", f"prompt {i}", 100), 10, Future())
+            for i in range(1, count + 1)]
+
+
+@pytest.fixture(autouse=True)
+def closed_breaker():
+    yield
+    llm_service.LLM_BREAKER.record_success()
+
+
+def test_batch_reply_is_split_per_ticket_and_missing_tickets_are_retried():
+    service = StubService({"t1": "reply one", "t3": "reply three"})
+    batch = make_batch(service, 3)
+    _run_llm_batch(batch)
+    tickets, max_tokens = service.batched[0]
+    assert tickets == [("t1", "query 1", "context 1", "en"), ("t2", "query 2", "context 2", "en"),
+                       ("t3", "query 3", "context 3", "en")]
+    assert max_tokens == 3 * (100 + llm_service.BATCH_TOKENS_PER_TICKET)
+    first, second, third = (item.future.result(timeout=0) for item in batch)
+    assert (first["response"], first["path"], first["batch_size"]) == ("reply one", "llm_batch", 3)
+    assert (first["tokens_used"], first["prompt_tokens"], first["completion_tokens"]) == (130, 100, 30)
+    assert third["response"] == "reply three"
+    # t2 was missing from the reply: retried alone with its own prompt
+    assert second == {"response": "single prompt 2", "path": "llm"}
+    assert service.single == ["prompt 2"]
+
+
+def test_a_lone_ticket_uses_its_own_prompt():
+    service = StubService({})
+    batch = make_batch(service, 1)
+    _run_llm_batch(batch)
+    assert service.batched == []
+    assert batch[0].future.result(timeout=0)["response"] == "single prompt 1"
+
+
+def test_a_failed_batch_call_raises_for_the_batcher():
+    service = StubService({}, fail=True)
+    with pytest.raises(ConnectionError):
+        _run_llm_batch(make_batch(service, 2))
+
+
+@pytest.mark.parametrize("text", [
+    '{"responses": [{"id": "t1", "response": " one "}, {"id": "t2", "response": "two"}]}',
+    'Here you go:\n```json\n{"responses": [{"id": "t1", "response": "one"}, {"id": "t2", "response": "two"}]}\n```',
+    '[{"id": "t1", "response": "one"}, {"id": "t2", "response": "two"}]',
+])
+def test_parse_batch_reply(text):
+    assert _parse_batch_reply(text) == {"t1": "one", "t2": "two"}
+
+
+def test_parse_batch_reply_skips_what_it_cannot_use():
+    assert _parse_batch_reply("Sorry, I cannot help with that") == {}
+    assert _parse_batch_reply('{"responses": "none"}') == {}
+    assert _parse_batch_reply('{"responses": [{"id": 1, "response": "one"}, {"id": "t2"}, "t3"]}') == {"1": "one"}
@@ -0,0 +1,46 @@
+import pytest
+
+from services import dedup
+from services.pipeline import run_pipeline, run_pipeline_batch
+
+FIRST = "My phone has been overheating badly since the last update and the battery drains fast"
+REWORDED = "My phone has been overheating badly since the last update, and the battery drains fast!"
+ON_FIRE = "My phone has been overheating badly since the last update and caught fire, the battery drains fast"
+
+
+@pytest.fixture
+def index(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    index = dedup.NearDuplicateIndex(max_clusters=100, ttl_seconds=600, threshold=0.75)
+    monkeypatch.setattr(dedup, "get_index", lambda: index)
+    return index
+
+
+def test_reworded_ticket_reuses_response(index):
+    first = run_pipeline(FIRST)
+    second = run_pipeline(REWORDED)
+    assert second["eiga_analysis"]["near_duplicate"]["cluster_id"] == 1
+    assert second["eiga_analysis"]["llm_metadata"]["path"] == "near_duplicate"
+    assert second["eiga_analysis"]["customer_response"] == first["eiga_analysis"]["customer_response"]
+    assert second["secrm_analysis"]["text_length"] == len(REWORDED)
+
+
+def test_safety_words_are_never_masked_by_a_near_duplicate(index):
+    assert run_pipeline(FIRST)["urgency_level"] == "high"
+    result = run_pipeline(ON_FIRE)
+    assert result["urgency_level"] == "urgent"
+    assert result["secrm_analysis"]["urgency"] == "urgent"
+    assert result["secrm_analysis"]["text_length"] == len(ON_FIRE)
+    assert "near_duplicate" not in result["eiga_analysis"]
+    assert index.reused == 0
+
+
+def test_batches_reuse_responses_within_and_across_calls(index):
+    first, reworded, on_fire = run_pipeline_batch([FIRST, REWORDED, ON_FIRE])
+    assert "near_duplicate" not in first["eiga_analysis"]
+    assert reworded["eiga_analysis"]["near_duplicate"]["cluster_id"] == 1
+    assert reworded["customer_response"] == first["customer_response"]
+    assert on_fire["urgency_level"] == "urgent"
+    assert "near_duplicate" not in on_fire["eiga_analysis"]
+    again, = run_pipeline_batch([REWORDED])
+    assert again["eiga_analysis"]["near_duplicate"]["cluster_size"] == 3
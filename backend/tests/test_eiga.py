@@ -0,0 +1,25 @@
+import copy
+
+from services import taxonomy
+from services.eiga import RETENTION_RECOMMENDATION, run_eiga
+from services.secrm import run_secrm
+
+TICKET = "My battery caught fire and the screen is cracked, this is unacceptable"
+
+
+def test_editing_a_result_never_changes_the_taxonomy_snapshot():
+    snapshot = taxonomy.current()
+    sections = copy.deepcopy(snapshot.sections["business_impact"])
+    retention = dict(RETENTION_RECOMMENDATION)
+    first = run_eiga(run_secrm(TICKET), TICKET)
+    expected = copy.deepcopy(first)
+
+    first["risk_assessment"]["action"] = "edited"
+    for recommendation in first["business_recommendations"]:
+        recommendation["action"] = "edited"
+
+    second = run_eiga(run_secrm(TICKET), TICKET)
+    assert second["risk_assessment"] == expected["risk_assessment"]
+    assert second["business_recommendations"] == expected["business_recommendations"]
+    assert snapshot.sections["business_impact"] == sections
+    assert RETENTION_RECOMMENDATION == retention
@@ -0,0 +1,85 @@
+import threading
+import time
+
+import pytest
+
+from services import jobs
+from services.jobs import JobQueue, QueueFull
+
+MEDIUM = "My screen is a bit dim"
+HIGH = "The charger is slow and I want a refund"
+URGENT = "My battery caught fire"
+
+
+def make_queue(tmp_path, **options) -> JobQueue:
+    return JobQueue(path=str(tmp_path / "jobs.db"), workers=0, **options)
+
+
+def test_jobs_are_claimed_most_urgent_first(tmp_path):
+    queue = make_queue(tmp_path)
+    submitted = {text: queue.submit(text) for text in (MEDIUM, HIGH, URGENT, MEDIUM + "!")}
+    assert [submitted[text]["urgency"] for text in (MEDIUM, HIGH, URGENT)] == ["medium", "high", "urgent"]
+    assert submitted[URGENT]["ahead"] == 0
+    claimed = [queue._claim()[1] for _ in range(4)]
+    assert claimed == [URGENT, HIGH, MEDIUM, MEDIUM + "!"]
+    assert queue._claim() is None
+
+
+def test_a_job_is_claimed_again_after_its_lease_expires(tmp_path):
+    queue = make_queue(tmp_path, lease_seconds=0.05)
+    job_id = queue.submit(MEDIUM)["job_id"]
+    assert queue._claim()[::3] == (job_id, 1)
+    assert queue._claim() is None
+    time.sleep(0.1)
+    assert queue._claim()[::3] == (job_id, 2)
+
+
+def test_a_job_fails_after_max_attempts(tmp_path):
+    queue = make_queue(tmp_path, lease_seconds=0.01, max_attempts=2)
+    job_id = queue.submit(MEDIUM)["job_id"]
+    for _ in range(2):
+        assert queue._claim()[0] == job_id
+        time.sleep(0.02)
+    assert queue._claim() is None
+    queue._last_maintenance = 0
+    queue._maintain()
+    job = queue.get(job_id)
+    assert (job["status"], job["error"]) == ("failed", "worker lost after 2 attempts")
+
+
+def test_a_failing_pipeline_is_retried_then_failed(tmp_path, monkeypatch):
+    def broken(text):
+        raise RuntimeError("pipeline down")
+
+    monkeypatch.setattr(jobs, "run_pipeline", broken)
+    queue = make_queue(tmp_path, max_attempts=2)
+    job_id = queue.submit(MEDIUM)["job_id"]
+    queue._run(*queue._claim())
+    assert queue.get(job_id)["status"] == "queued"
+    queue._run(*queue._claim())
+    job = queue.get(job_id)
+    assert (job["status"], job["error"], job["attempts"]) == ("failed", "pipeline down", 2)
+
+
+def test_submits_beyond_max_queued_are_refused(tmp_path):
+    queue = make_queue(tmp_path, max_queued=2)
+    queue.submit(MEDIUM)
+    queue.submit(HIGH)
+    with pytest.raises(QueueFull):
+        queue.submit(URGENT)
+    queue._claim()
+    queue.submit(URGENT)
+
+
+def test_long_polls_beyond_max_waiters_return_at_once(tmp_path):
+    queue = make_queue(tmp_path, max_waiters=1)
+    job_id = queue.submit(MEDIUM)["job_id"]
+    waiter = threading.Thread(target=queue.wait, args=(job_id, 0.5))
+    waiter.start()
+    time.sleep(0.05)
+    assert queue.waiters == 1
+    started = time.monotonic()
+    assert queue.wait(job_id, 0.5)["status"] == "queued"
+    assert time.monotonic() - started < 0.1
+    waiter.join()
+    assert queue.waiters == 0
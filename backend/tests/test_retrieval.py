@@ -0,0 +1,83 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from services import retrieval
+from services.pipeline import run_pipeline
+from services.retrieval import MIN_GROWTH, RECORDS_FILE, VECTORS_FILE, ResolvedIndex
+
+RESOLVED = "My phone keeps overheating badly when charging and the battery drains in a few hours"
+REPLY = "Please recalibrate the battery: charge it to 100%, then let it run down completely."
+REWORDED = "My phone keeps overheating badly when charging, and the battery drains within a few hours"
+ON_FIRE = "My phone keeps overheating badly when charging and caught fire, the battery drains in a few hours"
+
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    index = ResolvedIndex(str(tmp_path / "resolved"))
+    monkeypatch.setattr(retrieval, "get_index", lambda: index)
+    return index
+
+
+def test_reworded_ticket_gets_the_stored_reply(index):
+    index.add(RESOLVED, REPLY)
+    result = run_pipeline(REWORDED)
+    assert result["eiga_analysis"]["llm_metadata"]["path"] == "retrieval"
+    assert result["eiga_analysis"]["customer_response"] == REPLY
+
+
+def test_safety_words_never_get_a_stored_non_urgent_reply(index):
+    index.add(RESOLVED, REPLY)
+    # Close enough on text alone; only the SECRM profile tells them apart
+    assert index.search(ON_FIRE, "en") is not None
+    result = run_pipeline(ON_FIRE)
+    assert result["urgency_level"] == "urgent"
+    assert result["eiga_analysis"]["llm_metadata"]["path"] != "retrieval"
+    assert result["eiga_analysis"]["customer_response"] != REPLY
+
+
+def test_add_stores_language_and_profile(index):
+    assert index.add_many([{"text": RESOLVED, "reply": REPLY},
+                           {"text": "Mon écran ne s'allume plus depuis hier", "reply": "Essayez..."}]) == [0, 1]
+    assert index.add("The screen flickers", "Update the display driver") == 2
+    assert len(index) == 3
+    record = index.search(RESOLVED, "en")
+    assert (record["urgency"], record["components"]) == ("high", ["battery", "overheating"])
+    assert index.search("Mon écran ne s'allume plus", "fr")["id"] == 1
+
+
+def test_adds_from_another_process_are_seen(index, tmp_path):
+    index.add(RESOLVED, REPLY)
+    tickets = tmp_path / "tickets.ndjson"
+    tickets.write_text(json.dumps({"text": "The screen flickers after the update", "reply": "Roll back"}) + "\n")
+    subprocess.run([sys.executable, "-m", "services.retrieval", "-p", index.path, "add", str(tickets)],
+                   check=True, capture_output=True, cwd=os.path.dirname(os.path.dirname(__file__)))
+    assert len(index) == 2
+    assert index.search("The screen flickers after the update")["reply"] == "Roll back"
+
+
+def test_capacity_grows_without_losing_rows(index):
+    tickets = [{"text": f"ticket {i} my screen flickers {i}", "reply": f"reply {i}"} for i in range(MIN_GROWTH + 1)]
+    index.add_many(tickets)
+    capacity = index.capacity
+    assert capacity >= MIN_GROWTH + 1
+    index.add_many([{"text": "ticket extra my screen flickers", "reply": "reply extra"}] * (capacity - len(index) + 1))
+    assert index.capacity > capacity
+    assert os.path.getsize(os.path.join(index.path, VECTORS_FILE)) == index.capacity * index.dimensions * 4
+    assert index.search("ticket 3 my screen flickers 3", threshold=0.99)["reply"] == "reply 3"
+
+
+def test_restart_after_an_interrupted_add(index):
+    index.add(RESOLVED, REPLY)
+    # A writer that died after writing a vector and half a record, before meta.json
+    with open(os.path.join(index.path, RECORDS_FILE), "ab") as handle:
+        handle.write(b'{"id": 1, "text": "half a rec')
+    restarted = ResolvedIndex(index.path)
+    assert len(restarted) == 1
+    assert restarted.add("The screen flickers", "Update the display driver") == 1
+    with open(os.path.join(index.path, RECORDS_FILE), encoding="utf-8") as handle:
+        assert [json.loads(line)["id"] for line in handle] == [0, 1]
+    assert ResolvedIndex(index.path).search("The screen flickers")["reply"] == "Update the display driver"
@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from services import pipeline  # noqa: F401  (registers every section and compiler)
+from services import taxonomy
+from services.secrm import run_secrm
+from services.taxonomy import TaxonomyError
+
+BRICKED = "My phone is a brick now"
+
+
+@pytest.fixture
+def live(monkeypatch):
+    """The built-in snapshot, restored after the test whatever it reloads"""
+    snapshot = taxonomy.current()
+    monkeypatch.setattr(taxonomy, "_current", snapshot)
+    monkeypatch.setattr(taxonomy, "_last_reload", {})
+    return snapshot
+
+
+def write(tmp_path, data, name="taxonomy.json"):
+    path = tmp_path / name
+    path.write_text(data if isinstance(data, str) else json.dumps(data), encoding="utf-8")
+    return str(path)
+
+
+def with_urgent_word(snapshot, word):
+    return {"version": "2", "urgent_words": snapshot.sections["urgent_words"] + [word]}
+
+
+@pytest.mark.parametrize("data, message", [
+    ("{not json", "cannot read"),
+    ({"urgent_words": ["asap"]}, "'version' field"),
+    ({"version": "2", "colours": {}}, "unknown sections: colours"),
+    ({"version": "2", "urgent_words": ["ASAP"]}, "invalid section 'urgent_words'"),
+    ({"version": "2", "business_impact": {"low": {"priority": "P4"}}}, "invalid section 'business_impact'"),
+])
+def test_an_invalid_file_keeps_the_previous_snapshot(live, tmp_path, data, message):
+    with pytest.raises(TaxonomyError, match=message):
+        taxonomy.reload(write(tmp_path, data))
+    assert taxonomy.current() is live
+    assert run_secrm("My screen flickers")["components"]
+
+
+def test_reload_rebuilds_only_what_the_changed_sections_feed(live, tmp_path):
+    assert run_secrm(BRICKED)["urgency"] == "medium"
+    result = taxonomy.reload(write(tmp_path, with_urgent_word(live, "brick")))
+
+    expected = [name for name, (inputs, _) in taxonomy._compilers.items() if "urgent_words" in inputs]
+    assert result["changed_sections"] == ["urgent_words"]
+    assert result["rebuilt"] == expected == ["matcher"]
+    snapshot = taxonomy.current()
+    assert snapshot.version == "2" and snapshot.digest != live.digest
+    for name, structure in snapshot.compiled.items():
+        assert (structure is live.compiled[name]) == (name not in expected)
+    assert run_secrm(BRICKED)["urgency"] == "urgent"
+    # The published snapshot was never mutated
+    assert "brick" not in live.sections["urgent_words"]
+
+
+def test_check_cli_reports_the_changed_sections(live, tmp_path, capsys):
+    path = write(tmp_path, with_urgent_word(live, "brick"))
+    assert taxonomy.main(["check", path]) == 0
+    report = json.loads(capsys.readouterr().out)
+    assert report == {"version": "2", "changed_sections": ["urgent_words"], "rebuilt": ["matcher"]}
+    assert taxonomy.current() is live
+
+
+def test_check_cli_rejects_an_invalid_file(live, tmp_path, capsys):
+    assert taxonomy.main(["check", write(tmp_path, {"version": "2", "urgent_words": []})]) == 1
+    assert "invalid section 'urgent_words'" in capsys.readouterr().err
@@ -0,0 +1,32 @@
+from services.secrm import run_secrm
+from services import tokens
+from services.tokens import DEFAULT_RESPONSE_TOKENS, RESPONSE_TOKENS, response_budget
+
+
+def test_response_budget_follows_secrm_urgency():
+    budgets = {}
+    for text in ("My screen is a bit dim", "The charger is slow and I want a refund", "My battery caught fire"):
+        secrm_data = run_secrm(text)
+        budgets[secrm_data["urgency"]] = response_budget(secrm_data["urgency"], 1, ceiling=10000)
+    assert set(budgets) == {"urgent", "high", "medium"} == set(RESPONSE_TOKENS)
+    assert budgets["urgent"] > budgets["high"] > budgets["medium"]
+
+
+def test_response_budget_extra_components_and_ceiling():
+    assert response_budget("high", 3, ceiling=10000) == RESPONSE_TOKENS["high"] + 100
+    assert response_budget("urgent", 5, ceiling=400) == 400
+    assert response_budget("unknown", 1, ceiling=10000) == DEFAULT_RESPONSE_TOKENS
+
+
+def test_truncate_cuts_inside_an_overflowing_piece(monkeypatch):
+    monkeypatch.setattr(tokens, "_get_encoding", lambda: None)
+    assert tokens.truncate("Error log: " + "A" * 2000, 10) == "Error log: " + "A" * 24
+    assert tokens.truncate("电池" * 240, 100) == "电池" * 50
+
+
+def test_condense_query_never_drops_a_whole_sentence(monkeypatch):
+    monkeypatch.setattr(tokens, "_get_encoding", lambda: None)
+    condensed, was_condensed = tokens.condense_query("我的手机电池" * 80, ["电池"], max_tokens=400)
+    assert was_condensed and condensed.startswith("我的手机电池") and len(condensed) > 300
+    condensed, _ = tokens.condense_query("Error log: " + "A" * 2000 + " my battery is dead", ["battery"], 400)
+    assert condensed.startswith("Error log: AAAA") and tokens.count_tokens(condensed) <= 401
@@ -0,0 +1,15 @@
+"""
+WSGI entry point for production servers
+Builds the Flask app and warms the compiled keyword tables at import, so a
+preforking server loads them once before it forks:
+
+    gunicorn -c gunicorn.conf.py      # Linux/macOS, see gunicorn.conf.py
+    waitress-serve --threads 8 wsgi:app   # Windows (threads, no fork)
+"""
+
+from app import create_app
+from services.pipeline import warm_up
+
+
+app = create_app()
+warm_up()
@@ -30,6 +30,45 @@ async function callPipeline(text) {
   return res.json();
 }
 
+// Streaming pipeline: SECRM analysis arrives first, then the response token by token.
+// Same origin as the page (Flask serves the frontend), so it works wherever it is deployed
+async function streamPipeline(text, { onSecrm, onToken, onResult } = {}) {
+  const res = await fetch('/api/pipeline?stream=1', {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json', 'Accept': 'text/event-stream' },
+    body: JSON.stringify({ text })
+  });
+  if (!res.ok || !res.body) throw new Error(`Pipeline request failed (${res.status})`);
+
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  let result = null;
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const raw = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      const event = (raw.match(/^event: (.*)$/m) || [])[1];
+      const data = JSON.parse((raw.match(/^data: (.*)$/m) || [])[1] || 'null');
+      if (event === 'secrm' && onSecrm) onSecrm(data);
+      else if (event === 'token' && onToken) onToken(data.text);
+      else if (event === 'result') {
+        result = data;
+        if (onResult) onResult(data);
+      }
+    }
+  }
+  // A dropped connection or a server error mid-stream ends the body without a result
+  if (!result) throw new Error('Pipeline stream ended without a result');
+  return result;
+}
+
 // Render functions
 function renderNavigation() {
   return `
@@ -882,33 +921,61 @@ function sendMessage() {
   // Show typing indicator
   showTypingIndicator();
   
-  // Send to SECRM-EIGA pipeline
-  fetch('/api/pipeline', {
-    method: 'POST',
-    headers: {
-      'Content-Type': 'application/json',
+  // Stream the SECRM-EIGA pipeline so the reply appears as it is generated
+  let streamingText = null;
+  streamPipeline(message, {
+    onToken: (token) => {
+      if (!streamingText) {
+        hideTypingIndicator();
+        streamingText = showStreamingMessage();
+      }
+      streamingText.textContent += token;
+      const chatMessages = document.getElementById('chatMessages');
+      chatMessages.scrollTop = chatMessages.scrollHeight;
     },
-    body: JSON.stringify({ text: message })
-  })
-  .then(response => response.json())
-  .then(data => {
-    hideTypingIndicator();
-    
-    // Add AI response to chat
-    addMessageToChat(data.customer_response, 'ai', data);
-    
-    // Add suggestions if available
-    if (data.intelligent_suggestions && data.intelligent_suggestions.length > 0) {
-      addSuggestionsToChat(data.intelligent_suggestions);
+    onResult: (data) => {
+      hideTypingIndicator();
+      removeStreamingMessage();
+      
+      // Add AI response to chat
+      addMessageToChat(data.customer_response, 'ai', data);
+      
+      // Add suggestions if available
+      if (data.intelligent_suggestions && data.intelligent_suggestions.length > 0) {
+        addSuggestionsToChat(data.intelligent_suggestions);
+      }
     }
   })
   .catch(error => {
     hideTypingIndicator();
+    removeStreamingMessage();
     addMessageToChat('Sorry, I encountered an error. Please try again.', 'ai');
     console.error('Error:', error);
   });
 }
 
+function showStreamingMessage() {
+  const chatMessages = document.getElementById('chatMessages');
+  const messageDiv = document.createElement('div');
+  messageDiv.className = 'message ai-message';
+  messageDiv.id = 'streamingMessage';
+  messageDiv.innerHTML = `
+    <div class="message-avatar">🤖</div>
+    <div class="message-content">
+      <div class="message-text"></div>
+    </div>
+  `;
+  chatMessages.appendChild(messageDiv);
+  return messageDiv.querySelector('.message-text');
+}
+
+function removeStreamingMessage() {
+  const streamingMessage = document.getElementById('streamingMessage');
+  if (streamingMessage) {
+    streamingMessage.remove();
+  }
+}
+
 function addMessageToChat(message, sender, data = null) {
   const chatMessages = document.getElementById('chatMessages');
   const messageDiv = document.createElement('div');
@@ -8,8 +8,14 @@ echo Installing/updating dependencies...
 py -m pip install -r backend/requirements.txt -q
 
 echo.
-echo Starting backend server...
-start "SECRM-EIGA Backend" cmd /k "cd backend && py app.py"
+if not defined SERVER_THREADS set SERVER_THREADS=8
+if /i "%~1"=="--production" (
+    echo Starting production server ^(waitress, %SERVER_THREADS% threads^)...
+    start "SECRM-EIGA Backend" cmd /k "cd backend && py -m waitress --port=5000 --threads=%SERVER_THREADS% wsgi:app"
+) else (
+    echo Starting backend server...
+    start "SECRM-EIGA Backend" cmd /k "cd backend && py app.py"
+)
 
 echo.
 echo Waiting for server to start...
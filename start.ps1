@@ -1,4 +1,8 @@
 # SECRM-EIGA Startup Script
+#   .\start.ps1               development server (app.py)
+#   .\start.ps1 -Production   waitress production server (wsgi.py)
+param([switch]$Production)
+
 Write-Host "Starting SECRM-EIGA AI Customer Service Solution..." -ForegroundColor Cyan
 Write-Host ""
 
@@ -10,10 +14,15 @@ Write-Host "Installing/updating dependencies..." -ForegroundColor Yellow
 py -m pip install -r backend/requirements.txt -q
 
 Write-Host ""
-Write-Host "Starting backend server..." -ForegroundColor Green
-
 # Start backend in new window
-Start-Process powershell -ArgumentList "-NoExit", "-Command", "cd '$PSScriptRoot\backend'; py app.py" -WindowStyle Normal
+if ($Production) {
+    $threads = if ($env:SERVER_THREADS) { $env:SERVER_THREADS } else { 8 }
+    Write-Host "Starting production server (waitress, $threads threads)..." -ForegroundColor Green
+    Start-Process powershell -ArgumentList "-NoExit", "-Command", "cd '$PSScriptRoot\backend'; py -m waitress --port=5000 --threads=$threads wsgi:app" -WindowStyle Normal
+} else {
+    Write-Host "Starting backend server..." -ForegroundColor Green
+    Start-Process powershell -ArgumentList "-NoExit", "-Command", "cd '$PSScriptRoot\backend'; py app.py" -WindowStyle Normal
+}
 
 # Wait for server to start
 Write-Host ""
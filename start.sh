@@ -0,0 +1,19 @@
+#!/usr/bin/env sh
+# SECRM-EIGA startup script
+#   ./start.sh               development server (app.py, auto-reload)
+#   ./start.sh --production  gunicorn with preforked workers (backend/gunicorn.conf.py)
+set -e
+
+cd "$(dirname "$0")"
+
+echo "Installing/updating dependencies..."
+python3 -m pip install -r backend/requirements.txt -q
+
+cd backend
+if [ "$1" = "--production" ]; then
+    echo "Starting production server on ${SERVER_BIND:-0.0.0.0:${PORT:-5000}}..."
+    exec python3 -m gunicorn -c gunicorn.conf.py
+fi
+
+echo "Starting development server on http://localhost:${PORT:-5000}..."
+exec python3 app.py